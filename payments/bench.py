@@ -0,0 +1,303 @@
+"""
+    Benchmark of payments collection run against the local mock server.
+
+    Starts mockserver.app, runs every provider N times in headless mode and writes
+    wall time and stage timing percentiles and peak memory usage to a JSON file,
+    so that results of two runs can be compared.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Sequence
+
+from browser import BrowserOptions
+from payments.payments import PaymentsManager
+from payments.main import create_providers
+
+# Seconds to wait for the mock server to start accepting connections
+SERVER_START_TIMEOUT = 30
+# Interval (in seconds) of browser processes memory sampling
+RSS_SAMPLING_INTERVAL = 0.2
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Percentile using linear interpolation between the closest ranks
+    :param values: sample values
+    :param q: percentile (0-100)
+    :return: percentile value
+    """
+    if not values:
+        raise ValueError('Cannot compute percentile of an empty sample')
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(values: Sequence[float]) -> dict[str, Any]:
+    """
+    Summary statistics of a sample
+    :param values: sample values in seconds
+    :return: dict with p50, p95, min, max and all samples
+    """
+    return {
+        'p50': round(percentile(values, 50), 3),
+        'p95': round(percentile(values, 95), 3),
+        'min': round(min(values), 3),
+        'max': round(max(values), 3),
+        'samples': [round(value, 3) for value in values],
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+class MockServer:
+    """
+    Mock server running in a child process
+    """
+    def __init__(self, port: int = 0) -> None:
+        """
+        :param port: port to listen on, 0 to pick a free one
+        """
+        self.port = port or _free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+        self._process: subprocess.Popen[bytes] | None = None
+        self._workdir = tempfile.TemporaryDirectory(prefix='payments-bench-')
+
+    @property
+    def pid(self) -> int | None:
+        """
+        Mock server process ID, None if not running
+        """
+        return None if self._process is None else self._process.pid
+
+    def __enter__(self) -> 'MockServer':
+        code = f'from mockserver.app import app; app.run(port={self.port}, debug=False, use_reloader=False)'
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(Path(__file__).resolve().parents[1]),
+                                                           os.getenv('PYTHONPATH', '')]))
+        # Mock server writes its request log to the current directory
+        self._process = subprocess.Popen([sys.executable, '-c', code], cwd=self._workdir.name, env=env,
+                                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f'Mock server exited with code {self._process.returncode}')
+            try:
+                with socket.create_connection(('127.0.0.1', self.port), timeout=1):
+                    return self
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError(f'Mock server did not start within {SERVER_START_TIMEOUT} seconds')
+
+    def __exit__(self, *_: Any) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait(10)
+            self._process = None
+        self._workdir.cleanup()
+
+
+class BrowserMemorySampler:
+    """
+    Samples total resident memory of the child processes (browser and driver) of this process.
+    Works on Linux only (uses /proc); peak stays None elsewhere.
+    """
+    def __init__(self, exclude: Sequence[int] = ()) -> None:
+        """
+        :param exclude: PIDs of child processes (with their descendants) not to be counted
+        """
+        self.peak: int | None = None
+        self._exclude = set(exclude)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+
+    def __enter__(self) -> 'BrowserMemorySampler':
+        if Path('/proc/self/status').exists():
+            self.peak = 0
+            self._thread.start()
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(RSS_SAMPLING_INTERVAL):
+            self.peak = max(self.peak or 0, sum(self._rss(pid) for pid in self._descendants()))
+
+    def _descendants(self) -> list[int]:
+        children: dict[int, list[int]] = {}
+        for entry in Path('/proc').iterdir():
+            if not entry.name.isdigit():
+                continue
+            try:
+                fields = (entry / 'stat').read_text().rsplit(')', 1)[1].split()
+            except OSError:
+                continue
+            children.setdefault(int(fields[1]), []).append(int(entry.name))
+        result: list[int] = []
+        pending = [pid for pid in children.get(os.getpid(), []) if pid not in self._exclude]
+        while pending:
+            pid = pending.pop()
+            result.append(pid)
+            pending += children.get(pid, [])
+        return result
+
+    @staticmethod
+    def _rss(pid: int) -> int:
+        try:
+            for line in Path(f'/proc/{pid}/status').read_text().splitlines():
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return 0
+
+
+def _python_peak_rss() -> int | None:
+    """
+    Peak resident memory of this process in bytes
+    """
+    if sys.platform == 'win32':
+        return None
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _megabytes(value: int | None) -> float | None:
+    return None if value is None else round(value / 2 ** 20, 1)
+
+
+def run(runs: int, provider_filter: str = '', chrome_path: str | None = None) -> dict[str, Any]:
+    """
+    Run the benchmark; PAYMENTS_MOCK_SERVER must point at a running mock server
+    :param runs: number of runs of every provider
+    :param provider_filter: run only providers matching this name
+    :param chrome_path: Chrome binary, None to download it automatically
+    :return: benchmark results
+    """
+    def browser_options() -> BrowserOptions:
+        return BrowserOptions(__file__, True, False, chrome_path, False, '', renderer_timeout=30)
+
+    wall: dict[str, list[float]] = {}
+    stages: dict[str, dict[str, list[float]]] = {}
+    failures: dict[str, int] = {}
+    for index in range(runs):
+        print(f'Run {index + 1}/{runs}...')
+        # Fresh providers every run, so that no state (e.g. login status) leaks between runs
+        selected = create_providers(provider_filter)
+        output = PaymentsManager(selected).collect_real(browser_options())
+        for name, provider in output.json().items():
+            wall.setdefault(name, []).append(float(provider['time']))
+            for stage, duration in provider.get('timings', {}).items():
+                stages.setdefault(name, {}).setdefault(stage, []).append(float(duration))
+            failed = any(payment['status'] == 'failure' for payment in provider['payments'])
+            failures[name] = failures.get(name, 0) + failed
+    return {
+        'providers': {
+            name: {
+                'wall': summarize(samples),
+                'stages': {stage: summarize(values) for stage, values in stages.get(name, {}).items()},
+                'failures': failures.get(name, 0),
+            }
+            for name, samples in wall.items()
+        }
+    }
+
+
+def print_summary(results: dict[str, Any]) -> None:
+    """
+    Print benchmark results as a table
+    :param results: results returned by run()
+    """
+    print(f'{"provider": <12} {"p50": >8} {"p95": >8} {"fail": >5}  stages (p50)')
+    for name, provider in results['providers'].items():
+        stages = ', '.join(f'{stage} {values["p50"]:.2f}' for stage, values in provider['stages'].items())
+        print(f'{name: <12} {provider["wall"]["p50"]: >8.2f} {provider["wall"]["p95"]: >8.2f} '
+              f'{provider["failures"]: >5}  {stages}')
+    memory = results['memory']
+    print(f'Peak RSS: python {memory["python_peak_mb"]} MB, browser {memory["browser_peak_mb"]} MB')
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses command line arguments.
+    :return: Namespace containing parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark payments collection against the local mock server',
+                                     prog='python -m payments.bench')
+    parser.add_argument('-n', '--runs', default=5, type=int,
+                        help='Number of runs of every provider (default: 5)')
+    parser.add_argument('-p', '--provider', default='',
+                        help='Run for selected providers only')
+    parser.add_argument('-o', '--output', default='bench.json',
+                        help='Output JSON file path (default: bench.json)')
+    parser.add_argument('--port', default=0, type=int,
+                        help='Mock server port (default: any free port)')
+    parser.add_argument('--chrome-path',
+                        help='Use provided Chrome binary instead of automatically downloading')
+    parser.add_argument('-v', '--verbose', default=False, action='store_true',
+                        help='Enable verbose mode (show debug logs)')
+    return parser.parse_args()
+
+
+def main() -> int:
+    """
+    Main program function.
+    :return: status code
+    """
+    args = parse_args()
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+    started = datetime.datetime.now()
+    with MockServer(args.port) as server:
+        os.environ['PAYMENTS_MOCK_SERVER'] = server.url
+        # Mock server accepts any non-empty credentials
+        for provider in create_providers():
+            os.environ.setdefault(f'{provider.name.upper()}_USERNAME', 'bench')
+            os.environ.setdefault(f'{provider.name.upper()}_PASSWORD', 'bench')
+        with BrowserMemorySampler(exclude=[pid for pid in [server.pid] if pid is not None]) as sampler:
+            results = run(args.runs, args.provider, args.chrome_path)
+    results = {
+        'meta': {
+            'started': started.isoformat(timespec='seconds'),
+            'runs': args.runs,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        **results,
+        'memory': {
+            'python_peak_mb': _megabytes(_python_peak_rss()),
+            'browser_peak_mb': _megabytes(sampler.peak),
+        },
+    }
+    print_summary(results)
+    with open(args.output, 'w', encoding='utf-8') as stream:
+        json.dump(results, stream, indent=2)
+    print(f'Results written to {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
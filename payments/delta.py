@@ -0,0 +1,55 @@
+"""
+    Changes of payments between two runs, as compact JSON.
+
+        python -m payments.delta previous.json current.json [-o delta.json] [--exit-code]
+"""
+import argparse
+import json
+import logging
+
+from payments.payments.delta import compare
+from payments.payments.paymentslist import PaymentsList
+
+
+def _load(path: str) -> PaymentsList:
+    with open(path, encoding='utf-8') as stream:
+        return PaymentsList.from_json(json.load(stream))
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses command line arguments.
+    :return: Namespace containing parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description='Find new, changed, paid and disappeared payments between two runs',
+                                     prog='python -m payments.delta')
+    parser.add_argument('previous',
+                        help='JSON output (-j/--json) of the previous or any archived run')
+    parser.add_argument('current',
+                        help='JSON output (-j/--json) of the current run')
+    parser.add_argument('-o', '--output',
+                        help='Write changes to a JSON file instead of the console')
+    parser.add_argument('--exit-code', default=False, action='store_true',
+                        help='Exit with status 1 if there are any changes')
+    return parser.parse_args()
+
+
+def main() -> int:
+    """
+    Main program function.
+    :return: status code
+    """
+    args = parse_args()
+    logging.disable(logging.CRITICAL)
+    changes = [change.json() for change in compare(_load(args.previous), _load(args.current))]
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as stream:
+            json.dump(changes, stream, indent=2, ensure_ascii=False)
+        print(f'{len(changes)} change(s) written to {args.output}')
+    else:
+        print(json.dumps(changes, indent=2, ensure_ascii=False))
+    return 1 if args.exit_code and changes else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
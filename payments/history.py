@@ -0,0 +1,85 @@
+"""
+    Queries of the run history store.
+
+        python -m payments.history latest [-p provider]
+        python -m payments.history trend -p provider [-l location] [-n bills]
+        python -m payments.history slowest [-n runs] [--stage stage]
+        python -m payments.history import output.json [--run-ts timestamp]
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+
+from payments.payments.history import TOTAL, HistoryStore
+from payments.payments.paymentslist import PaymentsList
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses command line arguments.
+    :return: Namespace containing parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description='Query history of payments and timings of all runs',
+                                     prog='python -m payments.history')
+    parser.add_argument('--db', default='',
+                        help='History database (default: PAYMENTS_HISTORY_DB or ~/.local/share/payments/history.db)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    latest = commands.add_parser('latest', help='Latest payment of every location')
+    latest.add_argument('-p', '--provider', default='',
+                        help='Show selected provider only')
+
+    trend = commands.add_parser('trend', help='Amounts of provider bills over time')
+    trend.add_argument('-p', '--provider', required=True,
+                       help='Provider name')
+    trend.add_argument('-l', '--location', default='',
+                       help='Show selected location only')
+    trend.add_argument('-n', '--bills', default=12, type=int,
+                       help='Number of the most recent bills per location (default: 12)')
+
+    slowest = commands.add_parser('slowest', help='Providers ordered by their average time')
+    slowest.add_argument('-n', '--runs', default=10, type=int,
+                         help='Number of the most recent runs taken into account (default: 10)')
+    slowest.add_argument('--stage', default=TOTAL,
+                         help='Compare times of the given stage (e.g. login) instead of whole provider times')
+
+    record = commands.add_parser('import', help='Record JSON output (-j/--json) of a run')
+    record.add_argument('json', nargs='+',
+                        help='JSON output files')
+    record.add_argument('--run-ts', default=None, type=datetime.datetime.fromisoformat,
+                        help='Run time in ISO format (default: file modification time)')
+    return parser.parse_args()
+
+
+def main() -> int:
+    """
+    Main program function.
+    :return: status code
+    """
+    args = parse_args()
+    logging.disable(logging.CRITICAL)
+    with HistoryStore(args.db or None) as store:
+        if args.command == 'latest':
+            for payment in store.latest(args.provider.lower()):
+                print(f'{payment.provider: <12} {payment.location: <12} {payment.amount_text: >10} '
+                      f'{payment.due_date or "-": <10} {payment.status: <8} {payment.run_ts}')
+        elif args.command == 'trend':
+            for payment in store.trend(args.provider.lower(), args.location, args.bills):
+                print(f'{payment.location: <12} {payment.due_date: <10} {payment.amount_text: >10}')
+        elif args.command == 'slowest':
+            for speed in store.slowest(args.runs, args.stage):
+                print(f'{speed.provider: <12} avg {speed.average: >7.2f}s  max {speed.maximum: >7.2f}s  '
+                      f'({speed.runs} runs)')
+        else:
+            for path in args.json:
+                with open(path, encoding='utf-8') as stream:
+                    payments = PaymentsList.from_json(json.load(stream))
+                run_ts = args.run_ts or datetime.datetime.fromtimestamp(os.path.getmtime(path))
+                print(f'{path}: recorded as run {store.record(payments, run_ts)}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+"""
+    Startup cost benchmark: import time of a module measured with python -X importtime.
+
+    Imports the module in a fresh interpreter -n times and prints the median total import time,
+    the most expensive top-level packages and whether any of the heavy packages got imported.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Any, NamedTuple
+
+# Packages which should be imported only by the providers actually using them
+HEAVY_PACKAGES = ('numpy', 'scipy')
+
+
+class ImportTime(NamedTuple):
+    """
+    Single line of -X importtime output
+    """
+    module: str
+    # Microseconds spent importing the module itself
+    self_us: int
+    # Microseconds including imports of its dependencies
+    cumulative_us: int
+
+
+def parse_importtime(output: str) -> list[ImportTime]:
+    """
+    Parse -X importtime output
+    :param output: standard error of the interpreter
+    :return: imported modules, in the order their imports completed
+    """
+    entries: list[ImportTime] = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, module = line.removeprefix('import time:').split('|', 2)
+        if not self_us.strip().isdigit():
+            # Header line
+            continue
+        entries.append(ImportTime(module.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def by_package(entries: list[ImportTime]) -> dict[str, int]:
+    """
+    Import time of top-level packages
+    :param entries: parsed -X importtime output
+    :return: mapping of top-level package name to microseconds spent importing its modules, the slowest first
+    """
+    packages: dict[str, int] = {}
+    for entry in entries:
+        package = entry.module.split('.', 1)[0]
+        packages[package] = packages.get(package, 0) + entry.self_us
+    return dict(sorted(packages.items(), key=lambda item: item[1], reverse=True))
+
+
+def measure(module: str) -> list[ImportTime]:
+    """
+    Import a module in a fresh interpreter
+    :param module: module name, e.g. payments.main
+    :return: parsed -X importtime output
+    """
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                             capture_output=True, text=True, check=False)
+    if process.returncode:
+        raise RuntimeError(f'Cannot import {module}:\n{process.stderr.strip().splitlines()[-1]}')
+    return parse_importtime(process.stderr)
+
+
+def run(module: str, runs: int) -> dict[str, Any]:
+    """
+    Measure import time of a module several times
+    :param module: module name
+    :param runs: number of fresh interpreters
+    :return: dict with median total import time in milliseconds, median per-package times and heavy packages imported
+    """
+    totals: list[float] = []
+    packages: dict[str, list[int]] = {}
+    imported: set[str] = set()
+    for _ in range(runs):
+        entries = measure(module)
+        totals.append(sum(entry.self_us for entry in entries) / 1000)
+        for package, microseconds in by_package(entries).items():
+            packages.setdefault(package, []).append(microseconds)
+        imported.update(entry.module for entry in entries)
+    return {
+        'module': module,
+        'runs': runs,
+        'total_ms': round(statistics.median(totals), 1),
+        'packages_ms': {package: round(statistics.median(values) / 1000, 1)
+                        for package, values in sorted(packages.items(),
+                                                      key=lambda item: statistics.median(item[1]), reverse=True)},
+        'heavy_packages': [package for package in HEAVY_PACKAGES if package in imported],
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses command line arguments.
+    :return: Namespace containing parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description='Measure import time of the application (python -X importtime)',
+                                     prog='python -m payments.importtime')
+    parser.add_argument('-m', '--module', default='payments.main',
+                        help='Module to be imported (default: payments.main)')
+    parser.add_argument('-n', '--runs', default=5, type=int,
+                        help='Number of fresh interpreters the median is taken of (default: 5)')
+    parser.add_argument('--top', default=10, type=int,
+                        help='Number of the slowest packages shown (default: 10)')
+    parser.add_argument('-o', '--output',
+                        help='Also write results to a JSON file')
+    return parser.parse_args()
+
+
+def main() -> int:
+    """
+    Main program function.
+    :return: status code
+    """
+    args = parse_args()
+    results = run(args.module, args.runs)
+    print(f'{results["module"]}: {results["total_ms"]} ms (median of {results["runs"]} runs)')
+    for package, milliseconds in list(results['packages_ms'].items())[:args.top]:
+        print(f'  {package: <24} {milliseconds: >8.1f} ms')
+    print(f'Heavy packages imported: {", ".join(results["heavy_packages"]) or "none"}')
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as stream:
+            json.dump(results, stream, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
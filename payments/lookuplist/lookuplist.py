@@ -1,26 +1,32 @@
 """
     Lookup list class
 """
-from collections.abc import Sequence
+from collections.abc import Callable, Sequence
 from operator import eq, contains
 from typing import overload, Union, TypeVar
 
 T = TypeVar('T')
 
 
+def _class_name(item: object) -> str:
+    return item.__class__.__name__
+
+
 class LookupList(Sequence[T]):
     """
-    List extension, allowing indexing by class name of the list item
+    List extension, allowing indexing by class name (or other name) of the list item
 
     Example usage:
         lst = LookupList(Class1(), Class1(), Class2())
         lst['class1'] # -> same as lst[0]
         lst[''] # -> same as lst
+        LookupList(factory1, factory2, name=lambda factory: factory.name)['factory1'] # -> factory1
     """
 
-    def __init__(self, *items: T) -> None:
-        """Initialize the LookupList with optional fallback items."""
+    def __init__(self, *items: T, name: Callable[[T], str] = _class_name) -> None:
+        """Initialize the LookupList with optional fallback items and item name function."""
         self._items = list(items)
+        self._name = name
 
     @overload
     def __getitem__(self, key: int) -> T:
@@ -81,7 +87,7 @@ class LookupList(Sequence[T]):
             else:
                 predicate = eq
                 needle = key.lower()
-            return next(item for item in self._items if predicate(item.__class__.__name__.lower(), needle))
+            return next(item for item in self._items if predicate(self._name(item).lower(), needle))
         except StopIteration:
             raise KeyError(f"No item with class name '{key}' found.")
 
@@ -102,14 +108,14 @@ class LookupList(Sequence[T]):
             Check if the key exists either directly or through fallback.
         """
         if isinstance(key, str):
-            return any(item.__class__.__name__.lower() == key.lower() for item in self._items)
+            return any(self._name(item).lower() == key.lower() for item in self._items)
         return key in self._items
 
     def __repr__(self) -> str:
         """
             Return string representation of the LookupList.
         """
-        return f"<LookupList[{', '.join(item.__class__.__name__ for item in self._items)}]>"
+        return f"<LookupList[{', '.join(self._name(item) for item in self._items)}]>"
 
     def __len__(self) -> int:
         return len(self._items)
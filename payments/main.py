@@ -7,18 +7,29 @@ import datetime
 import json
 import logging
 import os
+import sqlite3
 import sys
+import tempfile
 from argparse import Namespace
+from contextlib import ExitStack
 from enum import StrEnum
 from functools import cache
-from typing import Sequence
+from operator import attrgetter
+from typing import Any, Callable, NamedTuple
 
 from str_to_bool import str_to_bool
 
 from payments import providers
 from browser import BrowserOptions, setup_logging
 from payments.lookuplist import LookupList
-from payments.payments import PaymentsManager, Payment
+from payments.payments import (IncrementalJsonWriter, NdjsonWriter, PaymentsManager, Payment, ProviderResult,
+                               ProviderScheduler, RunState)
+from payments.payments.exceptions import FilterError
+from payments.payments.filters import Filter
+from payments.payments.history import HistoryStore
+from payments.payments.resultcache import ResultCache, parse_age
+from payments.payments.runstate import new_run_id
+from payments.providers.session_cache import SessionCache
 
 log = setup_logging(__name__)
 
@@ -64,6 +75,33 @@ def is_elevated() -> bool:
         return bool(geteuid() == 0)
 
 
+def parse_budget(value: str) -> tuple[str, float]:
+    """
+    Parses provider time budget argument
+    :param value: budget in "provider=seconds" format, "*" standing for all providers
+    :return: tuple (provider name, budget in seconds)
+    """
+    name, separator, seconds = value.partition('=')
+    try:
+        if not separator or not name.strip():
+            raise ValueError(value)
+        return name.strip().lower(), float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Invalid budget "{value}", expected provider=seconds')
+
+
+def parse_filter(value: str) -> Filter:
+    """
+    Parses filter argument, so that an invalid filter is reported before any provider is processed
+    :param value: filter expression
+    :return: compiled filter
+    """
+    try:
+        return Filter.parse(value)
+    except FilterError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
 def parse_args() -> Namespace:
     """
     Parses command-line arguments and returns a Namespace object containing
@@ -84,19 +122,58 @@ def parse_args() -> Namespace:
                         help='Clear browser user profile on exit')
     parser.add_argument('-l', '--headless', default=None, type=str_to_bool,
                         help='Toggle headless browser mode (default: auto)')
+    parser.add_argument('-b', '--budget', default=[], action='append', type=parse_budget,
+                        help='Time budget for a provider as provider=seconds, "*" standing for all providers '
+                             '(can be used multiple times)')
     parser.add_argument('-d', '--debug',
                         help='Comma-separated list of debug flags (implicates verbose mode)'
                              f'({DebugFlags.BROWSER_PROFILE}: browser profile creation debugging, '
                              f'{DebugFlags.MULTIMEDIA_LOGIN}: Multimedia provider login debugging)'
                              f'{DebugFlags.MULTIMEDIA_PROFILE}: Use persistent profile for Multimedia provider)')
+    parser.add_argument('--deadline', default=None, type=float,
+                        help='Time in seconds after which remaining providers are skipped')
+    parser.add_argument('--jobs', default=1, type=int,
+                        help='Number of providers processed concurrently, each in its own browser session')
     parser.add_argument('-j', '--json',
-                        help='Write retrieved payments to JSON file (UTF-8)')
+                        help='Write retrieved payments to JSON file (UTF-8), updated as providers are processed')
+    parser.add_argument('--ndjson',
+                        help='Write payments of every provider as a JSON line as soon as the provider is processed')
     parser.add_argument('-J', '--print-json', default=False, action='store_true',
                         help='Print retrieved payments in JSON format to console')
+    parser.add_argument('--max-age', default=None, type=parse_age,
+                        help='Reuse payments collected by previous runs if not older than the given age '
+                             '(seconds or with s/m/h/d suffix, e.g. 12h); outstanding payments close to '
+                             'their due date are always collected again')
+    parser.add_argument('--result-cache', default='',
+                        help='Result cache file used with --max-age '
+                             '(default: PAYMENTS_RESULT_CACHE or ~/.cache/payments/results.json)')
     parser.add_argument('-o', '--output',
                         help='Write retrieved payments to output file (UTF-8)')
     parser.add_argument('-p', '--provider', default='',
                         help=f'Run for selected providers only\nAvailable providers: {providers.all_lower()}')
+    parser.add_argument('--retries', default=0, type=int,
+                        help='Number of times providers which failed are collected again at the end of the run, '
+                             'each time in a fresh browser session (default: 0)')
+    parser.add_argument('--retry-backoff', default=5, type=float,
+                        help='Delay in seconds before the first retry, doubled before every next one (default: 5)')
+    parser.add_argument('--run-id', default=None,
+                        help='ID of this run, naming its checkpoint file in PAYMENTS_RUN_STATE_DIR '
+                             'or ~/.cache/payments/runs (default: current time, or the resumed run ID)')
+    parser.add_argument('--resume', default=None, metavar='RUN',
+                        help='Resume a run, given its ID or path to its checkpoint or JSON output file: '
+                             'providers which succeeded in that run are not collected again')
+    parser.add_argument('--schedule-from', default=[], action='append',
+                        help='Order providers longest-first using timings from a previous run JSON output '
+                             '(can be used multiple times)')
+    parser.add_argument('--timings-history', default='',
+                        help='Order providers longest-first using timings from a history file, '
+                             'and update it with timings of this run')
+    parser.add_argument('--session-cache', nargs='?', default=None, const='',
+                        help='Reuse authenticated sessions stored (encrypted) in the given directory '
+                             '(default: PAYMENTS_SESSION_CACHE_DIR or ~/.cache/payments/sessions)')
+    parser.add_argument('--history-db', nargs='?', default=None, const='',
+                        help='Record payments and timings of this run in the given history database '
+                             '(default: PAYMENTS_HISTORY_DB or ~/.local/share/payments/history.db)')
     parser.add_argument('--persistent-profile-dir', default='',
                         help='Persisten browser profile directory location (default: user temp directory)')
     parser.add_argument('-t', '--trace', default=False, action='store_true',
@@ -105,10 +182,15 @@ def parse_args() -> Namespace:
                         help='Sort in reverse order')
     parser.add_argument('-s', '--sort', default=None,
                         help='Sort payments by the provided key', choices=Payment.SORT_KEYS)
-    parser.add_argument('-f', '--filter', default=None,
-                        help=f'Filter (<=, <, =, !=, >, >=) by provided keys {Payment.SORT_KEYS}')
+    parser.add_argument('-f', '--filter', default=None, type=parse_filter,
+                        help=f'Filter by keys {Payment.SORT_KEYS}, with <=, <, =, !=, >, >=, "in (a, b)", '
+                             f'"in low..high", and, or, not and parentheses, '
+                             f'e.g. "amount>0 and due_date<=2026-11-01 and provider in (energa,pgnig)"')
     parser.add_argument('-v', '--verbose', default=False, action='store_true',
                         help='Enable verbose mode (show debug logs)')
+    parser.add_argument('--chrome-trace', default=None,
+                        help='Write per-provider stage timings to a file in Chrome trace format '
+                             '(viewable in chrome://tracing or Perfetto)')
     parser.add_argument('--chrome-path',
                         help='Use provided Chrome binary instead of automatically downloading')
 
@@ -130,6 +212,77 @@ def parse_args() -> Namespace:
     return args
 
 
+def browser_options_factory(headless: bool, trace: bool, chrome_path: str | None, keep_profile: bool,
+                            profile_dir: str) -> Callable[[int], BrowserOptions]:
+    """
+    Creates browser options factory
+    :param headless: run browser in headless mode
+    :param trace: enable trace logging for browser actions
+    :param chrome_path: Chrome binary, None to download it automatically
+    :param keep_profile: keep browser user profile on exit
+    :param profile_dir: persistent browser profile directory, empty for user temp directory
+    :return: factory taking the collection worker number
+    """
+    def browser_options(worker: int = 0) -> BrowserOptions:
+        """
+        Browser options factory
+        :param worker: collection worker number; workers other than the first one get their own profile directory
+        """
+        worker_profile_dir = profile_dir
+        if worker > 0:
+            worker_profile_dir = os.path.join(profile_dir or tempfile.gettempdir(), f'payments-worker-{worker}')
+        return BrowserOptions(__file__,
+                              headless,
+                              trace,
+                              chrome_path,
+                              keep_profile,
+                              worker_profile_dir,
+                              renderer_timeout=30)
+
+    return browser_options
+
+
+class ProviderFactory(NamedTuple):
+    """
+    Provider name with its constructor arguments, allowing it to be selected before its module is imported
+    """
+    name: str
+    args: tuple[Any, ...]
+
+    def create(self) -> providers.Provider:
+        """
+        Creates the provider
+        """
+        return providers.provider_class(self.name)(*self.args)
+
+
+def create_providers(selection: str = '') -> LookupList[providers.Provider]:
+    """
+    Creates supported providers with their locations. Modules of providers which are not selected are not imported.
+    :param selection: providers in the -p/--provider format, empty for all
+    :return: providers list
+    """
+    hodowlana = 'Hodowlana'
+    bryla = 'Bryla'
+    sezamowa = 'Sezamowa'
+
+    factories = LookupList[ProviderFactory](
+        ProviderFactory('Pgnig', (sezamowa,)),
+        ProviderFactory('Energa', (hodowlana, bryla, sezamowa)),
+        ProviderFactory('Actum', (hodowlana,)),
+        ProviderFactory('Multimedia', ({'90': hodowlana, '77': sezamowa},)),
+        ProviderFactory('Pewik', (sezamowa,)),
+        ProviderFactory('Opec', (sezamowa,)),
+        ProviderFactory('Nordhome', (bryla,)),
+        ProviderFactory('Vectra', (sezamowa,)),
+        name=attrgetter('name')
+    )
+    selected = factories[selection.lower()]
+    if isinstance(selected, ProviderFactory):
+        selected = [selected]
+    return LookupList[providers.Provider](*(factory.create() for factory in selected))
+
+
 def main() -> int:
     """
     This function serves as the main entry point for the application. It initializes
@@ -161,45 +314,62 @@ def main() -> int:
     # otherwise, use headed browser when running under the debugger and headless one when otherwise
     headless = args.headless if args.headless is not None else not is_debugger_active()
 
-    def browser_options() -> BrowserOptions:
-        """
-        Browser options factory
-        """
-        return BrowserOptions(__file__,
-                              headless,
-                              args.trace,
-                              args.chrome_path,
-                              not args.clear_profile_on_exit,
-                              args.persistent_profile_dir,
-                              renderer_timeout=30)
+    browser_options = browser_options_factory(headless, args.trace, args.chrome_path,
+                                              not args.clear_profile_on_exit, args.persistent_profile_dir)
 
     if args.trace and not verbose:
         print('ℹ️ Trace enabled, but verbose mode is off — no logs will be shown on console')
 
-    hodowlana = 'Hodowlana'
-    bryla = 'Bryla'
-    sezamowa = 'Sezamowa'
+    selected_providers = create_providers(args.provider)
+    if not selected_providers:
+        print(f'ERROR: No providers can be found for provided argument "{args.provider}"')
+    scheduler = None
+    if args.schedule_from or args.timings_history:
+        scheduler = ProviderScheduler.from_files(*args.schedule_from,
+                                                 *([args.timings_history] if args.timings_history else []))
+    session_cache = None
+    if args.session_cache is not None:
+        try:
+            session_cache = SessionCache(args.session_cache or None)
+        except Exception as e:
+            print(f'WARNING: Session cache disabled: {e}')
+    result_cache = None if args.max_age is None else ResultCache(args.max_age, args.result_cache or None)
+    if args.resume:
+        try:
+            run_state = RunState.resume(args.resume, run_id=args.run_id)
+        except (OSError, ValueError) as e:
+            print(f'ERROR: Cannot resume run "{args.resume}": {e}')
+            return 1
+    else:
+        run_state = RunState(args.run_id or new_run_id())
+    run_state.evict_expired()
+    print(f'Run ID: {run_state.run_id} (resume with --resume {run_state.run_id})')
+    payments = PaymentsManager(selected_providers, scheduler, dict(args.budget), args.deadline, session_cache,
+                               result_cache, run_state, args.retries, args.retry_backoff)
+    with ExitStack() as stack:
+        writers: list[Callable[[ProviderResult], None]] = []
+        if args.ndjson:
+            writers.append(stack.enter_context(NdjsonWriter(args.ndjson)))
+        if args.json:
+            # Keep results of providers processed so far, in case the run does not complete
+            writers.append(IncrementalJsonWriter(args.json))
 
-    providers_list = LookupList[providers.Provider](
-        providers.Pgnig(sezamowa),
-        providers.Energa(hodowlana, bryla, sezamowa),
-        providers.Actum(hodowlana),
-        providers.Multimedia({'90': hodowlana, '77': sezamowa}),
-        providers.Pewik(sezamowa),
-        providers.Opec(sezamowa),
-        providers.Nordhome(bryla),
-        providers.Vectra(sezamowa)
-    )
+        def on_result(result: ProviderResult) -> None:
+            for writer in writers:
+                writer(result)
 
-    selected_providers: providers.Provider | Sequence[providers.Provider]
-    if args_provider := args.provider.lower():
-        selected_providers = providers_list[args_provider]
-        if not selected_providers:
-            print(f'ERROR: No providers can be found for provided argument "{args_provider}"')
-    else:
-        selected_providers = providers_list['']
-    payments = PaymentsManager(selected_providers)
-    output = payments.collect(browser_options)
+        output = payments.collect(browser_options, jobs=args.jobs, on_result=on_result if writers else None)
+    if args.chrome_trace:
+        payments.write_chrome_trace(args.chrome_trace)
+    if args.history_db is not None:
+        try:
+            with HistoryStore(args.history_db or None) as history:
+                history.record(output, begin_time, run_state.run_id)
+        except (OSError, sqlite3.Error) as e:
+            print(f'WARNING: Run not recorded in history: {e}')
+    if scheduler and args.timings_history and output.provider_timings:
+        scheduler.update(output.provider_timings)
+        scheduler.save(args.timings_history)
     if args.sort:
         output = output.sort(args.sort, args.reverse)
     if args.filter:
@@ -220,6 +390,8 @@ def main() -> int:
     end_time = datetime.datetime.now()
     print('Finished at %s' % end_time)
     print('Took %s ' % (end_time - begin_time))
+    if makespan := payments.makespan_summary():
+        print(makespan)
     return 0
 
 
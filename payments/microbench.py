@@ -0,0 +1,158 @@
+"""
+    Micro-benchmarks of the payments data path.
+
+    dates: DueDate construction over all dates found in the mock server content,
+    with dateutil, with the fast-path parser and with the parser cache.
+    payments: sorting, filtering and grouping of a large synthetic PaymentsList,
+    per Payment object and with the columnar backend.
+"""
+import argparse
+import logging
+import operator
+import random
+import re
+import timeit
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable
+
+from dateutil import parser as dateutil_parser
+
+from payments.payments.payment import Amount, DueDate, Payment, _parse_due_date
+from payments.payments.paymentslist import PaymentsList
+
+MOCKSERVER_CONTENT = Path(__file__).resolve().parents[1] / 'mockserver' / 'providers'
+# Dates as shown by the portals: dd-mm-yyyy, dd.mm.yyyy and ISO
+_DATE = re.compile(r'\b(?:\d{2}[-.]\d{2}[-.]\d{4}|\d{4}-\d{2}-\d{2})\b')
+
+
+def mockserver_dates(content: Path = MOCKSERVER_CONTENT) -> list[str]:
+    """
+    Date strings found in the mock server pages
+    :param content: mock server providers directory
+    :return: date strings, in the order they appear
+    """
+    return [value for path in sorted(content.rglob('*.html'))
+            for value in _DATE.findall(path.read_text(encoding='utf-8'))]
+
+
+def _dateutil(value: str) -> date:
+    return dateutil_parser.parse(value, dayfirst=re.match(r'.*\d\d\d\d$', value) is not None).date()
+
+
+def time_per_call(function: Callable[[str], object], values: list[str], number: int,
+                  setup: Callable[[], None] = lambda: None) -> float:
+    """
+    Average time of a single call
+    :param function: function called with every value
+    :param values: values
+    :param number: number of passes over all values
+    :param setup: called before every pass, untimed
+    :return: microseconds per call
+    """
+    total = 0.0
+    for _ in range(number):
+        setup()
+        total += timeit.timeit(lambda: [function(value) for value in values], number=1)
+    return total / number / len(values) * 1e6
+
+
+def synthetic_payments(size: int, seed: int = 0) -> PaymentsList:
+    """
+    Payments of several providers and locations over a few years
+    :param size: number of payments
+    :param seed: random seed
+    :return: PaymentsList object
+    """
+    generator = random.Random(seed)
+    providers = ['actum', 'energa', 'multimedia', 'nordhome', 'opec', 'pewik', 'pgnig', 'vectra']
+    locations = ['Bryla', 'Hodowlana', 'Sezamowa']
+    start = date(2020, 1, 1)
+    return PaymentsList([Payment(generator.choice(providers), generator.choice(locations),
+                                 start + timedelta(days=generator.randrange(5 * 365)),
+                                 Amount.from_grosze(generator.randrange(100, 100_000)))
+                         for _ in range(size)])
+
+
+def _by_month(payments: PaymentsList) -> dict[str, Amount]:
+    totals: dict[str, Amount] = {}
+    for payment in payments.payments:
+        month = payment.due_date.value.strftime('%Y-%m')
+        totals[month] = totals.get(month, 0) + payment.amount
+    return totals
+
+
+def bench_payments(size: int, number: int) -> dict[str, tuple[float | None, float]]:
+    """
+    Times PaymentsList operations per Payment object and with the columnar backend
+    :param size: number of payments
+    :param number: number of repetitions
+    :return: mapping of operation to (per-object, columnar) milliseconds, per-object None if not applicable
+    """
+    payments = synthetic_payments(size)
+    threshold = Amount('500,00')
+
+    def timed(function: Callable[[], object]) -> float:
+        return timeit.timeit(function, number=number) / number * 1000
+
+    columns = timed(lambda: PaymentsList(payments.payments).columns)
+    _ = payments.columns
+    return {
+        'build columns': (None, columns),
+        'sort by amount': (timed(lambda: sorted(payments.payments, key=operator.attrgetter('amount'))),
+                           timed(lambda: payments.sort('amount'))),
+        'filter amount>500': (timed(lambda: [p for p in payments.payments if p.amount > threshold]),
+                              timed(lambda: payments.where('amount>500'))),
+        'sum by month': (timed(lambda: _by_month(payments)),
+                         timed(lambda: {month: group.sum() for month, group in payments.group_by('month').items()})),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses command line arguments.
+    :return: Namespace containing parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description='Micro-benchmarks of the payments data path',
+                                     prog='python -m payments.microbench')
+    parser.add_argument('-n', '--number', default=200, type=int,
+                        help='Number of passes over the dates (default: 200)')
+    parser.add_argument('-s', '--size', default=100_000, type=int,
+                        help='Number of synthetic payments (default: 100000)')
+    parser.add_argument('-c', '--case', action='append', choices=['dates', 'payments'],
+                        help='Run the given benchmark only, can be repeated (default: all)')
+    return parser.parse_args()
+
+
+def main() -> int:
+    """
+    Main program function.
+    :return: status code
+    """
+    args = parse_args()
+    logging.disable(logging.CRITICAL)
+    cases = args.case or ['dates', 'payments']
+    if 'dates' in cases:
+        values = mockserver_dates()
+        today = date.today()
+        print(f'dates: {len(values)} dates from {MOCKSERVER_CONTENT}')
+        baseline = time_per_call(_dateutil, values, args.number)
+        results = {
+            'dateutil': baseline,
+            'fast path': time_per_call(lambda value: DueDate.parse(value, today), values, args.number),
+            'DueDate, cold cache': time_per_call(DueDate, values, args.number, _parse_due_date.cache_clear),
+            'DueDate, warm cache': time_per_call(DueDate, values, args.number),
+        }
+        for name, microseconds in results.items():
+            print(f'  {name: <20} {microseconds: >8.2f} us/date  x{baseline / microseconds: .1f}')
+    if 'payments' in cases:
+        print(f'payments: {args.size} synthetic payments (per object / columnar)')
+        for name, (objects, columnar) in bench_payments(args.size, 3).items():
+            if objects is None:
+                print(f'  {name: <20} {"-": >12} {columnar: >9.1f} ms')
+            else:
+                print(f'  {name: <20} {objects: >9.1f} ms {columnar: >9.1f} ms  x{objects / columnar:.1f}')
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,16 +1,28 @@
 """
     Payments module
 """
+from .delta import Change, compare
 from .payment import Amount, AmountT, DueDate, DueDateT, Payment
 from .paymentslist import PaymentsList
-from .paymentsmanager import PaymentsManager
+from .paymentsmanager import PaymentsManager, WorkerPool
+from .results import IncrementalJsonWriter, NdjsonWriter, ProviderResult
+from .runstate import RunState
+from .scheduler import ProviderScheduler
 
 __all__ = [
     'Amount',
     'AmountT',
+    'Change',
     'DueDate',
     'DueDateT',
+    'IncrementalJsonWriter',
+    'NdjsonWriter',
     'Payment',
     'PaymentsList',
     'PaymentsManager',
+    'ProviderResult',
+    'ProviderScheduler',
+    'RunState',
+    'WorkerPool',
+    'compare',
 ]
@@ -0,0 +1,154 @@
+"""
+    Columnar (NumPy) representation of payments, backing vectorized PaymentsList operations
+"""
+from __future__ import annotations
+
+import operator
+from datetime import date
+from typing import Any, Callable, Sequence
+
+import numpy as np
+
+from payments.payments.payment import Amount, DueDate, Payment
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_UNKNOWN_ORDINAL = DueDate.unknown.toordinal()
+_UNKNOWN_MONTH = np.datetime64(DueDate.unknown, 'M')
+# Name of the group of unknown due dates
+_UNKNOWN_MONTH_NAME = str(DueDate(DueDate.unknown))
+# Sorting value of unknown amounts and due dates, which sort last
+_LAST = np.iinfo(np.int64).max
+
+
+class PaymentColumns:
+    """
+    Payments as NumPy arrays: amounts in grosze, due date ordinals and provider and location codes
+    (indexes into sorted arrays of distinct names, so that codes order like the names do)
+    """
+    def __init__(self, payments: Sequence[Payment]) -> None:
+        """
+        :param payments: payments, in the order of the rows
+        """
+        count = len(payments)
+        self.known = np.fromiter((not payment.amount.is_unknown() for payment in payments), bool, count)
+        self.grosze = np.fromiter((payment.amount.grosze or 0 for payment in payments), np.int64, count)
+        self.due = np.fromiter((payment.due_date.ordinal for payment in payments), np.int64, count)
+        self.providers, self.provider_codes = np.unique(np.array([payment.provider for payment in payments],
+                                                                 dtype=str), return_inverse=True)
+        self.locations, self.location_codes = np.unique(np.array([payment.location for payment in payments],
+                                                                 dtype=str), return_inverse=True)
+
+    def __len__(self) -> int:
+        return len(self.grosze)
+
+    def take(self, rows: np.ndarray) -> PaymentColumns:
+        """
+        Columns of selected rows
+        :param rows: row indexes
+        :return: new PaymentColumns object, sharing the names of providers and locations
+        """
+        columns = PaymentColumns.__new__(PaymentColumns)
+        columns.known = self.known[rows]
+        columns.grosze = self.grosze[rows]
+        columns.due = self.due[rows]
+        columns.providers, columns.provider_codes = self.providers, self.provider_codes[rows]
+        columns.locations, columns.location_codes = self.locations, self.location_codes[rows]
+        return columns
+
+    def order(self, key: str, reverse: bool = False) -> np.ndarray:
+        """
+        Stable sort order, equal to sorted() of payments by the key; unknown amounts and due dates sort last
+        :param key: one of Payment.SORT_KEYS
+        :param reverse: descending order
+        :return: row indexes
+        """
+        if key == 'provider':
+            values = self.provider_codes
+        elif key == 'location':
+            values = self.location_codes
+        elif key == 'due_date':
+            values = np.where(self.due == _UNKNOWN_ORDINAL, _LAST, self.due)
+        else:
+            values = np.where(self.known, self.grosze, _LAST)
+        # Negation keeps rows with equal keys in their order, like sorted(reverse=True) does
+        return np.argsort(-values if reverse else values, kind='stable')
+
+    def mask(self, key: str, compare: Callable[[Any, Any], Any], value: Amount | DueDate | str) -> np.ndarray:
+        """
+        Rows matching a condition
+        :param key: one of Payment.SORT_KEYS
+        :param compare: comparison operator, e.g. operator.lt
+        :param value: value compared with: Amount, DueDate or name, as the key requires
+        :return: boolean array
+        """
+        if key in ('provider', 'location'):
+            names, codes = self._names(key)
+            # Compare every distinct name once
+            by_name: np.ndarray = np.asarray(compare(names, str(value)), dtype=bool)[codes]
+            return by_name
+        values, known, target = self._values(key, value)
+        if target is None:
+            # Compared with '<unknown>' amount or due date
+            if compare is operator.eq:
+                return ~known
+            return known.copy() if compare is operator.ne else np.zeros(len(self), bool)
+        matches: np.ndarray = np.asarray(compare(values, target), dtype=bool)
+        # Unknown values are only different from any known one
+        matches = matches | ~known if compare is operator.ne else matches & known
+        return matches
+
+    def isin(self, key: str, values: Sequence[Amount | DueDate | str]) -> np.ndarray:
+        """
+        Rows equal to any of the values
+        :param key: one of Payment.SORT_KEYS
+        :param values: values: Amount, DueDate or name, as the key requires
+        :return: boolean array
+        """
+        if key in ('provider', 'location'):
+            names, codes = self._names(key)
+            by_name: np.ndarray = np.isin(names, [str(value) for value in values])[codes]
+            return by_name
+        matches = np.zeros(len(self), bool)
+        for value in values:
+            matches |= self.mask(key, operator.eq, value)
+        return matches
+
+    def _names(self, key: str) -> tuple[np.ndarray, np.ndarray]:
+        return (self.providers, self.provider_codes) if key == 'provider' else (self.locations, self.location_codes)
+
+    def _values(self, key: str, value: Amount | DueDate | str) -> tuple[np.ndarray, np.ndarray, int | None]:
+        if key == 'due_date':
+            if isinstance(value, Amount):
+                raise TypeError(f'Cannot compare due_date with amount {value}')
+            ordinal = DueDate.create_from(value).ordinal
+            return self.due, self.due != _UNKNOWN_ORDINAL, None if ordinal == _UNKNOWN_ORDINAL else ordinal
+        if isinstance(value, DueDate):
+            raise TypeError(f'Cannot compare amount with due date {value}')
+        return self.grosze, self.known, Amount.create_from(value).grosze
+
+    def groups(self, key: str) -> dict[str, np.ndarray]:
+        """
+        Rows grouped by a key
+        :param key: 'provider', 'location' or 'month' (of the due date)
+        :return: mapping of group name (month as YYYY-MM, '<unknown>' first) to row indexes, ordered by name
+        """
+        if key == 'provider':
+            names, codes = self.providers, self.provider_codes
+        elif key == 'location':
+            names, codes = self.locations, self.location_codes
+        elif key == 'month':
+            months = (self.due - _EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]')
+            months, codes = np.unique(months, return_inverse=True)
+            names = np.array([_UNKNOWN_MONTH_NAME if month == _UNKNOWN_MONTH else str(month) for month in months])
+        else:
+            raise KeyError(f"Cannot group payments by '{key}'")
+        rows = np.argsort(codes, kind='stable')
+        bounds = np.flatnonzero(np.diff(codes[rows])) + 1
+        return {str(names[codes[group[0]]]): group for group in np.split(rows, bounds) if len(group)}
+
+    def total(self) -> int:
+        """
+        Sum of known amounts
+        :return: amount in grosze
+        """
+        return int(self.grosze[self.known].sum())
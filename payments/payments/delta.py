@@ -0,0 +1,85 @@
+"""
+    Changes of payments between two runs
+"""
+from datetime import date
+from typing import Any, NamedTuple
+
+from payments.payments.payment import Amount, Payment
+from payments.payments.paymentslist import PaymentsList
+
+# Change kinds
+NEW = 'new'
+CHANGED = 'changed'
+PAID = 'paid'
+DISAPPEARED = 'disappeared'
+FAILED = 'failed'
+
+# (provider, location, due date); due date is None when nothing is outstanding
+PaymentKey = tuple[str, str, date | None]
+
+
+class Change(NamedTuple):
+    """
+    Single change of a payment
+    """
+    kind: str
+    provider: str
+    location: str
+    due_date: str | None
+    amount: str | None
+    previous_amount: str | None
+
+    def json(self) -> dict[str, Any]:
+        """
+        Converts change to JSON, skipping missing values
+        """
+        return {name: value for name, value in self._asdict().items() if value is not None}
+
+
+def _outstanding(amount: Amount) -> bool:
+    return (amount.grosze or 0) > 0
+
+
+def _key(payment: Payment) -> PaymentKey:
+    # Providers report no due date for settled accounts (it defaults to today), so it is not a part of the key
+    due_date = payment.due_date.value if _outstanding(payment.amount) else None
+    return payment.provider, payment.location, due_date
+
+
+def compare(previous: PaymentsList, current: PaymentsList) -> list[Change]:
+    """
+    Changes of payments since the previous run. Payments are matched by (provider, location, due date),
+    in linear time. Locations which failed in the current run are reported as failed and otherwise skipped,
+    providers missing in the current run are skipped.
+    :param previous: payments of the previous run
+    :param current: payments of the current run
+    :return: changes, in order of the current payments followed by the ones which are gone
+    """
+    failed = {(payment.provider, payment.location) for payment in current.payments if payment.amount.is_unknown()}
+    providers = {payment.provider for payment in current.payments}
+    before = {_key(payment): payment for payment in previous.payments
+              if payment.provider in providers and not payment.amount.is_unknown()
+              and (payment.provider, payment.location) not in failed}
+    settled = {(payment.provider, payment.location): payment for payment in current.payments
+               if not payment.amount.is_unknown() and not _outstanding(payment.amount)}
+    changes: list[Change] = []
+    for payment in current.payments:
+        if payment.amount.is_unknown():
+            changes.append(Change(FAILED, payment.provider, payment.location, None, None, None))
+            continue
+        key = _key(payment)
+        old = before.pop(key, None)
+        if old is None and _outstanding(payment.amount):
+            changes.append(Change(NEW, payment.provider, payment.location, str(payment.due_date),
+                                  str(payment.amount), None))
+        elif old is not None and old.amount != payment.amount:
+            changes.append(Change(CHANGED, payment.provider, payment.location, str(payment.due_date),
+                                  str(payment.amount), str(old.amount)))
+    for (provider, location, due_date), old in before.items():
+        if due_date is None:
+            # Settled before, and either settled or with a new bill now
+            continue
+        paid = settled.get((provider, location))
+        changes.append(Change(DISAPPEARED if paid is None else PAID, provider, location, str(old.due_date),
+                              None if paid is None else str(paid.amount), str(old.amount)))
+    return changes
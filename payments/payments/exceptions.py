@@ -10,3 +10,17 @@ class PaymentError(Exception):
     def __init__(self, message: str) -> None:
         self.reason = message
         super().__init__(message)
+
+
+class BudgetExceededError(PaymentError):
+    """
+    Raised when a provider did not finish within its time budget
+    """
+    ...
+
+
+class FilterError(ValueError):
+    """
+    Raised when a filter expression is not valid
+    """
+    ...
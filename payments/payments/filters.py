@@ -0,0 +1,260 @@
+"""
+    Filter expressions of collected payments, e.g.
+        amount>0 and due_date<=2026-11-01 and provider in (energa,pgnig)
+
+    Grammar (keywords are case-insensitive, 'and' binds stronger than 'or'):
+        expression := term ('or' term)*
+        term       := factor ('and' factor)*
+        factor     := 'not' factor | '(' expression ')' | condition
+        condition  := key operator value
+                    | key ['not'] 'in' '(' value (',' value)* ')'
+                    | key ['not'] 'in' value '..' value              (inclusive range)
+        operator   := '<' | '<=' | '>' | '>=' | '==' | '=' | '!='
+        key        := 'provider' | 'location' | 'due_date' | 'amount'
+    Values are words, quoted strings ('Nowa Wies') or <unknown> (amount and due date of failed payments);
+    a comma between digits is a decimal separator (amount>=12,50), so separate numbers in lists with ', '.
+    Values are converted once, when the filter is parsed, to Amount or DueDate as the key requires.
+"""
+from __future__ import annotations
+
+import operator
+import re
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple
+
+from payments.payments.exceptions import FilterError
+from payments.payments.payment import Amount, DueDate, Payment
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from payments.payments.columns import PaymentColumns
+
+OPERATORS: dict[str, Callable[[Any, Any], Any]] = {
+    '<=': operator.le,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '>': operator.gt,
+    '=': operator.eq,
+}
+_KEYWORDS = ('and', 'or', 'not', 'in')
+_TOKEN = re.compile(r'''\s*(?:
+    (?P<unknown><unknown>)
+    | (?P<operator><=|>=|==|!=|<|>|=)
+    | (?P<range>\.\.)
+    | (?P<punctuation>[(),])
+    | '(?P<single>[^']*)'
+    | "(?P<double>[^"]*)"
+    | (?P<word>(?:[^\s()<>=!,.'"]|\.(?!\.)|(?<=\d),(?=\d))+)
+)''', re.VERBOSE)
+
+
+class _Token(NamedTuple):
+    kind: str
+    text: str
+    position: int
+
+
+def _tokenize(expression: str) -> list[_Token]:
+    tokens: list[_Token] = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if not match or not match.lastgroup:
+            raise FilterError(f'Unexpected "{expression[position:].strip()}" in filter "{expression}"')
+        kind, text = match.lastgroup, match[match.lastgroup]
+        if kind in ('operator', 'punctuation', 'range'):
+            # Symbols are their own kind
+            kind = text
+        elif kind == 'word' and text.lower() in _KEYWORDS:
+            kind = text.lower()
+        else:
+            kind = 'value'
+        tokens.append(_Token(kind, text, match.start(match.lastgroup)))
+        position = match.end()
+    return tokens
+
+
+class Filter(ABC):
+    """
+    Compiled filter expression, evaluated over the columns of a PaymentsList
+    """
+    @abstractmethod
+    def mask(self, columns: PaymentColumns) -> np.ndarray:
+        """
+        Rows matching the filter
+        :param columns: columnar payments
+        :return: boolean array
+        """
+
+    @staticmethod
+    def parse(expression: str) -> Filter:
+        """
+        Compiles a filter expression
+        :param expression: filter expression
+        :return: Filter object
+        :raises FilterError: if the expression is not valid
+        """
+        return _Parser(expression).parse()
+
+
+class _Compare(Filter):
+    def __init__(self, key: str, compare: Callable[[Any, Any], Any], value: Amount | DueDate | str) -> None:
+        self.key, self.compare, self.value = key, compare, value
+
+    def mask(self, columns: PaymentColumns) -> np.ndarray:
+        return columns.mask(self.key, self.compare, self.value)
+
+
+class _In(Filter):
+    def __init__(self, key: str, values: list[Amount | DueDate | str]) -> None:
+        self.key, self.values = key, values
+
+    def mask(self, columns: PaymentColumns) -> np.ndarray:
+        return columns.isin(self.key, self.values)
+
+
+class _Range(Filter):
+    def __init__(self, key: str, low: Amount | DueDate | str, high: Amount | DueDate | str) -> None:
+        self.low, self.high = _Compare(key, operator.ge, low), _Compare(key, operator.le, high)
+
+    def mask(self, columns: PaymentColumns) -> np.ndarray:
+        result: np.ndarray = self.low.mask(columns) & self.high.mask(columns)
+        return result
+
+
+class _And(Filter):
+    def __init__(self, *operands: Filter) -> None:
+        self.operands = operands
+
+    def mask(self, columns: PaymentColumns) -> np.ndarray:
+        result = self.operands[0].mask(columns)
+        for operand in self.operands[1:]:
+            result = result & operand.mask(columns)
+        return result
+
+
+class _Or(Filter):
+    def __init__(self, *operands: Filter) -> None:
+        self.operands = operands
+
+    def mask(self, columns: PaymentColumns) -> np.ndarray:
+        result = self.operands[0].mask(columns)
+        for operand in self.operands[1:]:
+            result = result | operand.mask(columns)
+        return result
+
+
+class _Not(Filter):
+    def __init__(self, operand: Filter) -> None:
+        self.operand = operand
+
+    def mask(self, columns: PaymentColumns) -> np.ndarray:
+        return ~self.operand.mask(columns)
+
+
+class _Parser:
+    """
+    Recursive descent parser of the filter grammar
+    """
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        self.tokens = _tokenize(expression)
+        self.index = 0
+
+    def _error(self, expected: str) -> FilterError:
+        if self.index < len(self.tokens):
+            found = f'"{self.tokens[self.index].text}" at position {self.tokens[self.index].position + 1}'
+        else:
+            found = 'end of filter'
+        return FilterError(f'Expected {expected}, found {found} in filter "{self.expression}"')
+
+    def _peek(self) -> str | None:
+        return self.tokens[self.index].kind if self.index < len(self.tokens) else None
+
+    def _take(self, kind: str, expected: str | None = None) -> _Token:
+        if self._peek() != kind:
+            raise self._error(expected or f'"{kind}"')
+        self.index += 1
+        return self.tokens[self.index - 1]
+
+    def parse(self) -> Filter:
+        result = self._expression()
+        if self._peek() is not None:
+            raise self._error('"and", "or" or end of filter')
+        return result
+
+    def _expression(self) -> Filter:
+        terms = [self._term()]
+        while self._peek() == 'or':
+            self.index += 1
+            terms.append(self._term())
+        return terms[0] if len(terms) == 1 else _Or(*terms)
+
+    def _term(self) -> Filter:
+        factors = [self._factor()]
+        while self._peek() == 'and':
+            self.index += 1
+            factors.append(self._factor())
+        return factors[0] if len(factors) == 1 else _And(*factors)
+
+    def _factor(self) -> Filter:
+        if self._peek() == 'not':
+            self.index += 1
+            return _Not(self._factor())
+        if self._peek() == '(':
+            self.index += 1
+            result = self._expression()
+            self._take(')')
+            return result
+        return self._condition()
+
+    def _condition(self) -> Filter:
+        key = self._take('value', f'one of {", ".join(Payment.SORT_KEYS)}').text
+        if key not in Payment.SORT_KEYS:
+            self.index -= 1
+            raise self._error(f'one of {", ".join(Payment.SORT_KEYS)}')
+        negated = self._peek() == 'not'
+        if negated:
+            self.index += 1
+        if self._peek() == 'in':
+            self.index += 1
+            result = self._in(key)
+            return _Not(result) if negated else result
+        if negated:
+            raise self._error('"in"')
+        kind = self._peek()
+        if kind is None or kind not in OPERATORS:
+            raise self._error(f'operator ({", ".join(OPERATORS)}) or "in"')
+        self.index += 1
+        return _Compare(key, OPERATORS[kind], self._value(key))
+
+    def _in(self, key: str) -> Filter:
+        if self._peek() != '(':
+            low = self._value(key)
+            self._take('..', '".." of a range')
+            return _Range(key, low, self._value(key))
+        self.index += 1
+        values = [self._value(key)]
+        while self._peek() == ',':
+            self.index += 1
+            values.append(self._value(key))
+        self._take(')', '"," or ")"')
+        return _In(key, values)
+
+    def _value(self, key: str) -> Amount | DueDate | str:
+        token = self._take('value', 'value')
+        try:
+            if key == 'amount':
+                # Amount() ignores anything but digits, separators and sign
+                if token.text != Amount.unknown and not any(char.isdigit() for char in token.text):
+                    raise ValueError(token.text)
+                return Amount(token.text)
+            if key == 'due_date':
+                return DueDate(DueDate.unknown if token.text == Amount.unknown else token.text)
+        except ValueError:
+            raise FilterError(f'Invalid {key} "{token.text}" in filter "{self.expression}"') from None
+        return token.text
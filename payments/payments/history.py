@@ -0,0 +1,193 @@
+"""
+    Append-only SQLite store of payments and timings of all runs
+"""
+import datetime
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from browser import setup_logging
+from payments.payments.payment import Amount, DueDate, Payment
+from payments.payments.paymentslist import PaymentsList
+
+log = setup_logging(__name__)
+
+DEFAULT_PATH = Path.home() / '.local' / 'share' / 'payments' / 'history.db'
+# Stage name of the provider total time in the timings table
+TOTAL = ''
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_ts TEXT NOT NULL,
+    run_id TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS payments (
+    run INTEGER NOT NULL REFERENCES runs(id),
+    run_ts TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    location TEXT NOT NULL,
+    amount INTEGER,
+    due_date TEXT,
+    status TEXT NOT NULL,
+    comment TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS timings (
+    run INTEGER NOT NULL REFERENCES runs(id),
+    run_ts TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_ts ON runs (run_ts);
+CREATE INDEX IF NOT EXISTS payments_provider_location_ts ON payments (provider, location, run_ts);
+CREATE INDEX IF NOT EXISTS timings_run_provider ON timings (run, provider, stage);
+CREATE INDEX IF NOT EXISTS timings_provider_stage_ts ON timings (provider, stage, run_ts);
+'''
+
+
+class HistoryPayment(NamedTuple):
+    """
+    Payment recorded in the history
+    """
+    run_ts: str
+    provider: str
+    location: str
+    # Amount in grosze (1/100 PLN), None if unknown
+    amount: int | None
+    # ISO date, None if unknown
+    due_date: str | None
+    status: str
+    comment: str
+
+    @property
+    def amount_text(self) -> str:
+        """
+        Amount formatted like in the text output
+        """
+        return Amount.from_grosze(self.amount).value
+
+
+class ProviderSpeed(NamedTuple):
+    """
+    Timing statistics of a provider (or of its stage) over a number of runs
+    """
+    provider: str
+    stage: str
+    runs: int
+    average: float
+    maximum: float
+
+
+def _iso_date(payment: Payment) -> str | None:
+    if payment.due_date.value == DueDate.unknown:
+        return None
+    return payment.due_date.value.isoformat()
+
+
+class HistoryStore:
+    """
+    Records every run's payments and per-provider and per-stage timings. Rows are only ever appended;
+    queries use indexes on (provider, location, run_ts), so they stay fast after years of daily runs.
+    """
+    def __init__(self, path: Path | str | None = None) -> None:
+        """
+        :param path: database file path (default: PAYMENTS_HISTORY_DB or ~/.local/share/payments/history.db)
+        """
+        self.path = Path(path or os.getenv('PAYMENTS_HISTORY_DB') or DEFAULT_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path)
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self) -> 'HistoryStore':
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the database
+        """
+        self._connection.close()
+
+    def record(self, payments: PaymentsList, run_ts: datetime.datetime | None = None, run_id: str = '') -> int:
+        """
+        Record payments and timings of a run
+        :param payments: collected payments
+        :param run_ts: run start time (default: now)
+        :param run_id: run ID, if any
+        :return: database ID of the run
+        """
+        timestamp = (run_ts or datetime.datetime.now()).isoformat(timespec='seconds')
+        with self._connection:
+            cursor = self._connection.execute('INSERT INTO runs (run_ts, run_id) VALUES (?, ?)', (timestamp, run_id))
+            run = cursor.lastrowid
+            self._connection.executemany(
+                'INSERT INTO payments VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(run, timestamp, payment.provider, payment.location, payment.amount.grosze, _iso_date(payment),
+                  payment.status, payment.comment or '')
+                 for payment in payments.payments])
+            timings: list[tuple[Any, ...]] = []
+            for provider, seconds in (payments.provider_timings or {}).items():
+                timings.append((run, timestamp, provider, TOTAL, seconds))
+                stages = payments.provider_details.get(provider, {}).get('timings', {})
+                timings += [(run, timestamp, provider, stage, float(value)) for stage, value in stages.items()]
+            self._connection.executemany('INSERT INTO timings VALUES (?, ?, ?, ?, ?)', timings)
+        log.debug('Recorded run %s (%s) in %s', run, timestamp, self.path)
+        return run or 0
+
+    def latest(self, provider: str = '') -> list[HistoryPayment]:
+        """
+        The most recent payment of every provider's location
+        :param provider: provider name, empty for all providers
+        :return: payments ordered by provider and location
+        """
+        return [HistoryPayment(*row) for row in self._connection.execute(
+            '''
+            SELECT p.run_ts, p.provider, p.location, p.amount, p.due_date, p.status, p.comment
+            FROM (SELECT provider, location, MAX(run_ts) AS run_ts FROM payments
+                  WHERE ? = '' OR provider = ? GROUP BY provider, location) AS latest
+            JOIN payments AS p
+              ON p.provider = latest.provider AND p.location = latest.location AND p.run_ts = latest.run_ts
+            ORDER BY p.provider, p.location
+            ''', (provider, provider))]
+
+    def trend(self, provider: str, location: str = '', limit: int = 12) -> list[HistoryPayment]:
+        """
+        Amounts of a provider over time, one entry per location and distinct due date
+        (i.e. per bill), taken from the most recent run which saw it. Settled accounts have no due date
+        (it defaults to the day of the run), so they make a single entry per location, from the latest run.
+        :param provider: provider name
+        :param location: location name, empty for all locations
+        :param limit: maximum number of bills per location
+        :return: payments ordered by location and due date
+        """
+        return [HistoryPayment(*row[:-1]) for row in self._connection.execute(
+            '''
+            SELECT run_ts, provider, location, amount, due_date, status, comment, bill FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY location ORDER BY due_date DESC) AS bill FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY location, CASE WHEN amount > 0 THEN due_date END
+                                                 ORDER BY run_ts DESC) AS seen
+                    FROM payments
+                    WHERE provider = ? AND (? = '' OR location = ?) AND due_date IS NOT NULL AND amount IS NOT NULL
+                ) WHERE seen = 1
+            ) WHERE bill <= ?
+            ORDER BY location, due_date
+            ''', (provider, location, location, limit))]
+
+    def slowest(self, runs: int = 10, stage: str = TOTAL, limit: int | None = None) -> list[ProviderSpeed]:
+        """
+        Providers ordered by their average time over the last runs
+        :param runs: number of the most recent runs taken into account
+        :param stage: stage name, TOTAL for the whole provider time
+        :param limit: maximum number of providers, None for all
+        :return: providers, the slowest first
+        """
+        return [ProviderSpeed(*row) for row in self._connection.execute(
+            '''
+            SELECT provider, stage, COUNT(*), AVG(seconds), MAX(seconds) FROM timings
+            WHERE run IN (SELECT id FROM runs ORDER BY run_ts DESC LIMIT ?) AND stage = ?
+            GROUP BY provider ORDER BY AVG(seconds) DESC LIMIT ?
+            ''', (runs, stage, -1 if limit is None else limit))]
@@ -5,7 +5,8 @@ from __future__ import annotations
 
 import re
 from datetime import date, timedelta
-from functools import total_ordering
+from functools import lru_cache, total_ordering
+from typing import Any
 
 from dateutil import parser
 from selenium.webdriver.remote.webelement import WebElement
@@ -18,28 +19,72 @@ AmountT = str | float | WebElement | PageElement
 
 DueDateT = str | date | WebElement | PageElement
 
+_NON_AMOUNT_CHARS = re.compile(r'[^\d,.-]')
+_DECIMAL_SEPARATORS = re.compile(r'[,.]')
+_UNKNOWN_ORDINAL = date.min.toordinal()
+_DAY_FIRST_DATE = re.compile(r'\s*(?P<day>\d{1,2})(?P<sep>[-./])(?P<month>\d{1,2})(?P=sep)(?P<year>\d{4})\s*')
+_ISO_DATE = re.compile(r'\s*(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})\s*')
+
 
 @total_ordering
 class Amount:
     """
-        Represents payment amount either as float or decimal value with comma (',') decimal separator
+        Represents payment amount either as float or decimal value with comma (',') decimal separator.
+        The amount is an immutable fixed-point value: an integer number of grosze (1/100 of the currency unit)
+        and a currency; arithmetic never goes through floats or strings, and text forms are rendered on demand
     """
+    __slots__ = ('_grosze', 'currency')
+
     zero = '0,00'
     unknown = '<unknown>'
+    default_currency = 'PLN'
 
-    def __init__(self, value: AmountT) -> None:
+    def __init__(self, value: AmountT, currency: str = default_currency) -> None:
         """
         Constructor
         :param value: payment value
+        :param currency: currency code
         """
-        self.value = str(value.text) if isinstance(value, (PageElement, WebElement)) else str(value)
-        self.whole, self.decimal = self._split()
+        text = str(value.text) if isinstance(value, (PageElement, WebElement)) else str(value)
+        self._grosze: int | None = None if text == self.unknown else self._parse(text)
+        self.currency = currency
+
+    @classmethod
+    def from_grosze(cls, grosze: int | None, currency: str = default_currency) -> Amount:
+        """
+        Creates Amount object without parsing any text
+        :param grosze: amount in grosze, None if unknown
+        :param currency: currency code
+        :return: Amount object
+        """
+        amount = cls.__new__(cls)
+        amount._grosze = grosze
+        amount.currency = currency
+        return amount
+
+    def __add__(self, other: object) -> Amount:
+        if not isinstance(other, Amount):
+            return NotImplemented
+        return Amount.from_grosze(self._known('add') + self._same_currency(other)._known('add'), self.currency)
+
+    def __radd__(self, other: object) -> Amount:
+        # Allows sum() of amounts, which starts with 0
+        if isinstance(other, int) and other == 0:
+            return self
+        return NotImplemented
+
+    def __sub__(self, other: object) -> Amount:
+        if not isinstance(other, Amount):
+            return NotImplemented
+        return Amount.from_grosze(self._known('subtract') - self._same_currency(other)._known('subtract'),
+                                  self.currency)
 
-    def __iadd__(self, other: Amount) -> Amount:
-        value = float(self) + float(other)
-        self.value = str(value)
-        self.whole, self.decimal = self._split()
-        return self
+    def __neg__(self) -> Amount:
+        return Amount.from_grosze(-self._known('negate'), self.currency)
+
+    def __hash__(self) -> int:
+        # Consistent with equality to floats
+        return hash(None if self._grosze is None else self._grosze / 100)
 
     def __eq__(self, other: object) -> bool:
         """
@@ -51,9 +96,7 @@ class Amount:
             if isinstance(other, str):
                 return str(self) == str(Amount.create_from(other))
             return NotImplemented
-        if self.is_unknown():
-            return True if other.is_unknown() else False
-        return self.whole == other.whole and self.decimal == other.decimal
+        return self._grosze == other._grosze and self.currency == other.currency
 
     def __lt__(self, other: object) -> bool:
         """
@@ -62,7 +105,7 @@ class Amount:
         if isinstance(other, float):
             return float(self) < other
         if isinstance(other, Amount):
-            return float(self) < float(other)
+            return self._known('compare') < self._same_currency(other)._known('compare')
         if isinstance(other, str):
             return str(self) < str(Amount.create_from(other))
         return NotImplemented
@@ -71,9 +114,7 @@ class Amount:
         """
             Convert amount to float for numeric operations.
         """
-        if self.is_unknown():
-            raise ValueError('Cannot convert unknown amount to float.')
-        return float(f'{self.whole}.{self.decimal}')
+        return self._known('convert') / 100
 
     def __format__(self, format_spec: str) -> str:
         """
@@ -85,27 +126,68 @@ class Amount:
         """
             Return string representation of the Amount.
         """
-        return self.value if self.is_unknown() else f'{self.whole},{self.decimal:02}'
+        return self.unknown if self._grosze is None else f'{self.whole},{self.decimal}'
 
-    def _split(self) -> tuple[str, str]:
-        if self.is_unknown():
-            return '', ''
+    @classmethod
+    def _parse(cls, text: str) -> int:
         separator = '|'
-        amount = self.value
-        if amount:
-            amount = re.sub(r'[^\d,.-]', '', self.value)
-        else:
-            amount = self.zero
-        amount = re.sub(r'[,.]', separator, amount)
+        amount = _NON_AMOUNT_CHARS.sub('', text) if text else cls.zero
+        amount = _DECIMAL_SEPARATORS.sub(separator, amount)
         whole, dec = amount.split(separator) if separator in amount else (amount, '0')
-        return whole, dec
+        negative = whole.startswith('-')
+        whole = whole.removeprefix('-')
+        if not all(part.isdecimal() or not part for part in (whole, dec)):
+            raise ValueError(f'Invalid amount: {text!r}')
+        # Exact: whole units and the first two decimal digits, rounded half up on the third one
+        grosze = int(whole or '0') * 100 + int(dec[:2].ljust(2, '0')) + (len(dec) > 2 and dec[2] >= '5')
+        return -grosze if negative else grosze
+
+    def _known(self, operation: str) -> int:
+        if self._grosze is None:
+            raise ValueError(f'Cannot {operation} unknown amount.')
+        return self._grosze
+
+    def _same_currency(self, other: Amount) -> Amount:
+        if other.currency != self.currency:
+            raise ValueError(f'Cannot mix {self.currency} and {other.currency} amounts.')
+        return other
+
+    @property
+    def grosze(self) -> int | None:
+        """
+        Amount in grosze (1/100 of the currency unit), None if unknown
+        """
+        return self._grosze
+
+    @property
+    def value(self) -> str:
+        """
+        Amount as text, e.g. '1234,56', or '<unknown>'
+        """
+        return repr(self)
+
+    @property
+    def whole(self) -> str:
+        """
+        Whole part of the amount (with its sign), empty if unknown
+        """
+        if self._grosze is None:
+            return ''
+        return f'{"-" if self._grosze < 0 else ""}{abs(self._grosze) // 100}'
+
+    @property
+    def decimal(self) -> str:
+        """
+        Two-digit decimal part of the amount, empty if unknown
+        """
+        return '' if self._grosze is None else f'{abs(self._grosze) % 100:02}'
 
     def is_unknown(self) -> bool:
         """
         Checks if the amount is unknown.
         :return: True if unknown, False otherwise
         """
-        return self.value == self.unknown
+        return self._grosze is None
 
     @classmethod
     def is_zero(cls, value: str) -> bool:
@@ -133,8 +215,11 @@ class Amount:
 @total_ordering
 class DueDate:
     """
-    Date object handling special values ('today', 'tomorrow', 'yesterday' in English and Polist)
+    Date object handling special values ('today', 'tomorrow', 'yesterday' in English and Polist).
+    The date is stored as its proleptic Gregorian ordinal
     """
+    __slots__ = ('_ordinal',)
+
     _today = ['dzisiaj', 'today']
     _tomorrow = ['jutro', 'tomorrow']
     _yesterday = ['wczoraj', 'yesterday']
@@ -146,49 +231,80 @@ class DueDate:
         Constructor
         :param value: either date object or its string representation
         """
-        if isinstance(value, WebElement):
+        if isinstance(value, (PageElement, WebElement)):
             value = value.text
         if isinstance(value, str):
-            if value == '' or any(item in value for item in self._today):
-                value = date.today()
-            elif any(item in value for item in self._tomorrow):
-                value = date.today() + timedelta(days=1)
-            elif any(item in value for item in self._yesterday):
-                value = date.today() + timedelta(days=-1)
-            else:
-                # day is first only if a 4-digit year is last
-                value = parser.parse(value, dayfirst=re.match(r'.*\d\d\d\d$', value) is not None).date()
-        self.value = value
+            self._ordinal = _parse_due_date(value, date.today())
+        else:
+            self._ordinal = value.toordinal()
+
+    @classmethod
+    def parse(cls, value: str, today: date) -> date:
+        """
+        Parses date string, handling special values. Formats used by the portals (dd.mm.yyyy, dd-mm-yyyy
+        and ISO) are parsed directly, any other format with dateutil
+        :param value: date string
+        :param today: current date
+        :return: parsed date
+        """
+        if value == '' or any(item in value for item in cls._today):
+            return today
+        if any(item in value for item in cls._tomorrow):
+            return today + timedelta(days=1)
+        if any(item in value for item in cls._yesterday):
+            return today + timedelta(days=-1)
+        if match := _DAY_FIRST_DATE.fullmatch(value) or _ISO_DATE.fullmatch(value):
+            try:
+                return date(int(match['year']), int(match['month']), int(match['day']))
+            except ValueError:
+                # e.g. month first; let dateutil sort it out
+                pass
+        # day is first only if a 4-digit year is last
+        return parser.parse(value, dayfirst=re.match(r'.*\d\d\d\d$', value) is not None).date()
 
     def __eq__(self, other: object) -> bool:
         """
             Compare dates for equality.
         """
         if isinstance(other, date):
-            return self.value == other
+            return self._ordinal == other.toordinal()
         if isinstance(other, DueDateT):
             return self == DueDate.create_from(other)
         if not isinstance(other, DueDate):
             return NotImplemented
-        return self.value == other.value
+        return self._ordinal == other._ordinal
 
     def __lt__(self, other: object) -> bool:
         """
             Compare dates for sorting (less than).
         """
         if isinstance(other, date):
-            return self.value < other
+            return self._ordinal < other.toordinal()
         if isinstance(other, DueDateT):
             return self < DueDate.create_from(other)
         if not isinstance(other, DueDate):
             return NotImplemented
-        return True if other.value == DueDate.unknown else self.value < other.value
+        return True if other._ordinal == _UNKNOWN_ORDINAL else self._ordinal < other._ordinal
 
     def __repr__(self) -> str:
         """
             Return string representation of the DueDate.
         """
-        return self._unknown_str if self.value == DueDate.unknown else self.value.strftime('%d-%m-%Y')
+        return self._unknown_str if self._ordinal == _UNKNOWN_ORDINAL else self.value.strftime('%d-%m-%Y')
+
+    @property
+    def value(self) -> date:
+        """
+        Due date, DueDate.unknown if unknown
+        """
+        return date.fromordinal(self._ordinal)
+
+    @property
+    def ordinal(self) -> int:
+        """
+        Proleptic Gregorian ordinal of the due date
+        """
+        return self._ordinal
 
     @classmethod
     def today(cls) -> str:
@@ -214,12 +330,20 @@ class DueDate:
         return DueDate(value)
 
 
+@lru_cache(maxsize=4096)
+def _parse_due_date(value: str, today: date) -> int:
+    # Keyed by the current date too, as special values (and dateutil defaults) depend on it
+    return DueDate.parse(value, today).toordinal()
+
+
 class Payment:
     """
     Payment class. Stores either valid payment properly acquired from a provider's page
     (with amount and due_date containing actual values),
     or an invalid one otherwise (amount and due_date set to '<unknown>')
     """
+    __slots__ = ('amount', 'due_date', 'location', 'provider', 'comment', 'cached')
+
     SORT_KEYS = ('provider', 'location', 'due_date', 'amount')
 
     def __init__(self,
@@ -243,18 +367,53 @@ class Payment:
         self.location = location
         self.provider = provider
         self.comment = comment
-        log.debug('Created payment object:'
-                  'provider=%s, location=%s, '
-                  'due_date=%s, amount=%s, comment=%s'
-                  'self.due_date=%s, self.amount=%s',
-                  provider, location,
-                  due_date, amount, comment,
-                  self.due_date, self.amount
-                  )
+        self.cached = False
+        # Arguments are only formatted if debug logging is on
+        log.debug('Created payment object: provider=%s, location=%s, due_date=%s, amount=%s, comment=%s',
+                  provider, location, self.due_date, self.amount, comment)
 
     def __repr__(self) -> str:
         return f'{self.location} {self.due_date} {self.amount}'
 
+    @property
+    def status(self) -> str:
+        """
+        Payment status as reported in JSON output: 'failure', 'cached' or 'success'
+        """
+        if self.amount.is_unknown():
+            return 'failure'
+        return 'cached' if self.cached else 'success'
+
+    def to_json(self) -> dict[str, Any]:
+        """
+        Converts payment to JSON
+        :return: payment as JSON-serializable dict (without provider name)
+        """
+        return {
+            'location': self.location,
+            'amount': self.amount.value,
+            'due_date': self.due_date.value.strftime('%d-%m-%Y'),
+            'comment': self.comment,
+            'status': self.status,
+            'reason': ''
+        }
+
+    @staticmethod
+    def from_json(provider: str, item: dict[str, Any]) -> 'Payment':
+        """
+        Creates payment from its JSON representation
+        :param provider: provider name
+        :param item: dict created by to_json()
+        :return: Payment object
+        """
+        payment = Payment(provider=provider,
+                          location=item.get('location', ''),
+                          due_date=item.get('due_date', ''),
+                          amount=item.get('amount', ''),
+                          comment=item.get('comment', ''))
+        payment.cached = item.get('status') == 'cached'
+        return payment
+
     def to_padded_string(self, padding: list[int] | None = None) -> str:
         """
         Export to string
@@ -267,4 +426,5 @@ class Payment:
                 f'{self.amount: <{padding[1]}} '
                 f'{self.location: <{padding[2]}} '
                 f'{self.due_date}'
-                f'{" #" + self.comment if self.comment else ""}')
+                f'{" #" + self.comment if self.comment else ""}'
+                f'{" #cached" if self.cached else ""}')
@@ -1,26 +1,80 @@
 """ Collected payments list """
-import operator
-import re
 from functools import cache
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from payments.payments.payment import Payment
+from payments.payments.filters import Filter
+from payments.payments.payment import Amount, Payment
+
+if TYPE_CHECKING:
+    from payments.payments.columns import PaymentColumns
 
 
 class PaymentsList:
     """
-        List of collected payments
+        List of collected payments. Sorting, filtering and grouping by provider, location, due date or amount
+        run vectorized on a columnar (NumPy) copy of the payments, built on first use
     """
 
-    def __init__(self, payments: list[Payment], provider_timings: dict[str, float] | None = None) -> None:
+    def __init__(self,
+                 payments: list[Payment],
+                 provider_timings: dict[str, float] | None = None,
+                 provider_details: dict[str, dict[str, Any]] | None = None) -> None:
+        """
+        :param payments: collected payments
+        :param provider_timings: time spent on each provider
+        :param provider_details: additional per-provider data included in JSON output
+        """
         self.payments: list[Payment] = payments
         self.provider_timings = provider_timings
+        self.provider_details = provider_details or {}
+        self._columns: 'PaymentColumns | None' = None
+
+    @staticmethod
+    def from_json(data: dict[str, Any]) -> 'PaymentsList':
+        """
+        Creates payments list from its JSON representation
+        :param data: dict created by json()
+        :return: PaymentsList object
+        """
+        payments: list[Payment] = []
+        provider_timings: dict[str, float] = {}
+        provider_details: dict[str, dict[str, Any]] = {}
+        for provider, provider_data in data.items():
+            payments += [Payment.from_json(provider, item) for item in provider_data.get('payments', [])]
+            provider_timings[provider] = float(provider_data.get('time') or 0)
+            provider_details[provider] = {key: value for key, value in provider_data.items()
+                                          if key not in ('payments', 'time')}
+        return PaymentsList(payments, provider_timings, provider_details)
 
     def copy(self) -> 'PaymentsList':
         """
         Creates a copy of the object
         """
-        return PaymentsList(self.payments.copy())
+        return self._derive(self.payments.copy())
+
+    def _derive(self, payments: list[Payment], rows: Any = None) -> 'PaymentsList':
+        """
+        Creates a list with other payments, but the same per-provider data
+        :param payments: payments of the new list
+        :param rows: indexes of the payments in this list's columns, if known
+        """
+        derived = PaymentsList(payments, self.provider_timings, self.provider_details)
+        if rows is not None and self._columns is not None:
+            derived._columns = self._columns.take(rows)
+        return derived
+
+    def _select(self, rows: Any) -> 'PaymentsList':
+        return self._derive([self.payments[row] for row in rows], rows)
+
+    @property
+    def columns(self) -> 'PaymentColumns':
+        """
+        Columnar representation of the payments (NumPy is imported on first use)
+        """
+        if self._columns is None:
+            from payments.payments.columns import PaymentColumns
+            self._columns = PaymentColumns(self.payments)
+        return self._columns
 
     def sort(self, sort_key: str, reverse: bool = False) -> 'PaymentsList':
         """
@@ -29,29 +83,39 @@ class PaymentsList:
         :param reverse: reverse sort order
         :return PaymentsManager self object for pipelining
         """
-        return PaymentsList(sorted(self.payments,
+        if sort_key in Payment.SORT_KEYS:
+            return self._select(self.columns.order(sort_key, reverse))
+        return self._derive(sorted(self.payments,
                                    key=lambda p: getattr(p, sort_key),
                                    reverse=reverse))
 
-    def where(self, filter_string: str) -> 'PaymentsList':
+    def where(self, expression: 'str | Filter') -> 'PaymentsList':
         """
         Filters collected payments by provided criteria
-        :param filter_string:
+        :param expression: filter expression (see payments.payments.filters) or a compiled filter,
+                           e.g. "amount>0 and provider in (pgnig,opec)"
         :return PaymentsManager self object for pipelining
+        :raises FilterError: if the expression is not valid
+        """
+        if isinstance(expression, str):
+            expression = Filter.parse(expression)
+        return self._select(expression.mask(self.columns).nonzero()[0])
+
+    def group_by(self, key: str) -> dict[str, 'PaymentsList']:
+        """
+        Groups collected payments
+        :param key: 'provider', 'location' or 'month' (of the due date, as YYYY-MM)
+        :return: mapping of group name to its payments, ordered by name
+        :raises KeyError: if payments cannot be grouped by the key
+        """
+        return {name: self._select(rows) for name, rows in self.columns.groups(key).items()}
+
+    def sum(self) -> Amount:
+        """
+        Total of collected payments, skipping the ones with unknown amount
+        :return: total amount
         """
-        ops = {
-            "<": operator.lt,
-            "<=": operator.le,
-            ">": operator.gt,
-            ">=": operator.ge,
-            "==": operator.eq,
-            "!=": operator.ne
-        }
-        m = re.match(rf'(\S+)\s*({"|".join(ops.keys())})\s*(\S+)', filter_string)
-        if m:
-            return PaymentsList(list(filter(lambda p: ops[m[2]](getattr(p, m[1]), m[3]),
-                                            self.payments)))
-        return self.copy()
+        return Amount.from_grosze(self.columns.total())
 
     @cache
     def json(self) -> dict[str, Any]:
@@ -64,16 +128,10 @@ class PaymentsList:
             if payment.provider not in result:
                 result[payment.provider] = {
                     'payments': [],
-                    'time': f'{self.provider_timings[payment.provider]:.2f}' if self.provider_timings else ''
+                    'time': f'{self.provider_timings[payment.provider]:.2f}' if self.provider_timings else '',
+                    **self.provider_details.get(payment.provider, {})
                 }
-            result[payment.provider]['payments'].append({
-                'location': payment.location,
-                'amount': payment.amount.value,
-                'due_date': payment.due_date.value.strftime('%d-%m-%Y'),
-                'comment': payment.comment,
-                'status': 'failure' if payment.amount.is_unknown() else 'success',
-                'reason': ''
-            })
+            result[payment.provider]['payments'].append(payment.to_json())
         return result
 
     def __str__(self) -> str:
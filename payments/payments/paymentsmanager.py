@@ -1,19 +1,35 @@
 """Payments manager"""
+import contextvars
 import logging
 import os
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from pathlib import Path
-from typing import Sequence, Callable
+from queue import Empty, SimpleQueue
+from typing import Any, Sequence, Callable, TypeVar, cast
 
 from browser import Browser, BrowserManager, BrowserOptions, setup_logging
 from payments.lookuplist import LookupList
+from payments.payments.exceptions import BudgetExceededError
 from payments.payments.payment import Payment
 from payments.payments.paymentslist import PaymentsList
-from payments.providers.provider import Provider
+from payments.payments.resultcache import ResultCache
+from payments.payments.results import ProviderResult
+from payments.payments.runstate import RunState
+from payments.payments.scheduler import ProviderScheduler
+from payments.providers.provider import Provider, TRANSPORT_HTTP
+from payments.providers.session_cache import SessionCache
 from payments.console import print_progress
+from payments.timing import Timeline, span, write_chrome_trace
 
 log = setup_logging(__name__)
 
+# Time (in seconds) a provider cancelled after its time budget is given to finish before it may be collected again
+CANCEL_GRACE_PERIOD = 10.0
+
+T = TypeVar('T')
+
 
 def _print_banner(message: str) -> None:
     print_progress(message)
@@ -23,12 +39,147 @@ def _print_banner(message: str) -> None:
         log.debug(message)
 
 
+def _start_thread(name: str, function: Callable[[], T]) -> tuple[threading.Thread, Future[T]]:
+    """
+    Run a function in a helper thread
+    :param name: thread name
+    :param function: function to be run
+    :return: the thread and the future of the function result
+    """
+    future: Future[T] = Future()
+    # Run in a copy of the current context, so that stages are recorded in the provider's timeline
+    context = contextvars.copy_context()
+
+    def run() -> None:
+        try:
+            future.set_result(context.run(function))
+        except BaseException as e:
+            future.set_exception(e)
+
+    # A daemon thread, so that a hung provider never blocks the interpreter exit
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread, future
+
+
+class _CollectorWorker:
+    """
+    Owner of a single, isolated browser session used by one collection worker
+    """
+    def __init__(self, options: BrowserOptions, browser_class: type[Browser]) -> None:
+        self.options = options
+        self.browser_class = browser_class
+        self._manager: BrowserManager | None = None
+
+    @property
+    def manager(self) -> BrowserManager:
+        """
+        Browser manager of this worker, created on first use
+        """
+        if self._manager is None:
+            self._manager = BrowserManager(self.options, self.browser_class)
+        return self._manager
+
+    def close(self) -> None:
+        """
+        Close the browser manager, if it was ever created
+        """
+        if self._manager is not None:
+            self._manager.close()
+            self._manager = None
+
+    def discard(self) -> None:
+        """
+        Close the browser manager whose browser was already torn down, ignoring any errors
+        """
+        try:
+            self.close()
+        except Exception as e:
+            log.debug('Error while closing browser manager: %s', e)
+        finally:
+            self._manager = None
+
+
+class WorkerPool:
+    """
+    Collection workers kept alive between collections, so that their browsers are started only once
+    """
+    def __init__(self,
+                 options: Callable[[int], BrowserOptions],
+                 browser_class: type[Browser] = Browser,
+                 size: int = 1) -> None:
+        """
+        :param options: browser options factory taking the worker number
+        :param browser_class: Browser class
+        :param size: number of workers, i.e. maximum number of providers processed concurrently
+        """
+        self.workers = [_CollectorWorker(options(worker_id), browser_class) for worker_id in range(max(1, size))]
+
+    def __len__(self) -> int:
+        return len(self.workers)
+
+    def __enter__(self) -> 'WorkerPool':
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def warm_up(self) -> None:
+        """
+        Start browsers of all the workers ahead of the first collection
+        """
+        for worker in self.workers:
+            with worker.manager.session():
+                pass
+
+    def close(self) -> None:
+        """
+        Close browsers of all the workers
+        """
+        for worker in self.workers:
+            worker.discard()
+
+
 class PaymentsManager:
     """
     Collect all payments, either from real web pages
     or from text data file (for debugging purpuses)
     """
-    def __init__(self, providers: Sequence[Provider] | LookupList[Provider] | Provider) -> None:
+    def __init__(self,
+                 providers: Sequence[Provider] | LookupList[Provider] | Provider,
+                 scheduler: ProviderScheduler | None = None,
+                 budgets: dict[str, float] | None = None,
+                 deadline: float | None = None,
+                 session_cache: SessionCache | None = None,
+                 result_cache: ResultCache | None = None,
+                 run_state: RunState | None = None,
+                 retries: int = 0,
+                 retry_backoff: float = 0) -> None:
+        """
+        :param providers: providers to collect payments from
+        :param scheduler: optional scheduler deciding the order in which providers are started
+        :param budgets: per-provider time budgets in seconds overriding Provider.time_budget,
+        '*' key sets the budget for all the other providers
+        :param deadline: time in seconds after which no more providers are processed
+        :param session_cache: optional store of authenticated sessions allowing providers to skip login
+        :param result_cache: optional cache of previously collected payments allowing providers to be skipped
+        :param run_state: optional run checkpoints; providers which succeeded in the resumed run are skipped
+        :param retries: number of times failed providers are collected again at the end of the run
+        :param retry_backoff: delay in seconds before the first retry, doubled before every next one
+        """
+        self.scheduler = scheduler
+        self.budgets = budgets or {}
+        self.deadline = deadline
+        self.result_cache = result_cache
+        self.run_state = run_state
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self._deadline_at: float | None = None
+        self.planned_makespan: float | None = None
+        self.actual_makespan: float | None = None
+        self.timelines: list[Timeline] = []
+        # Threads of providers which exceeded their time budgets and may still be running
+        self._cancelled: dict[str, threading.Thread] = {}
         self.providers: LookupList[Provider]
         if isinstance(providers, Provider):
             # If a single item is provided, change it into the one-element list
@@ -39,10 +190,31 @@ class PaymentsManager:
             self.providers = providers
         else:
             raise TypeError(f'Invalid type "{type(providers)}" for argument "providers"')
+        if session_cache is not None:
+            session_cache.evict_expired()
+            for provider in self.providers:
+                provider.session_cache = session_cache
 
     def __repr__(self) -> str:
         return '\n'.join(map(str, self.providers))
 
+    def makespan_summary(self) -> str:
+        """
+        Planned versus actual makespan of the last real collection
+        :return: summary line or empty string if no real collection was run
+        """
+        if self.actual_makespan is None:
+            return ''
+        planned = 'n/a' if self.planned_makespan is None else f'{self.planned_makespan:.2f}s'
+        return f'Collection makespan: planned {planned}, actual {self.actual_makespan:.2f}s'
+
+    def write_chrome_trace(self, path: Path | str) -> None:
+        """
+        Write stage timings of the last real collection in Chrome trace format
+        :param path: output file path
+        """
+        write_chrome_trace(path, self.timelines)
+
     def collect_fake(self, filename: Path | None, delay: int = 0) -> PaymentsList:
         """
         Collect payments for all providers
@@ -67,33 +239,309 @@ class PaymentsManager:
                 time.sleep(delay)
         return PaymentsList(payments)
 
-    def collect_real(self, options: BrowserOptions, browser_class: type[Browser] = Browser) -> PaymentsList:
+    def collect_real(self,
+                     options: BrowserOptions | Callable[[int], BrowserOptions],
+                     browser_class: type[Browser] = Browser,
+                     jobs: int = 1,
+                     pool: WorkerPool | None = None,
+                     on_result: Callable[[ProviderResult], None] | None = None) -> PaymentsList:
         """
         Collect payments for all providers and return them as string
-        :param options: Browser options
+        :param options: Browser options or browser options factory taking the worker number
         :param browser_class: Browser class
+        :param jobs: number of providers processed concurrently, each one in its own browser session
+        :param pool: workers to be used (and left running) instead of creating new ones;
+        options and browser_class are ignored then, and jobs is limited to the pool size
+        :param on_result: callback called with the result of every provider as soon as it is processed,
+        in order of completion (providers restored from the resumed run first); calls are serialized,
+        even if providers are processed concurrently
         """
-        payments: list[Payment] = []
-        provider_timings: dict[str, float] = {}
-        manager = BrowserManager(options, browser_class)
+        def worker_options(worker_id: int) -> BrowserOptions:
+            """
+            Browser options for the given worker
+            """
+            return options(worker_id) if callable(options) else options
+
+        completed: dict[str, ProviderResult] = {}
+        timelines: list[Timeline] = []
+        result_lock = threading.Lock()
+
+        def emit(result: ProviderResult) -> None:
+            """
+            Store provider result, checkpoint it and pass it to the callback
+            """
+            with result_lock:
+                completed[result.provider] = result
+                if self.run_state is not None:
+                    self.run_state(result)
+                if on_result is not None:
+                    on_result(result)
+
+        def process(worker: _CollectorWorker, worker_id: int, provider: Provider) -> ProviderResult:
+            """
+            Collect payments of a single provider, recording its stages in a new timeline
+            """
+            start = time.perf_counter()
+            details: dict[str, Any] = {}
+            timeline = Timeline(provider.name, worker_id)
+            with timeline.activate():
+                payments = self._collect_provider(worker, provider, details)
+            details['timings'] = {stage: f'{duration:.2f}' for stage, duration in timeline.durations().items()}
+            with result_lock:
+                timelines.append(timeline)
+            return ProviderResult(provider.name, payments, time.perf_counter() - start, details)
+
+        remaining: list[Provider] = []
+        for provider in self.providers:
+            if self.run_state is None or (resumed := self.run_state.completed(provider.name)) is None:
+                remaining.append(provider)
+                continue
+            _print_banner(f'Processing service {provider.name}...')
+            print('Using payments of the resumed run.')
+            emit(resumed._replace(details=dict(resumed.details, resumed=True)))
+
+        if pool is not None:
+            jobs = min(jobs, len(pool))
+        jobs = max(1, min(jobs, len(remaining)))
+        queue: SimpleQueue[Provider] = SimpleQueue()
+        if self.scheduler:
+            self.planned_makespan = self.scheduler.plan(remaining, jobs)
+            schedule = self.scheduler.order(remaining)
+            log.debug('Provider schedule: %s', ', '.join(provider.name for provider in schedule))
+        else:
+            schedule = remaining
+        for provider in schedule:
+            queue.put(provider)
+
+        def run_worker(worker_id: int) -> None:
+            """
+            Process providers from the queue until it is empty
+            """
+            worker = pool.workers[worker_id] if pool else _CollectorWorker(worker_options(worker_id), browser_class)
+            try:
+                while True:
+                    try:
+                        provider = queue.get_nowait()
+                    except Empty:
+                        return
+                    emit(process(worker, worker_id, provider))
+            finally:
+                if pool is None:
+                    worker.close()
+
+        def retry_failed() -> None:
+            """
+            Collect failed providers again, each attempt in a fresh browser session
+            """
+            for attempt in range(2, self.retries + 2):
+                failed = [provider for provider in remaining
+                          if provider.name in completed and not completed[provider.name].succeeded]
+                if not failed:
+                    return
+                delay = self.retry_backoff * 2 ** (attempt - 2)
+                if self._deadline_at is not None and time.perf_counter() + delay >= self._deadline_at:
+                    log.debug('No time left for retrying %s', ', '.join(provider.name for provider in failed))
+                    return
+                _print_banner(f'Retrying {len(failed)} failed provider(s) (attempt {attempt}) in {delay:g}s...')
+                time.sleep(delay)
+                worker = pool.workers[0] if pool else _CollectorWorker(worker_options(0), browser_class)
+                # Never reuse the browser that the failed attempt may have left in a broken state
+                worker.discard()
+                try:
+                    for provider in failed:
+                        if not self._wait_cancelled(provider):
+                            continue
+                        previous = completed[provider.name]
+                        provider.logged_in = False
+                        result = process(worker, 0, provider)
+                        attempts = previous.details.get('attempts', [f'{previous.time:.2f}'])
+                        result.details['attempts'] = attempts + [f'{result.time:.2f}']
+                        emit(result._replace(time=previous.time + result.time))
+                finally:
+                    if pool is None:
+                        worker.close()
+
+        run_start = time.perf_counter()
+        self._deadline_at = None if self.deadline is None else run_start + self.deadline
+        if jobs == 1:
+            run_worker(0)
+        else:
+            with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='collector') as executor:
+                for future in [executor.submit(run_worker, worker_id) for worker_id in range(jobs)]:
+                    future.result()
+        if self.retries > 0:
+            retry_failed()
+        self.actual_makespan = time.perf_counter() - run_start
+        self.timelines = timelines
+        if self.result_cache:
+            self.result_cache.save()
+        results = [completed[provider.name] for provider in self.providers if provider.name in completed]
+        return PaymentsList([payment for result in results for payment in result.payments],
+                            {result.provider: result.time for result in results},
+                            {result.provider: result.details for result in results})
+
+    def budget(self, provider: Provider) -> float | None:
+        """
+        Time budget of a provider
+        :param provider: provider
+        :return: budget in seconds or None if unlimited
+        """
+        return self.budgets.get(provider.name, self.budgets.get('*', provider.time_budget))
+
+    def _collect_provider(self, worker: _CollectorWorker, provider: Provider, details: dict[str, Any]) -> list[Payment]:
+        """
+        Collect payments of a single provider, using the result cache if possible
+        :param worker: collection worker
+        :param provider: provider to process
+        :param details: dict to be filled with per-provider data for JSON output
+        :return: provider's payments
+        """
+        _print_banner(f'Processing service {provider.name}...')
+        if self.result_cache and (cached := self.result_cache.get(provider)) is not None:
+            print('Using cached payments.')
+            details['cached'] = True
+            return cached
+        payments = self._collect_provider_payments(worker, provider, details)
+        if self.result_cache:
+            payments = self.result_cache.merge(provider, payments)
+            self.result_cache.put(provider, payments)
+        return payments
+
+    def _wait_cancelled(self, provider: Provider) -> bool:
+        """
+        Wait for the thread of a provider cancelled after its time budget, if any, to finish,
+        so that it no longer changes the provider's state
+        :param provider: provider
+        :return: True if the provider may be collected again, False if its cancelled thread is still running
+        """
+        thread = self._cancelled.pop(provider.name, None)
+        if thread is None:
+            return True
+        timeout = CANCEL_GRACE_PERIOD
+        if self._deadline_at is not None:
+            timeout = max(0.0, min(timeout, self._deadline_at - time.perf_counter()))
+        thread.join(timeout)
+        if thread.is_alive():
+            log.warning('Cancelled collection of %s is still running', provider.name)
+            self._cancelled[provider.name] = thread
+            return False
+        return True
+
+    def _collect_provider_payments(self, worker: _CollectorWorker, provider: Provider,
+                                   details: dict[str, Any]) -> list[Payment]:
+        """
+        Collect payments of a single provider using worker's browser session,
+        tearing the session down if provider's time budget or the run deadline is exceeded
+        :param worker: collection worker
+        :param provider: provider to process
+        :param details: dict to be filled with per-provider data for JSON output
+        :return: provider's payments
+        """
+        budget = self.budget(provider)
+        if budget is not None:
+            details['budget'] = f'{budget:.2f}'
+        if self._deadline_at is not None:
+            remaining = self._deadline_at - time.perf_counter()
+            if remaining <= 0:
+                print('Run deadline exceeded, skipping.')
+                details['timed_out'] = True
+                return provider.failed_payments('Run deadline exceeded')
+            budget = remaining if budget is None else min(budget, remaining)
+        if not self._wait_cancelled(provider):
+            return provider.failed_payments('Cancelled collection still running')
+        provider.cancelled.clear()
+        if provider.transport == TRANSPORT_HTTP:
+            start = time.perf_counter()
+            try:
+                with span('http'):
+                    payments = self._fetch_without_browser_within(provider, budget)
+            except BudgetExceededError as e:
+                print(e.reason)
+                details['timed_out'] = True
+                return provider.failed_payments(e.reason)
+            if payments is not None:
+                details['transport'] = TRANSPORT_HTTP
+                return payments
+            if budget is not None:
+                # The browser gets what is left
+                budget = max(0.0, budget - (time.perf_counter() - start))
+
+        timeout: BudgetExceededError | None = None
         try:
-            for provider in self.providers:
-                start = time.perf_counter()
-                _print_banner(f'Processing service {provider.name}...')
-                with manager.session(provider.needs_clear_user_profile) as browser:
-                    payments += provider.get_payments(browser)
-                provider_timings[provider.name] = time.perf_counter() - start
-            return PaymentsList(payments, provider_timings)
-        finally:
-            manager.close()
+            with worker.manager.session(provider.needs_clear_user_profile) as browser:
+                try:
+                    if budget is None:
+                        return provider.get_payments(browser)
+                    return self._get_payments_within(provider, browser, budget)
+                except BudgetExceededError as e:
+                    timeout = e
+                finally:
+                    if resources := provider.resource_stats:
+                        details['resources'] = resources
+        except Exception:
+            if timeout is None:
+                raise
+            log.debug('Error while closing timed out session of %s', provider.name, exc_info=True)
+        if timeout is None:
+            raise RuntimeError(f'Browser session of {provider.name} ended without payments')
+        # The session is gone, so the next provider of this worker must start a fresh browser
+        worker.discard()
+        print(timeout.reason)
+        details['timed_out'] = True
+        return provider.failed_payments(timeout.reason)
+
+    @staticmethod
+    def _fetch_without_browser_within(provider: Provider, budget: float | None) -> list[Payment] | None:
+        """
+        Run Provider.fetch_without_browser() in a helper thread, if the provider has a time budget
+        :param provider: provider
+        :param budget: time budget in seconds or None if unlimited
+        :return: provider's payments or None if they must be collected with the browser
+        """
+        if budget is None:
+            return provider.fetch_without_browser()
+        # Nothing to cancel: the thread only waits for the portal, bounded by the HTTP timeout
+        _, future = _start_thread(provider.name, provider.fetch_without_browser)
+        try:
+            return future.result(timeout=budget)
+        except FutureTimeoutError:
+            log.error('Provider %s exceeded its time budget of %.0f seconds', provider.name, budget)
+            raise BudgetExceededError(f'Timed out after {round(budget, 1):g}s')
+
+    def _get_payments_within(self, provider: Provider, browser: Browser, budget: float) -> list[Payment]:
+        """
+        Run Provider.get_payments() in a helper thread; if it does not finish in time, cancel it
+        and tear the browser down, so that its pending WebDriver calls fail
+        :param provider: provider
+        :param browser: browser session
+        :param budget: time budget in seconds
+        :return: provider's payments
+        """
+        thread, future = _start_thread(provider.name, lambda: provider.get_payments(browser))
+        try:
+            return future.result(timeout=budget)
+        except FutureTimeoutError:
+            log.error('Provider %s exceeded its time budget of %.0f seconds', provider.name, budget)
+            provider.cancel()
+            self._cancelled[provider.name] = thread
+            try:
+                browser.quit()
+            except Exception as e:
+                log.debug('Error while quitting browser: %s', e)
+            raise BudgetExceededError(f'Timed out after {round(budget, 1):g}s')
 
     def collect(self,
-                options_factory: Callable[[], BrowserOptions],
-                browser_class: type[Browser] = Browser) -> PaymentsList:
+                options_factory: Callable[[], BrowserOptions] | Callable[[int], BrowserOptions],
+                browser_class: type[Browser] = Browser,
+                jobs: int = 1,
+                on_result: Callable[[ProviderResult], None] | None = None) -> PaymentsList:
         """
         Collect payments either for all providers or from fake data file
-        :param options_factory: Browser options factory
+        :param options_factory: Browser options factory, optionally taking the worker number
         :param browser_class: Browser class
+        :param jobs: number of providers processed concurrently
+        :param on_result: callback called with the result of every provider as soon as it is processed
+        (real collection only)
         :return PaymentsManager self object for pipelining
         """
 
@@ -113,4 +561,9 @@ class PaymentsManager:
 
         if (fake_data := is_fake_run()) is not None:
             return self.collect_fake(fake_data, int(os.getenv('PAYMENTS_FAKE_DELAY', '0')))
-        return self.collect_real(options_factory(), browser_class)
+        if jobs > 1:
+            # Every worker asks the factory for its own options, e.g. for a separate browser profile
+            return self.collect_real(cast(Callable[[int], BrowserOptions], options_factory), browser_class, jobs,
+                                     on_result=on_result)
+        return self.collect_real(cast(Callable[[], BrowserOptions], options_factory)(), browser_class,
+                                 on_result=on_result)
@@ -0,0 +1,170 @@
+"""
+    Cache of the last successfully collected payments of each provider location
+"""
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+from browser import setup_logging
+from payments.payments.payment import DueDate, Payment
+from payments.providers.provider import Provider
+
+log = setup_logging(__name__)
+
+DEFAULT_PATH = Path.home() / '.cache' / 'payments' / 'results.json'
+
+
+def parse_age(value: str) -> float:
+    """
+    Parses age given either in seconds or with a unit suffix (s, m, h, d), e.g. "12h"
+    :param value: age string
+    :return: age in seconds
+    """
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    value = value.strip().lower()
+    if value and value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+
+class ResultCache:
+    """
+    Stores the last successful payments of every provider location. Cached payments of a location are used only if:
+    - they are not older than the maximum age (and provider's own result_ttl, if set),
+    - none of them failed,
+    - no outstanding payment is due within DUE_DATE_MARGIN days (or overdue).
+    Providers read all their locations in a single session, so a provider is collected again if any of its locations
+    is stale; cached payments of the locations which are still valid then stand in for the ones which failed.
+    """
+    # Days before the due date when cached outstanding payments are refreshed anyway
+    DUE_DATE_MARGIN = 3
+
+    def __init__(self, max_age: float, path: Path | str | None = None) -> None:
+        """
+        :param max_age: maximum age (in seconds) of cached payments
+        :param path: cache file path (default: PAYMENTS_RESULT_CACHE or ~/.cache/payments/results.json)
+        """
+        self.max_age = max_age
+        self.path = Path(path or os.getenv('PAYMENTS_RESULT_CACHE') or DEFAULT_PATH)
+        self._lock = threading.Lock()
+        # provider -> location -> entry
+        self._entries: dict[str, dict[str, dict[str, Any]]] = {}
+        try:
+            with open(self.path, encoding='utf-8') as stream:
+                # Skip per-provider entries of the previous format, they are collected again
+                self._entries = {provider: locations for provider, locations in json.load(stream).items()
+                                 if 'stored' not in locations}
+        except FileNotFoundError:
+            pass
+        except (ValueError, AttributeError) as e:
+            log.warning('Ignoring corrupted result cache %s: %s', self.path, e)
+
+    def _get_location(self, provider: Provider, location: str) -> list[Payment] | None:
+        """
+        Returns cached payments of a provider location if they are still valid
+        :param provider: provider
+        :param location: location name
+        :return: cached payments (marked as cached) or None if they must be collected again
+        """
+        with self._lock:
+            entry = self._entries.get(provider.name, {}).get(location)
+        if entry is None:
+            return None
+        max_age = self.max_age if provider.result_ttl is None else min(self.max_age, provider.result_ttl)
+        age = time.time() - entry['stored']
+        if age > max_age:
+            log.debug('Cached payments of %s/%s are %.0f seconds old, refreshing', provider.name, location, age)
+            return None
+        payments = []
+        for item in entry['payments']:
+            payment = Payment.from_json(provider.name, item)
+            if payment.amount.is_unknown():
+                return None
+            if (payment.amount.grosze or 0) <= 0:
+                # Nothing to pay means "due today" - on the day the cache is used, not when it was filled
+                payment.due_date = DueDate(DueDate.today())
+            elif payment.due_date.value - date.today() <= timedelta(days=self.DUE_DATE_MARGIN):
+                log.debug('Cached payment of %s/%s is due on %s, refreshing', provider.name, location,
+                          payment.due_date)
+                return None
+            payment.cached = True
+            payments.append(payment)
+        return payments or None
+
+    def get(self, provider: Provider) -> list[Payment] | None:
+        """
+        Returns cached payments of a provider if those of all its locations are still valid
+        :param provider: provider
+        :return: cached payments (marked as cached) or None if the provider must be collected again
+        """
+        payments: list[Payment] = []
+        for location in provider.locations:
+            cached = self._get_location(provider, location)
+            if cached is None:
+                return None
+            payments += cached
+        return payments or None
+
+    def merge(self, provider: Provider, payments: list[Payment]) -> list[Payment]:
+        """
+        Replaces payments of the locations which failed with their cached payments, if still valid
+        :param provider: provider
+        :param payments: collected payments
+        :return: collected payments of the successful locations and cached payments of the failed ones,
+        in order of the collected payments
+        """
+        failed = {payment.location for payment in payments if payment.amount.is_unknown()}
+        cached = {location: self._get_location(provider, location) for location in failed}
+        merged: list[Payment] = []
+        for payment in payments:
+            if (replacement := cached.get(payment.location)) is None:
+                merged.append(payment)
+            elif replacement:
+                log.debug('Using cached payments of %s/%s', provider.name, payment.location)
+                merged += replacement
+                # Once per location
+                cached[payment.location] = []
+        return merged
+
+    def put(self, provider: Provider, payments: list[Payment]) -> None:
+        """
+        Stores provider's payments by location; a failed location removes its cached payments
+        :param provider: provider
+        :param payments: collected payments
+        """
+        by_location: dict[str, list[Payment]] = {}
+        for payment in payments:
+            by_location.setdefault(payment.location, []).append(payment)
+        now = time.time()
+        with self._lock:
+            entries = self._entries.setdefault(provider.name, {})
+            for location, location_payments in by_location.items():
+                if any(payment.cached for payment in location_payments):
+                    continue
+                if any(payment.amount.is_unknown() for payment in location_payments):
+                    entries.pop(location, None)
+                else:
+                    entries[location] = {
+                        'stored': now,
+                        'payments': [payment.to_json() for payment in location_payments]
+                    }
+            if not entries:
+                del self._entries[provider.name]
+
+    def save(self) -> None:
+        """
+        Writes the cache file; failures are logged, so that they never stop the run
+        """
+        temp_path = self.path.with_suffix('.tmp')
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._lock, open(temp_path, 'w', encoding='utf-8') as stream:
+                json.dump(self._entries, stream, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            log.warning('Cannot save result cache %s: %s', self.path, e)
+
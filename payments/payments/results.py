@@ -0,0 +1,113 @@
+"""
+    Per-provider collection results and writers storing them as soon as each provider is done
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import IO, Any, NamedTuple
+
+from payments.payments.payment import Payment
+
+
+class ProviderResult(NamedTuple):
+    """
+    Payments of a single provider, emitted as soon as the provider is processed
+    """
+    provider: str
+    payments: list[Payment]
+    time: float
+    details: dict[str, Any]
+
+    @property
+    def succeeded(self) -> bool:
+        """
+        True if payments of all provider's locations were retrieved
+        """
+        return bool(self.payments) and not any(payment.amount.is_unknown() for payment in self.payments)
+
+    @staticmethod
+    def from_json(provider: str, data: dict[str, Any]) -> 'ProviderResult':
+        """
+        Creates result from its JSON representation
+        :param provider: provider name
+        :param data: dict created by json()
+        :return: ProviderResult object
+        """
+        details = {key: value for key, value in data.items() if key not in ('payments', 'time')}
+        return ProviderResult(provider,
+                              [Payment.from_json(provider, item) for item in data.get('payments', [])],
+                              float(data.get('time') or 0),
+                              details)
+
+    def json(self) -> dict[str, Any]:
+        """
+        Converts result to JSON
+        :return: provider entry in the format of PaymentsList.json()
+        """
+        return {
+            'payments': [payment.to_json() for payment in self.payments],
+            'time': f'{self.time:.2f}',
+            **self.details
+        }
+
+
+class NdjsonWriter:
+    """
+    Writes every provider result as a separate JSON line, flushed immediately
+    """
+    def __init__(self, path: Path | str) -> None:
+        """
+        :param path: output file path, truncated on open
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._stream: IO[str] | None = None
+
+    def __enter__(self) -> 'NdjsonWriter':
+        self._stream = open(self.path, 'w', encoding='utf-8')
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def __call__(self, result: ProviderResult) -> None:
+        """
+        Append provider result
+        :param result: provider result
+        """
+        if self._stream is None:
+            raise RuntimeError(f'{self.path} is not open')
+        line = json.dumps({'provider': result.provider, **result.json()}, ensure_ascii=False)
+        with self._lock:
+            self._stream.write(line + '\n')
+            self._stream.flush()
+
+
+class IncrementalJsonWriter:
+    """
+    Keeps a JSON file in the format of PaymentsList.json() up to date with the providers processed so far.
+    The file is replaced atomically, so it is always complete and valid, even if the run is interrupted.
+    """
+    def __init__(self, path: Path | str) -> None:
+        """
+        :param path: output file path
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._data: dict[str, Any] = {}
+
+    def __call__(self, result: ProviderResult) -> None:
+        """
+        Add provider result and rewrite the file
+        :param result: provider result
+        """
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        with self._lock:
+            if result.payments:
+                self._data[result.provider] = result.json()
+            with open(temp_path, 'w', encoding='utf-8') as stream:
+                json.dump(self._data, stream, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.path)
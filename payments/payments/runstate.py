@@ -0,0 +1,129 @@
+"""
+    On-disk checkpoints of a run, allowing an interrupted or partially failed run to be resumed
+"""
+import datetime
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from browser import setup_logging
+from payments.payments.results import ProviderResult
+
+log = setup_logging(__name__)
+
+DEFAULT_DIRECTORY = Path.home() / '.cache' / 'payments' / 'runs'
+RUN_FILE_SUFFIX = '.json'
+# Payment statuses of a completed provider; any other one (e.g. 'failure', or 'failed' set by the workflow
+# for providers whose output changed) means the provider has to be collected again
+COMPLETED_STATUSES = ('success', 'cached')
+
+
+def new_run_id() -> str:
+    """
+    Generates run ID based on the current time
+    """
+    return datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+
+
+class RunState:
+    """
+    Results of every provider processed in a run, saved right after the provider is done.
+    The run state file has the format of -j/--json output, so JSON output of a previous run
+    can be resumed as well.
+    """
+    # Age (in seconds) after which run state files are removed
+    MAX_AGE = 7 * 24 * 3600
+
+    def __init__(self, run_id: str, directory: Path | str | None = None,
+                 resumed: dict[str, Any] | None = None) -> None:
+        """
+        :param run_id: ID of the run, used as the run state file name
+        :param directory: run state directory (default: PAYMENTS_RUN_STATE_DIR or ~/.cache/payments/runs)
+        :param resumed: run state of the resumed run, in -j/--json output format
+        """
+        self.run_id = run_id
+        self.directory = Path(directory or os.getenv('PAYMENTS_RUN_STATE_DIR') or DEFAULT_DIRECTORY)
+        self.path = self.directory / f'{run_id}{RUN_FILE_SUFFIX}'
+        self.resumed = resumed or {}
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = {}
+
+    @classmethod
+    def resume(cls, run: str, directory: Path | str | None = None, run_id: str | None = None) -> 'RunState':
+        """
+        Create run state continuing a previous run
+        :param run: ID of the run to be resumed or path to its run state or JSON output file
+        :param directory: run state directory (default: PAYMENTS_RUN_STATE_DIR or ~/.cache/payments/runs)
+        :param run_id: ID of this run; by default the ID of the resumed run is kept,
+        or a new one is generated if a file was given
+        :return: RunState object
+        :raises FileNotFoundError: if the run cannot be found
+        """
+        path = Path(run)
+        if not path.is_file():
+            state = cls(run, directory)
+            path = state.path
+            run_id = run_id or run
+        with open(path, encoding='utf-8') as stream:
+            resumed = json.load(stream)
+        return cls(run_id or new_run_id(), directory, resumed)
+
+    def completed(self, provider: str) -> ProviderResult | None:
+        """
+        Result of a provider which succeeded in the resumed run
+        :param provider: provider name
+        :return: provider result or None if the provider has to be collected again
+        """
+        if (data := self.resumed.get(provider)) is None:
+            return None
+        try:
+            result = ProviderResult.from_json(provider, data)
+            statuses = {item.get('status', 'success') for item in data.get('payments', [])}
+        except (TypeError, ValueError, AttributeError) as e:
+            log.warning('Ignoring unreadable run state of %s: %s', provider, e)
+            return None
+        if not statuses.issubset(COMPLETED_STATUSES):
+            log.debug('Payments of %s in the resumed run have status %s', provider, ', '.join(sorted(statuses)))
+            return None
+        return result if result.succeeded else None
+
+    def __call__(self, result: ProviderResult) -> None:
+        """
+        Checkpoint provider result
+        :param result: provider result
+        """
+        with self._lock:
+            if result.payments:
+                self._entries[result.provider] = result.json()
+            self.save()
+
+    def save(self) -> None:
+        """
+        Writes the run state file; failures are logged, so that they never stop the run
+        """
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as stream:
+                json.dump(self._entries, stream, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            log.warning('Cannot save run state %s: %s', self.path, e)
+
+    def evict_expired(self) -> int:
+        """
+        Remove run state files older than MAX_AGE
+        :return: number of removed files
+        """
+        evicted = 0
+        for path in self.directory.glob(f'*{RUN_FILE_SUFFIX}'):
+            try:
+                if time.time() - path.stat().st_mtime > self.MAX_AGE:
+                    path.unlink()
+                    evicted += 1
+            except OSError as e:
+                log.debug('Cannot remove run state %s: %s', path, e)
+        return evicted
@@ -0,0 +1,134 @@
+"""
+    Provider scheduling based on timings of previous runs
+"""
+import heapq
+import json
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+from browser import setup_logging
+from payments.providers.provider import Provider
+
+log = setup_logging(__name__)
+
+
+class ProviderScheduler:
+    """
+    Orders providers longest-first (LPT) using durations recorded in previous runs.
+    Providers with no recorded duration keep their relative order and are estimated with the average
+    of the known ones; with no history at all the original order is kept.
+    """
+    # Weight of the newest measurement when merging it into the history
+    SMOOTHING = 0.5
+
+    def __init__(self, history: dict[str, float] | None = None) -> None:
+        """
+        :param history: mapping of provider name to its expected duration in seconds
+        """
+        self.history: dict[str, float] = dict(history or {})
+
+    @classmethod
+    def from_files(cls, *paths: Path | str) -> 'ProviderScheduler':
+        """
+        Create scheduler from timing files. Both the history file written by save() and
+        the JSON output of a previous run (-j/--json) are accepted; missing files are skipped.
+        :param paths: timing files, later ones taking precedence
+        :return: ProviderScheduler object
+        """
+        history: dict[str, float] = {}
+        for path in paths:
+            try:
+                with open(path, encoding='utf-8') as stream:
+                    data = json.load(stream)
+            except FileNotFoundError:
+                log.debug('Timings file %s not found, skipping', path)
+                continue
+            history.update(cls._parse_timings(data))
+        return cls(history)
+
+    @staticmethod
+    def _parse_timings(data: dict[str, Any]) -> dict[str, float]:
+        """
+        Extract provider durations from parsed timings file
+        :param data: either {provider: seconds} or {provider: {'time': 'seconds', ...}} dict
+        :return: mapping of provider name to duration
+        """
+        result: dict[str, float] = {}
+        for provider, value in data.items():
+            if isinstance(value, dict):
+                value = value.get('time', '')
+            try:
+                result[provider] = float(value)
+            except (TypeError, ValueError):
+                continue
+        return result
+
+    def estimate(self, provider: str) -> float | None:
+        """
+        Expected duration of a provider
+        :param provider: provider name
+        :return: duration in seconds or None if unknown
+        """
+        return self.history.get(provider)
+
+    def order(self, providers: Iterable[Provider]) -> list[Provider]:
+        """
+        Order providers longest-first
+        :param providers: providers in their default order
+        :return: providers in the order they should be started
+        """
+        providers = list(providers)
+        durations = self._durations(providers)
+        if durations is None:
+            return providers
+        # sorted() is stable, so providers with equal estimates keep their default order
+        return [provider for _, provider in sorted(zip(durations, providers), key=lambda item: -item[0])]
+
+    def plan(self, providers: Iterable[Provider], jobs: int = 1) -> float | None:
+        """
+        Planned makespan of running the providers in order() on a given number of workers
+        :param providers: providers in their default order
+        :param jobs: number of workers
+        :return: planned makespan in seconds or None if there is no history
+        """
+        ordered = self.order(providers)
+        durations = self._durations(ordered)
+        return None if durations is None else self.makespan(durations, jobs)
+
+    @staticmethod
+    def makespan(durations: Sequence[float], jobs: int = 1) -> float:
+        """
+        Simulate list scheduling: each task is started by the first worker that becomes free
+        :param durations: task durations in start order
+        :param jobs: number of workers
+        :return: time when the last task finishes
+        """
+        workers = [0.0] * max(1, jobs)
+        for duration in durations:
+            heapq.heappush(workers, heapq.heappop(workers) + duration)
+        return max(workers)
+
+    def update(self, timings: dict[str, float]) -> None:
+        """
+        Merge timings of the current run into the history
+        :param timings: mapping of provider name to duration measured in the current run
+        """
+        for provider, duration in timings.items():
+            previous = self.history.get(provider)
+            self.history[provider] = (duration if previous is None
+                                      else self.SMOOTHING * duration + (1 - self.SMOOTHING) * previous)
+
+    def save(self, path: Path | str) -> None:
+        """
+        Write the history to a file
+        :param path: history file path
+        """
+        with open(path, 'w', encoding='utf-8') as stream:
+            json.dump({provider: round(duration, 2) for provider, duration in self.history.items()}, stream, indent=2)
+
+    def _durations(self, providers: Sequence[Provider]) -> list[float] | None:
+        known = [duration for provider in providers if (duration := self.estimate(provider.name)) is not None]
+        if not known:
+            return None
+        default = sum(known) / len(known)
+        return [self.history.get(provider.name, default) for provider in providers]
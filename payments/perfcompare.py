@@ -0,0 +1,244 @@
+"""
+    Performance regression gate: compares provider and stage timings of two sets of runs.
+
+    Accepts both benchmark results (python -m payments.bench) and JSON output of regular runs
+    (-j/--json); several files per side are merged into one sample. Exits with status 1
+    if any provider or stage got significantly slower.
+"""
+import argparse
+import json
+import math
+import statistics
+from pathlib import Path
+from typing import Any, NamedTuple
+
+# Verdicts
+REGRESSION = 'REGRESSION'
+IMPROVEMENT = 'improved'
+UNCHANGED = 'ok'
+MISSING = 'missing'
+
+
+class Thresholds(NamedTuple):
+    """
+    Conditions that all have to be met to report a regression
+    """
+    # Minimum relative slowdown of the median (0.1 = 10%)
+    relative: float = 0.1
+    # Minimum absolute slowdown of the median in seconds
+    absolute: float = 0.5
+    # Significance level of the one-sided Mann-Whitney U test
+    alpha: float = 0.05
+    # Minimum number of samples on each side to run the test; with fewer samples, or too few to ever reach alpha,
+    # only the thresholds apply
+    min_samples: int = 3
+
+
+class Comparison(NamedTuple):
+    """
+    Comparison result of a single provider or stage
+    """
+    key: str
+    baseline: float | None
+    current: float | None
+    p_value: float | None
+    verdict: str
+
+    @property
+    def change(self) -> float | None:
+        """
+        Relative change of the median, None if unknown
+        """
+        if not self.baseline or self.current is None:
+            return None
+        return (self.current - self.baseline) / self.baseline
+
+
+def _parse_samples(data: dict[str, Any]) -> dict[str, list[float]]:
+    """
+    Extract timing samples from parsed benchmark results or run JSON output
+    :param data: parsed file
+    :return: mapping of "provider" or "provider/stage" to samples in seconds
+    """
+    samples: dict[str, list[float]] = {}
+
+    def add(key: str, values: list[Any]) -> None:
+        for value in values:
+            try:
+                sample = float(value)
+            except (TypeError, ValueError):
+                continue
+            samples.setdefault(key, []).append(sample)
+
+    if isinstance(data.get('providers'), dict) and 'meta' in data:
+        for provider, results in data['providers'].items():
+            add(provider, results.get('wall', {}).get('samples', []))
+            for stage, values in results.get('stages', {}).items():
+                add(f'{provider}/{stage}', values.get('samples', []))
+        return samples
+    for provider, results in data.items():
+        if not isinstance(results, dict):
+            continue
+        add(provider, [results.get('time')])
+        for stage, value in results.get('timings', {}).items():
+            add(f'{provider}/{stage}', [value])
+    return samples
+
+
+def load_samples(*paths: Path | str) -> dict[str, list[float]]:
+    """
+    Load and merge timing samples from files
+    :param paths: benchmark results or run JSON output files
+    :return: mapping of "provider" or "provider/stage" to samples in seconds
+    """
+    samples: dict[str, list[float]] = {}
+    for path in paths:
+        with open(path, encoding='utf-8') as stream:
+            for key, values in _parse_samples(json.load(stream)).items():
+                samples.setdefault(key, []).extend(values)
+    return samples
+
+
+def slower_p_value(baseline: list[float], current: list[float]) -> float:
+    """
+    p-value of the one-sided Mann-Whitney U test for the current sample being slower
+    :param baseline: baseline samples
+    :param current: current samples
+    :return: p-value
+    """
+    # scipy is heavy to import and only needed when there are enough samples
+    from scipy.stats import mannwhitneyu
+    return float(mannwhitneyu(current, baseline, alternative='greater').pvalue)
+
+
+def min_p_value(baseline_size: int, current_size: int) -> float:
+    """
+    Smallest p-value the exact one-sided Mann-Whitney U test can return for the given sample sizes
+    :param baseline_size: number of baseline samples
+    :param current_size: number of current samples
+    :return: p-value of the most extreme ordering
+    """
+    return 1 / math.comb(baseline_size + current_size, baseline_size)
+
+
+def compare_samples(key: str, baseline: list[float], current: list[float],
+                    thresholds: Thresholds = Thresholds()) -> Comparison:
+    """
+    Compare samples of a single provider or stage
+    :param key: provider or stage name
+    :param baseline: baseline samples
+    :param current: current samples
+    :param thresholds: regression thresholds
+    :return: comparison result
+    """
+    if not baseline or not current:
+        return Comparison(key,
+                          statistics.median(baseline) if baseline else None,
+                          statistics.median(current) if current else None,
+                          None, MISSING)
+    baseline_median = statistics.median(baseline)
+    current_median = statistics.median(current)
+    delta = current_median - baseline_median
+    p_value = None
+    if (min(len(baseline), len(current)) >= thresholds.min_samples
+            and min_p_value(len(baseline), len(current)) < thresholds.alpha):
+        p_value = slower_p_value(baseline, current)
+    slower = (delta > thresholds.absolute and delta > baseline_median * thresholds.relative
+              and (p_value is None or p_value < thresholds.alpha))
+    if slower:
+        verdict = REGRESSION
+    elif -delta > thresholds.absolute and -delta > baseline_median * thresholds.relative:
+        verdict = IMPROVEMENT
+    else:
+        verdict = UNCHANGED
+    return Comparison(key, baseline_median, current_median, p_value, verdict)
+
+
+def compare(baseline: dict[str, list[float]], current: dict[str, list[float]],
+            thresholds: Thresholds = Thresholds()) -> list[Comparison]:
+    """
+    Compare all providers and stages
+    :param baseline: baseline samples returned by load_samples()
+    :param current: current samples returned by load_samples()
+    :param thresholds: regression thresholds
+    :return: comparison results, in baseline order followed by new keys
+    """
+    keys = list(baseline) + [key for key in current if key not in baseline]
+    return [compare_samples(key, baseline.get(key, []), current.get(key, []), thresholds) for key in keys]
+
+
+def format_report(results: list[Comparison]) -> str:
+    """
+    Format comparison results as a table
+    :param results: comparison results
+    :return: report text
+    """
+    def seconds(value: float | None) -> str:
+        return '-' if value is None else f'{value:.2f}'
+
+    width = max([len('provider/stage')] + [len(result.key) for result in results])
+    lines = [f'{"provider/stage": <{width}} {"baseline": >9} {"current": >9} {"change": >8} {"p": >6}  verdict']
+    for result in results:
+        change = '-' if result.change is None else f'{result.change:+.0%}'
+        p_value = '-' if result.p_value is None else f'{result.p_value:.3f}'
+        lines.append(f'{result.key: <{width}} {seconds(result.baseline): >9} {seconds(result.current): >9} '
+                     f'{change: >8} {p_value: >6}  {result.verdict}')
+    return '\n'.join(lines)
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses command line arguments.
+    :return: Namespace containing parsed arguments.
+    """
+    defaults = Thresholds()
+    parser = argparse.ArgumentParser(
+        description='Compare timings of two sets of runs and fail on significant slowdowns',
+        prog='python -m payments.perfcompare'
+    )
+    parser.add_argument('-b', '--baseline', required=True, nargs='+',
+                        help='Baseline benchmark results or run JSON output files')
+    parser.add_argument('-c', '--current', required=True, nargs='+',
+                        help='Current benchmark results or run JSON output files')
+    parser.add_argument('--threshold', default=defaults.relative, type=float,
+                        help=f'Minimum relative slowdown of the median (default: {defaults.relative})')
+    parser.add_argument('--min-delta', default=defaults.absolute, type=float,
+                        help=f'Minimum absolute slowdown of the median in seconds (default: {defaults.absolute})')
+    parser.add_argument('--alpha', default=defaults.alpha, type=float,
+                        help=f'Significance level of the Mann-Whitney U test (default: {defaults.alpha})')
+    parser.add_argument('--min-samples', default=defaults.min_samples, type=int,
+                        help='Minimum number of samples per side to run the significance test '
+                             f'(default: {defaults.min_samples})')
+    parser.add_argument('--providers-only', default=False, action='store_true',
+                        help='Compare provider totals only, skipping stages')
+    parser.add_argument('-o', '--output',
+                        help='Write comparison results to a JSON file')
+    return parser.parse_args()
+
+
+def main() -> int:
+    """
+    Main program function.
+    :return: status code: 0 if no regression was found, 1 otherwise
+    """
+    args = parse_args()
+    thresholds = Thresholds(args.threshold, args.min_delta, args.alpha, args.min_samples)
+    baseline = load_samples(*args.baseline)
+    current = load_samples(*args.current)
+    if args.providers_only:
+        baseline = {key: values for key, values in baseline.items() if '/' not in key}
+        current = {key: values for key, values in current.items() if '/' not in key}
+    results = compare(baseline, current, thresholds)
+    print(format_report(results))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as stream:
+            json.dump([dict(result._asdict(), change=result.change) for result in results], stream, indent=2)
+    regressions = [result.key for result in results if result.verdict == REGRESSION]
+    if regressions:
+        print(f'Performance regression in: {", ".join(regressions)}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
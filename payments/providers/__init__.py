@@ -1,15 +1,23 @@
 """
     All supported providers
+
+    Provider modules are imported on first access of their class (e.g. providers.Pgnig),
+    so that running a single provider does not pay for importing all the others.
 """
-from .actum import Actum
-from .energa import Energa
-from .multimedia import Multimedia
-from .nordhome import Nordhome
-from .opec import Opec
-from .pewik import Pewik
-from .pgnig import Pgnig
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
 from .provider import Provider
-from .vectra import Vectra
+
+if TYPE_CHECKING:
+    from .actum import Actum
+    from .energa import Energa
+    from .multimedia import Multimedia
+    from .nordhome import Nordhome
+    from .opec import Opec
+    from .pewik import Pewik
+    from .pgnig import Pgnig
+    from .vectra import Vectra
 
 __all__ = [
     'Provider',
@@ -23,9 +31,46 @@ __all__ = [
     'Vectra'
 ]
 
+# Provider class name -> module it is defined in
+_REGISTRY = {
+    'Actum': '.actum',
+    'Energa': '.energa',
+    'Multimedia': '.multimedia',
+    'Nordhome': '.nordhome',
+    'Opec': '.opec',
+    'Pgnig': '.pgnig',
+    'Pewik': '.pewik',
+    'Vectra': '.vectra',
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _REGISTRY:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(_REGISTRY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
+
 
 def all_lower() -> list[str]:
     """
     Returns the list of all supported providers
     """
     return [name.lower() for name in __all__ if name != 'Provider']
+
+
+def provider_class(name: str) -> type[Provider]:
+    """
+    Provider class by its name, importing its module if needed
+    :param name: provider name, case-insensitive
+    :return: provider class
+    """
+    for class_name in _REGISTRY:
+        if class_name.lower() == name.lower():
+            provider: type[Provider] = __getattr__(class_name)
+            return provider
+    raise KeyError(f"No provider named '{name}' found.")
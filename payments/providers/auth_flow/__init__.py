@@ -1,14 +1,26 @@
 """
     Authentication flow strategies
 """
+from typing import TYPE_CHECKING, Any
+
 from .base import BaseLogin
 from .one_stage import OneStageLogin
-from .recaptcha import RecaptchaLogin
 from .two_stage import TwoStageLogin
 
+if TYPE_CHECKING:
+    from .recaptcha import RecaptchaLogin
+
 __all__ = [
     'BaseLogin',
     'OneStageLogin',
     'TwoStageLogin',
     'RecaptchaLogin'
 ]
+
+
+def __getattr__(name: str) -> Any:
+    # RecaptchaLogin is used by a single provider only, import it on first use
+    if name == 'RecaptchaLogin':
+        from .recaptcha import RecaptchaLogin
+        return RecaptchaLogin
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
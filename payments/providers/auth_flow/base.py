@@ -8,6 +8,7 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.remote.webelement import WebElement
 
 from browser import Browser, Locator, PageElement, setup_logging
+from payments.providers.auth_flow.waits import wait_for_focus, wait_for_input_ready, wait_for_value
 from payments.providers.secrets.core import Secrets, CredentialsError
 
 log = setup_logging(__name__)
@@ -15,6 +16,10 @@ log = setup_logging(__name__)
 
 class BaseLogin:
     """Base login strategy class."""
+    # Minimum delay (in seconds) before typing into an input that is already ready,
+    # for portals which still drop the keys typed too early
+    min_input_delay: float = 0
+
     def __init__(self, service_name: str, user_input: Locator, password_input: Locator, credentials: Secrets):
         self.service_name = service_name
         self.user_input_selector = user_input
@@ -66,17 +71,17 @@ class BaseLogin:
         :param username: username
         """
         browser.click_page_element_with_retry_using_js(username_input_box, self.user_input_selector)
-        time.sleep(0.5)
-        self.input(username_input_box, username)
+        wait_for_focus(browser, username_input_box)
+        self.input(browser, username_input_box, username)
 
-    def input_password(self, password_input_box: WebElement, password: str) -> None:
+    def input_password(self, browser: Browser, password_input_box: WebElement, password: str) -> None:
         """
         Input the password for the service to the input box provided.
+        :param browser: Browser object
         :param password_input_box: Password input box
         :param password: password
         """
-        self.input(password_input_box, password)
-        time.sleep(0.5)
+        self.input(browser, password_input_box, password)
 
     def get_credentials(self) -> tuple[str, str]:
         """
@@ -106,17 +111,19 @@ class BaseLogin:
             return True
         return False
 
-    @staticmethod
-    def input(control: WebElement, text: str) -> None:
+    def input(self, browser: Browser, control: WebElement, text: str) -> None:
         """
-        Clear the input field and type the given text.
+        Clear the input field and type the given text as soon as the input is ready,
+        waiting until the page has processed all the keys.
+        :param browser: Browser object
         :param control: input field to be cleared
         :param text: text to be typed
         """
-        time.sleep(0.5)
+        wait_for_input_ready(browser, control)
+        if self.min_input_delay:
+            time.sleep(self.min_input_delay)
         if control.get_attribute('value') != '':
             control.send_keys(Keys.CONTROL, 'a')
-            time.sleep(0.05)
             control.send_keys(Keys.DELETE)
         control.send_keys(text)
-
+        wait_for_value(browser, control, text)
@@ -29,6 +29,6 @@ class OneStageLogin(BaseLogin):
         log.web_trace("username-input")
         username_input.send_keys(Keys.TAB)
 
-        self.input_password(password_input, password_value)
+        self.input_password(browser, password_input, password_value)
         log.web_trace("password-input")
         password_input.send_keys(Keys.ENTER)
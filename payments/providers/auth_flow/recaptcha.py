@@ -13,7 +13,6 @@ from selenium.webdriver.remote.webelement import WebElement
 from browser import Browser, Locator, setup_logging
 from payments.providers.auth_flow import BaseLogin
 from payments.providers.secrets import Secrets
-from payments.providers.auth_flow.mouse_move import move_from_to
 
 log = setup_logging(__name__)
 
@@ -85,9 +84,10 @@ class RecaptchaLogin(BaseLogin):
         time.sleep(0.5)
         _input_with_error(username_input_box, username, self.error_treshold.user)
 
-    def input_password(self, password_input_box: WebElement, password: str) -> None:
+    def input_password(self, browser: Browser, password_input_box: WebElement, password: str) -> None:
         """
         Input the password for the service to the input box provided, emulating some inperfections
+        :param browser: Browser object
         :param password_input_box:
         :param password: password
         """
@@ -106,6 +106,8 @@ class RecaptchaLogin(BaseLogin):
         username_value, password_value = self.get_credentials()
         self.input_username(browser, username_input, username_value)
         log.web_trace("username-input")
+        # mouse_move needs numpy and scipy, which take long to import, so do it only when a login happens
+        from payments.providers.auth_flow.mouse_move import move_from_to
         move_from_to(browser, username_input, password_input)
         if random.random() < self.tab_key_treshold:
             log.debug('Using <TAB> to move to password input')
@@ -114,7 +116,7 @@ class RecaptchaLogin(BaseLogin):
             log.debug('Using mouse to move to password input')
             browser.click_page_element_with_retry_using_js(password_input, self.password_input_selector)
 
-        self.input_password(password_input, password_value)
+        self.input_password(browser, password_input, password_value)
         log.web_trace("password-input")
         if random.random() < self.login_button_treshold:
             log.debug('Using <ENTER> to submit a form')
@@ -29,6 +29,6 @@ class TwoStageLogin(BaseLogin):
         password_input = self.find_password_input(browser, 30)
         assert password_input is not None
 
-        self.input_password(password_input, password_value)
+        self.input_password(browser, password_input, password_value)
         log.web_trace("password-input")
         password_input.send_keys(Keys.ENTER)
@@ -0,0 +1,66 @@
+"""
+    Condition-based waits used by login strategies instead of fixed sleeps
+"""
+from typing import Callable
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support.wait import WebDriverWait
+
+from browser import Browser, setup_logging
+
+log = setup_logging(__name__)
+
+# Maximum time (in seconds) to wait for a condition before going on anyway
+DEFAULT_WAIT_TIMEOUT = 2
+# Condition polling interval in seconds
+POLL_INTERVAL = 0.05
+
+_INPUT_READY_JS = '''
+const element = arguments[0];
+return element.isConnected && !element.disabled && !element.readOnly && element.getClientRects().length > 0;
+'''
+_HAS_FOCUS_JS = 'return document.activeElement === arguments[0];'
+_VALUE_JS = 'return arguments[0].value;'
+
+
+def wait_until(browser: Browser, condition: Callable[[Browser], bool], description: str,
+               timeout: float = DEFAULT_WAIT_TIMEOUT) -> bool:
+    """
+    Poll a condition until it is met or the timeout expires
+    :param browser: Browser object
+    :param condition: condition evaluated with the browser as its argument
+    :param description: condition description for logs
+    :param timeout: timeout in seconds
+    :return: True if the condition was met, False on timeout
+    """
+    try:
+        WebDriverWait(browser, timeout, POLL_INTERVAL, ignored_exceptions=(WebDriverException,)).until(condition)
+        return True
+    except TimeoutException:
+        log.debug('Timed out after %s seconds waiting for %s', timeout, description)
+        return False
+
+
+def wait_for_input_ready(browser: Browser, element: WebElement, timeout: float = DEFAULT_WAIT_TIMEOUT) -> bool:
+    """
+    Wait until the input is attached, visible, enabled and writable
+    """
+    return wait_until(browser, lambda driver: bool(driver.execute_script(_INPUT_READY_JS, element)),
+                      'input to become ready', timeout)
+
+
+def wait_for_focus(browser: Browser, element: WebElement, timeout: float = DEFAULT_WAIT_TIMEOUT) -> bool:
+    """
+    Wait until the element has the keyboard focus
+    """
+    return wait_until(browser, lambda driver: bool(driver.execute_script(_HAS_FOCUS_JS, element)),
+                      'input focus', timeout)
+
+
+def wait_for_value(browser: Browser, element: WebElement, value: str, timeout: float = DEFAULT_WAIT_TIMEOUT) -> bool:
+    """
+    Wait until the input holds the given value, i.e. all the typed keys were processed by the page
+    """
+    return wait_until(browser, lambda driver: driver.execute_script(_VALUE_JS, element) == value,
+                      'input value', timeout)
@@ -53,6 +53,7 @@ class Energa(Provider):
     """
     Provider integration for the Energa electricity platform.
     """
+    session_ttl = 12 * 3600
 
     def __init__(self, *locations: str):
         """
@@ -3,6 +3,7 @@
 
     IOK is a common framework used by utility providers to build online customer portals.
 """
+import os
 from datetime import date
 from logging import Logger
 
@@ -10,7 +11,8 @@ from selenium.webdriver.common.by import By
 
 from browser import Browser, Locator
 from payments.payments import Payment
-from payments.providers.provider import Provider
+from payments.providers.iok_http import IOKHttpClient
+from payments.providers.provider import Provider, TRANSPORT_BROWSER, TRANSPORT_HTTP
 
 # === Shared constants for IOK-based portals ===
 
@@ -23,9 +25,17 @@ AMOUNT = Locator(By.CLASS_NAME, 'home-amount')
 DUE_DATE = Locator(By.CLASS_NAME, 'home-info')
 DEFAULT_TIMEOUT = 1
 
+# The HTTP transport only handles portal pages rendered on the server side
+TRANSPORTS = (TRANSPORT_BROWSER, TRANSPORT_HTTP)
+
 
 class IOK(Provider):
     """Base provider for IOK-based portals."""
+    # Due day is fixed, so the outstanding amount rarely changes between the monthly invoices
+    result_ttl = 7 * 24 * 3600
+    # Subclasses whose portals work without JavaScript may default to TRANSPORT_HTTP;
+    # PAYMENTS_<NAME>_TRANSPORT environment variable overrides it
+    transport = TRANSPORT_BROWSER
 
     def __init__(self, due_day: int, url: str, log: Logger, location: str) -> None:
         """
@@ -39,6 +49,38 @@ class IOK(Provider):
         today = date.today()
         self.due_date = date(today.year, today.month, due_day)
         super().__init__(url, (location,), USER_INPUT, PASSWORD_INPUT, LOGOUT_BUTTON)
+        env_name = f'PAYMENTS_{self.name.upper()}_TRANSPORT'
+        transport = os.getenv(env_name, self.transport).lower()
+        if transport in TRANSPORTS:
+            self.transport = transport
+        else:
+            self.log.error('Invalid %s=%s (expected one of %s), using %s',
+                           env_name, transport, ', '.join(TRANSPORTS), self.transport)
+
+    def fetch_without_browser(self) -> list[Payment] | None:
+        """
+        Get payments using the HTTP transport, if selected
+        :return: payments or None if they must be collected with the browser
+        """
+        if self.transport != TRANSPORT_HTTP:
+            return None
+        try:
+            username, password = self.login_strategy.get_credentials()
+            page = IOKHttpClient().login(self.url, username, password)
+            if page.no_overdue:
+                return [Payment(self.name, self.locations[0])]
+            if not page.amount or not page.due_date:
+                self.log.warning('No %s on the page, falling back to browser',
+                                 'amount' if not page.amount else 'due date')
+                return None
+            payments = [Payment(self.name, self.locations[0], page.due_date, page.amount)]
+        except Exception as e:
+            # Whatever goes wrong (login, connection, unexpected page), the browser transport may still work
+            self.log.warning('HTTP transport failed (%s: %s), falling back to browser', e.__class__.__name__, e)
+            print(f'HTTP transport failed ({e}), falling back to browser...')
+            return None
+        self.log.debug("Got amount '%s' of location '%s' over HTTP", page.amount, self.locations[0])
+        return payments
 
     def _fetch_payments(self, browser: Browser) -> list[Payment]:
         """Extract payment info from the page. Return fallback if missing."""
@@ -0,0 +1,155 @@
+"""
+    Browserless transport for IOK-based portals: logs in with a plain HTTP form post
+    and parses the home page, without starting the browser.
+"""
+from html.parser import HTMLParser
+from http.cookiejar import CookieJar
+from urllib.parse import urlencode, urljoin
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+from browser import setup_logging
+from payments.payments.exceptions import PaymentError
+
+log = setup_logging(__name__)
+
+# Seconds to wait for a single HTTP response
+DEFAULT_HTTP_TIMEOUT = 15
+# IOK login inputs are labelled the same way the browser transport locates them
+USER_LABEL = 'login'
+PASSWORD_LABEL = 'haslo'
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36')
+
+
+class IOKHttpError(PaymentError):
+    """
+    Portal page cannot be handled without the browser
+    """
+    ...
+
+
+class IOKPageParser(HTMLParser):
+    """
+    Extracts the login form and the home page payment elements (home-amount, home-info, "no overdue" header)
+    from IOK page HTML
+    """
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.form_action: str | None = None
+        self.form_method = 'get'
+        self.user_field: str | None = None
+        self.password_field: str | None = None
+        self.hidden_fields: dict[str, str] = {}
+        self.amount: str | None = None
+        self.due_date: str | None = None
+        self.no_overdue = False
+        self._in_form = False
+        self._amount_depth = 0
+        self._info_depth = 0
+        self._info_spans: list[str] = []
+
+    @property
+    def has_login_form(self) -> bool:
+        """
+        True if the page contains the login form
+        """
+        return self.form_action is not None
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        attributes = {name: value or '' for name, value in attrs}
+        classes = attributes.get('class', '').split()
+        if tag == 'form' and 'login-form' in classes:
+            self._in_form = True
+            self.form_action = attributes.get('action', '')
+            self.form_method = attributes.get('method', 'get').lower()
+        elif tag == 'input' and self._in_form:
+            name = attributes.get('name')
+            label = attributes.get('aria-labelledby')
+            if label == USER_LABEL:
+                self.user_field = name
+            elif label == PASSWORD_LABEL:
+                self.password_field = name
+            elif name and attributes.get('type') == 'hidden':
+                self.hidden_fields[name] = attributes.get('value', '')
+        elif tag == 'span':
+            if self._amount_depth:
+                self._amount_depth += 1
+            elif 'home-amount' in classes:
+                self._amount_depth = 1
+                self.amount = ''
+            if self._info_depth:
+                self._info_depth += 1
+                self._info_spans.append('')
+            elif 'home-info' in classes:
+                self._info_depth = 1
+            if 'nopayments' in classes:
+                self.no_overdue = True
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == 'form':
+            self._in_form = False
+        elif tag == 'span':
+            if self._amount_depth:
+                self._amount_depth -= 1
+            if self._info_depth:
+                self._info_depth -= 1
+                if not self._info_depth:
+                    # The date is the text of the last span nested in home-info
+                    dates = [text.strip() for text in self._info_spans if text.strip()]
+                    self.due_date = dates[-1] if dates else ''
+
+    def handle_data(self, data: str) -> None:
+        if self._amount_depth:
+            self.amount = f'{self.amount or ""}{data}'
+        if self._info_depth > 1:
+            self._info_spans[-1] += data
+
+
+class IOKHttpClient:
+    """
+    Minimal cookie-aware HTTP client reading IOK portal pages
+    """
+    def __init__(self, timeout: float = DEFAULT_HTTP_TIMEOUT) -> None:
+        """
+        :param timeout: single response timeout in seconds
+        """
+        self.timeout = timeout
+        self._opener = build_opener(HTTPCookieProcessor(CookieJar()))
+
+    def open(self, url: str, data: dict[str, str] | None = None) -> tuple[str, IOKPageParser]:
+        """
+        Request a page (following redirects) and parse it
+        :param url: page URL
+        :param data: form fields to be posted, None for GET request
+        :return: tuple (final page URL, parsed page)
+        """
+        body = None if data is None else urlencode(data).encode()
+        request = Request(url, data=body, headers={'User-Agent': USER_AGENT})
+        log.debug('%s %s', 'GET' if body is None else 'POST', url)
+        with self._opener.open(request, timeout=self.timeout) as response:
+            charset = response.headers.get_content_charset() or 'utf-8'
+            page = IOKPageParser()
+            page.feed(response.read().decode(charset, errors='replace'))
+            page.close()
+            return response.geturl(), page
+
+    def login(self, url: str, username: str, password: str) -> IOKPageParser:
+        """
+        Log in through the portal login form
+        :param url: login page URL
+        :param username: user name
+        :param password: password
+        :return: parsed page shown after login
+        """
+        login_url, login_page = self.open(url)
+        if not login_page.has_login_form or not login_page.user_field or not login_page.password_field:
+            raise IOKHttpError('Login form cannot be submitted without the browser')
+        if login_page.form_method != 'post':
+            raise IOKHttpError(f'Unsupported login form method "{login_page.form_method}"')
+        fields = dict(login_page.hidden_fields)
+        fields[login_page.user_field] = username
+        fields[login_page.password_field] = password
+        _, home_page = self.open(urljoin(login_url, login_page.form_action or ''), fields)
+        if home_page.has_login_form:
+            raise IOKHttpError('Login failed')
+        return home_page
@@ -10,6 +10,7 @@ from browser import setup_logging, Browser, Locator
 from payments.payments import Payment
 from payments.providers.auth_flow import RecaptchaLogin
 from payments.providers.provider import Provider, LoginError
+from payments.providers.resource_policy import DEFAULT_RESOURCE_POLICY, IMAGES
 from payments.console import print_progress, print_stage
 
 log = setup_logging(__name__)
@@ -40,6 +41,10 @@ CAPTCHA_FORM = Locator(By.ID, 'formCaptcha')
 # noinspection PyArgumentEqualDefault
 class Multimedia(Provider):
     """Multimedia TV provider."""
+    # Login is retried many times with long spinner waits, so cap the whole session
+    time_budget = 900
+    # reCAPTCHA image challenges must be able to load
+    resource_policy = DEFAULT_RESOURCE_POLICY.allowing(*IMAGES)
 
     def __init__(self, locations: dict[str, str]):
         """
@@ -34,9 +34,10 @@ LOCATION_RESULT = Locator(By.CLASS_NAME, 'select2-result')
 class BalanceTable:
     """ Balance table locators """
     ID = Locator(By.ID, 'saldaWplatyWykaz')
-    BODY = Locator(By.TAG_NAME, 'tbody')
-    ROW = Locator(By.TAG_NAME, 'tr')
+    ROW = Locator(By.CSS_SELECTOR, 'tbody tr')
     COLUMN = Locator(By.TAG_NAME, 'td')
+    DUE_DATE = 3
+    AMOUNT = 5
 
     # for clarity, keep the first argument to browser.find_elements() even if it's equal to default By.ID
 
@@ -71,16 +72,12 @@ class Pewik(Provider):
                 browser.find_page_element(LOCATION).find_page_elements(LOCATION_TEXT)[2].text
             )
 
-            balances = (
-                browser.find_page_element(BalanceTable.ID)
-                .find_page_element(BalanceTable.BODY)
-                .find_page_elements(BalanceTable.ROW)
-            )
-
+            balances = self.read_table(browser, BalanceTable.ROW, BalanceTable.COLUMN, root=BalanceTable.ID)
             for item in balances:
-                columns = item.find_page_elements(BalanceTable.COLUMN)
+                columns = item.cells
                 if len(columns) > 1:
-                    payments.append(Payment(self.name, location, columns[3], columns[5]))
+                    payments.append(Payment(self.name, location,
+                                            columns[BalanceTable.DUE_DATE], columns[BalanceTable.AMOUNT]))
                 else:
                     payments.append(Payment(self.name, location))
 
@@ -1,7 +1,6 @@
 """
     PGNiG (gas supply) provider module.
 """
-from selenium.common.exceptions import StaleElementReferenceException
 from selenium.webdriver.common.by import By
 
 from browser import setup_logging, Browser, Locator
@@ -31,6 +30,7 @@ INVOICE_PAY_CAPTION = 'Zapłać'
 
 class Pgnig(Provider):
     """PGNiG provider for gas bill retrieval."""
+    session_ttl = 12 * 3600
 
     def __init__(self, *locations: str):
         """Initialize the PGNiG provider with input elements and locations."""
@@ -77,36 +77,17 @@ class Pgnig(Provider):
         log.debug('Waiting for page load completed...')
         browser.wait_for_page_inactive()
 
-        unpaid_invoices = None
-        attempts = 10
-        for i in range(attempts):
-            index = 0
-            item = None
-            try:
-                log.info('Getting filtered invoices list...')
-                unpaid_invoices = []
-                elements = browser.wait_for_page_elements(INVOICE_ROW)
-                if elements is None:
-                    raise FetchError('Cannot get invoices list!')
-                for index, item in enumerate(elements):
-                    if item.find_page_element(INVOICE_BUTTON).text == INVOICE_PAY_CAPTION:
-                        unpaid_invoices.append(item)
-                break
-            except StaleElementReferenceException:
-                log.warning('Stale element encountered during filtering invoices.\n'
-                            'Element index: %s\n'
-                            'Element details:\n%s',
-                            index, browser.dump_element(item))
+        log.info('Getting filtered invoices list...')
+        if browser.wait_for_page_elements(INVOICE_ROW) is None:
+            raise FetchError('Cannot get invoices list!')
+        # Rows are read in a single call, so they cannot go stale while being filtered
+        invoices = self.read_table(browser, INVOICE_ROW, INVOICE_COLUMN, {'button': INVOICE_BUTTON})
+        unpaid_invoices = [invoice.cells for invoice in invoices if invoice.extras['button'] == INVOICE_PAY_CAPTION]
 
         log.debug('Creating payments dict...')
-        payments_dict: dict[str, float] = {}
-        if unpaid_invoices is None:
-            raise FetchError(f'Failed to collect invoices after {attempts} attempts!')
-        for invoice in unpaid_invoices:
-            log.debug('Iterating over unpaid invoices...')
-            columns = invoice.find_page_elements(INVOICE_COLUMN)
-            log.debug('Adding payment...')
-            payments_dict[columns[2].text] = payments_dict.get(columns[2].text, 0) + float(Amount(columns[3].text))
+        payments_dict: dict[str, Amount] = {}
+        for columns in unpaid_invoices:
+            payments_dict[columns[2]] = payments_dict.get(columns[2], 0) + Amount(columns[3])
 
         payments = [Payment(self.name, location, date, amount) for date, amount in payments_dict.items()]
         return payments if payments else [Payment(self.name, location, comment='Failed to process unpaid invoices')]
@@ -8,7 +8,9 @@
 """
 import os
 import socket
+import threading
 import time
+from typing import Any, NamedTuple, TYPE_CHECKING
 from urllib.error import URLError
 from urllib.request import urlopen
 
@@ -18,9 +20,14 @@ from selenium.webdriver.common.by import By
 from browser import Browser, Locator, setup_logging
 from payments.console import print_progress, print_done
 from payments.payments import Payment
-from payments.payments.exceptions import PaymentError
+from payments.payments.exceptions import BudgetExceededError, PaymentError
 from payments.providers.auth_flow import BaseLogin, OneStageLogin
+from payments.providers.resource_policy import DEFAULT_RESOURCE_POLICY, ResourcePolicy
 from payments.providers.secrets.core import Secrets, CredentialsError
+from payments.timing import span
+
+if TYPE_CHECKING:
+    from payments.providers.session_cache import SessionCache
 
 log = setup_logging(__name__)
 
@@ -29,6 +36,92 @@ log = setup_logging(__name__)
 DEFAULT_LOGOUT_XPATH = (
     '//*[contains(string(), "Wyloguj") and not(.//*[contains(string(), "Wyloguj")])]'
 )
+# Time window (in seconds) shared by all overlay buttons of a provider to show up
+OVERLAY_TIMEOUT = 2
+
+# Payments transports: the browser one always works, the HTTP one (see Provider.fetch_without_browser())
+# is faster, but only supported by some providers
+TRANSPORT_BROWSER = 'browser'
+TRANSPORT_HTTP = 'http'
+
+# Finds elements matching a Selenium locator ([by, value] pair) within the parent node
+_FIND_ELEMENTS_JS = '''
+function find(parent, [by, value]) {
+    switch (by) {
+        case 'xpath': {
+            const snapshot = document.evaluate(value, parent, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            return Array.from({length: snapshot.snapshotLength}, (_, i) => snapshot.snapshotItem(i));
+        }
+        case 'id': return Array.from(parent.querySelectorAll(`[id="${CSS.escape(value)}"]`));
+        case 'name': return Array.from(parent.querySelectorAll(`[name="${CSS.escape(value)}"]`));
+        case 'class name': return Array.from(parent.getElementsByClassName(value));
+        case 'link text': return Array.from(parent.querySelectorAll('a')).filter(a => a.innerText.trim() === value);
+        default: return Array.from(parent.querySelectorAll(value));
+    }
+}
+'''
+
+# Reads texts of table rows in a single WebDriver call.
+# arguments: root locator (or null), rows locator, cells locator (or null), {name: locator} extras, attribute names
+_READ_TABLE_JS = _FIND_ELEMENTS_JS + '''
+const [root, rows, cells, extras, attributes] = arguments;
+const text = element => (element.innerText ?? element.textContent ?? '').trim();
+const parent = root ? find(document, root)[0] : document;
+if (!parent) {
+    return null;
+}
+return find(parent, rows).map(row => [
+    cells ? find(row, cells).map(text) : [text(row)],
+    Object.fromEntries(Object.entries(extras).map(([name, locator]) => {
+        const element = find(row, locator)[0];
+        return [name, element ? text(element) : null];
+    })),
+    Object.fromEntries(attributes.map(name => [name, row.getAttribute(name)])),
+]);
+'''
+
+# Waits until an element matching any of the locators is visible or the timeout (in ms) expires.
+# arguments: locators, timeout; returns indices of the locators having visible elements
+_WAIT_FOR_OVERLAYS_JS = _FIND_ELEMENTS_JS + '''
+const [locators, timeout] = arguments;
+const done = arguments[arguments.length - 1];
+const visible = element => element.getClientRects().length > 0 && getComputedStyle(element).visibility !== 'hidden';
+const probe = () => locators.flatMap((locator, index) => find(document, locator).some(visible) ? [index] : []);
+let finished = false;
+let observer = null;
+let timer = null;
+function finish(found) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    observer?.disconnect();
+    clearTimeout(timer);
+    done(found);
+}
+const found = probe();
+if (found.length || timeout <= 0) {
+    finish(found);
+} else {
+    observer = new MutationObserver(() => {
+        const found = probe();
+        if (found.length) {
+            finish(found);
+        }
+    });
+    observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+    timer = setTimeout(() => finish([]), timeout);
+}
+'''
+
+
+class TableRow(NamedTuple):
+    """
+    Texts of a table row read by Provider.read_table()
+    """
+    cells: list[str]
+    extras: dict[str, str | None]
+    attributes: dict[str, str | None]
 
 
 class ProviderConfig:
@@ -71,11 +164,14 @@ class ProviderConfig:
         log.info('Detected local mock server at %s', base_url)
         return base_url
 
-def _sleep_with_message(amount: int, message: str) -> None:
-    """Sleep for `amount` seconds, logging a debug message first."""
+def _sleep_with_message(amount: int, message: str, cancelled: threading.Event | None = None) -> None:
+    """Sleep for `amount` seconds, logging a debug message first; wake up early once `cancelled` is set."""
     if amount:
         log.debug('%s: sleeping %s seconds', message, amount)
-        time.sleep(amount)
+        if cancelled is None:
+            time.sleep(amount)
+        else:
+            cancelled.wait(amount)
 
 
 class LoginError(PaymentError):
@@ -94,6 +190,18 @@ class FetchError(PaymentError):
 
 class Provider:
     """Base class for a payment provider using Selenium."""
+    # Default wall-clock budget (in seconds) for collecting payments of this provider, None means unlimited
+    time_budget: float | None = None
+    # Time (in seconds) an authenticated session may be reused for, None if the provider
+    # cannot tell a restored session from a stale one (see _is_logged_in())
+    session_ttl: float | None = None
+    # Maximum age (in seconds) of cached payments of this provider, None if only the global maximum age applies
+    result_ttl: float | None = None
+    # Resources blocked while provider pages are open; override with DEFAULT_RESOURCE_POLICY.allowing(...)
+    # if the portal breaks without some of them
+    resource_policy: ResourcePolicy = DEFAULT_RESOURCE_POLICY
+    # Payments transport, TRANSPORT_HTTP only for providers implementing fetch_without_browser()
+    transport: str = TRANSPORT_BROWSER
 
     def __init__(self,
                  url: str,
@@ -105,6 +213,7 @@ class Provider:
                  needs_clear_user_profile: bool = False,
                  pre_login_delay: int = 0,
                  post_login_delay: int = 0,
+                 min_input_delay: float = 0,
                  login_strategy: type[BaseLogin] = OneStageLogin):
         """
         :param url: URL of the login page
@@ -117,6 +226,7 @@ class Provider:
         False otherwise
         :param pre_login_delay: Sleep before the login form fill
         :param post_login_delay: Sleep after the login form submitted
+        :param min_input_delay: Minimum delay before typing into login inputs, only for portals that need it
         """
         self.url = url
         self.name = self.__class__.__name__.lower()
@@ -124,6 +234,7 @@ class Provider:
         self._location_order = {location: i for i, location in enumerate(self.locations)}
         self.login_strategy = login_strategy(self.name, user_input, password_input,
                                              Secrets(self.name, 'username', 'password'))
+        self.login_strategy.min_input_delay = min_input_delay
 
         self.logout_button = logout_button or Locator(By.XPATH, DEFAULT_LOGOUT_XPATH)
         self.overlay_buttons = [] if overlay_buttons is None else overlay_buttons
@@ -131,27 +242,74 @@ class Provider:
         self.pre_login_delay = pre_login_delay
         self.post_login_delay = post_login_delay
         self.logged_in = False  # TODO: consider refactoring after all providers have _is_logged_in implemented
+        self.session_cache: 'SessionCache | None' = None
+        self._restored_session: dict[str, Any] | None = None
+        self._blocked_urls: set[str] = set()
+        self._loaded_requests = 0
+        self._loaded_bytes = 0
+        # Requests and bytes already counted of every document seen, by document id
+        self._counted_documents: dict[str, tuple[int, int]] = {}
+        # Set when get_payments() running in another thread ran out of time, see cancel()
+        self.cancelled = threading.Event()
         log.debug('Created service "%s" (URL: "%s")', self.name, self.url)
 
     def __repr__(self) -> str:
         """Provider name and list of supported locations."""
         return f'{self.name}: [{", ".join(map(str, self.locations))}]'
 
+    @property
+    def resource_stats(self) -> dict[str, int]:
+        """
+        Resources of the pages seen by the last get_payments() call, after loading, logging in and fetching payments:
+        requests blocked by the resource policy, requests loaded and bytes loaded; empty if the policy was not in effect
+        """
+        if not self._blocked_urls and not self._loaded_requests:
+            return {}
+        return {'blocked_requests': len(self._blocked_urls),
+                'loaded_requests': self._loaded_requests,
+                'loaded_bytes': self._loaded_bytes}
+
+    def cancel(self) -> None:
+        """
+        Stop get_payments() running in another thread at its next stage; its browser is being torn down,
+        so it neither stores the session, nor logs out, nor records resources then.
+        Cleared by the caller before the next get_payments() call.
+        """
+        self.cancelled.set()
+
+    def _check_cancelled(self) -> None:
+        if self.cancelled.is_set():
+            raise BudgetExceededError('Cancelled')
+
     def get_payments(self, browser: Browser) -> list[Payment]:
         """Log in and fetch payments, return fallback on failure."""
+        self._blocked_urls = set()
+        self._loaded_requests = 0
+        self._loaded_bytes = 0
+        self._counted_documents = {}
         with log.browser(browser), log.group(self.name):
             try:
                 message = f'Getting payments for service {self.name}...'
                 log.debug(message)
                 print_progress('logging in...')
-                self.login(browser)
+                with span('login'):
+                    self.login(browser)
+                self._check_cancelled()
+                # Portals usually leave the login page, which would not be counted otherwise
+                self._record_resources(browser)
                 if self.logged_in:
                     print_progress('fetching payments...')
-                    payments = sorted(self._fetch_payments(browser),
+                    with span('fetch'):
+                        fetched = self._fetch_payments(browser)
+                    self._check_cancelled()
+                    payments = sorted(fetched,
                                       key=lambda value: self._location_order.get(value.location, float('inf')))
                     print_done('done.')
                 else:
                     payments = self._default_payments('Login error')
+            except BudgetExceededError as e:
+                log.debug('Getting payments cancelled')
+                payments = self._default_payments(e.reason)
             except (LoginError, FetchError, CredentialsError) as e:
                 msg = f'{e.__class__.__name__}: {str(e)}'
                 log.exception(msg)
@@ -165,40 +323,87 @@ class Provider:
                 log.web_error()
                 payments = self._default_payments(str(e))
             finally:
-                self.logout(browser)
+                if not self.cancelled.is_set():
+                    self._record_resources(browser)
+                    if not self._store_session(browser):
+                        with span('logout'):
+                            self.logout(browser)
             return payments
 
     def load(self, browser: Browser) -> None:
-        """ Opens the login page """
-        log.debug('Opening "%s" in a new tab' % self.url)
-        browser.open_in_new_tab(self.url)
-        log.debug('Wating 2 seconds')
-        browser.wait_for_page_inactive(2)
+        """ Opens the login page, restoring the cached session first, if any """
+        with span('load'):
+            self._restore_session_cookies(browser)
+            log.debug('Opening "%s" in a new tab' % self.url)
+            self._open_page(browser)
+            self._restore_session_storage(browser)
+            browser.wait_for_page_load_completed()
+        self._record_resources(browser)
         self._close_overlays(browser)
 
+    def _blocks_resources(self) -> bool:
+        return bool(self.resource_policy.patterns) and ResourcePolicy.enabled()
+
+    def _open_page(self, browser: Browser) -> None:
+        """
+        Open the login page in a new tab, blocking resources according to the resource policy
+        """
+        if not self._blocks_resources():
+            browser.open_in_new_tab(self.url)
+            return
+        # Blocking is set up per tab, so it has to be in effect before the page starts loading
+        browser.open_in_new_tab('about:blank')
+        if self.resource_policy.apply(browser):
+            log.debug('Blocking resources: %s', self.resource_policy)
+        browser.get(self.url)
+
+    def _record_resources(self, browser: Browser) -> None:
+        """
+        Add resources of the current page to resource_stats; a page recorded before (e.g. a portal logging in
+        without leaving the login page) adds only the requests made since
+        """
+        if not self._blocks_resources():
+            return
+        stats = self.resource_policy.page_stats(browser)
+        self._blocked_urls.update(stats['blocked'])
+        requests, loaded = self._counted_documents.get(stats['document'], (0, 0))
+        self._loaded_requests += max(0, stats['requests'] - requests)
+        self._loaded_bytes += max(0, stats['bytes'] - loaded)
+        if stats['document']:
+            self._counted_documents[stats['document']] = (stats['requests'], stats['bytes'])
+
     def login(self, browser: Browser, load: bool = True) -> None:
         """Perform login in the web application."""
         try:
             if load:
                 self.load(browser)
+                self._check_cancelled()
 
             log.info('Logging into service...')
             if self._is_logged_in(browser):
                 log.info('Already logged in.')
                 self.logged_in = True
                 return
+            if self._restored_session:
+                log.info('Cached session is stale, logging in.')
+                self._invalidate_session()
             log.web_trace('pre-login')
-            _sleep_with_message(self.pre_login_delay, 'Pre-login')
+            _sleep_with_message(self.pre_login_delay, 'Pre-login', self.cancelled)
+            self._check_cancelled()
 
-            self.login_strategy.execute(browser)
+            with span('execute'):
+                self.login_strategy.execute(browser)
             log.debug('Form submitted')
 
             browser.wait_for_page_load_completed()
             browser.wait_for_page_inactive()
-            _sleep_with_message(self.post_login_delay, 'Post-login')
+            _sleep_with_message(self.post_login_delay, 'Post-login', self.cancelled)
+            self._check_cancelled()
             log.web_trace('post-login')
             log.info('Done.')
             self.logged_in = self.login_strategy.verify(browser)
+        except BudgetExceededError:
+            raise
         except Exception as e:
             if 'Timed out receiving message from renderer' in str(e):
                 # Let the further code decide if the page really failed to load
@@ -222,6 +427,55 @@ class Provider:
         except WebDriverException:
             log.web_error()
 
+    def _uses_session_cache(self) -> bool:
+        return self.session_cache is not None and self.session_ttl is not None
+
+    def _restore_session_cookies(self, browser: Browser) -> None:
+        """Put cached session cookies into the browser before the page is opened."""
+        self._restored_session = None
+        if not self._uses_session_cache():
+            return
+        assert self.session_cache is not None
+        try:
+            self._restored_session = self.session_cache.restore_cookies(browser, self.name)
+        except Exception as e:
+            # The session cache only saves the login, it must never fail the provider
+            log.warning('Cannot restore cached session: %s', e)
+
+    def _restore_session_storage(self, browser: Browser) -> None:
+        """Put cached localStorage items into the opened page, reloading it if anything was restored."""
+        if self._restored_session is None or self.session_cache is None:
+            return
+        try:
+            if self.session_cache.restore_local_storage(browser, self._restored_session):
+                log.debug('Restored cached localStorage, reloading page')
+                browser.refresh()
+                browser.wait_for_page_load_completed()
+        except WebDriverException as e:
+            log.warning('Cannot restore cached localStorage: %s', e)
+
+    def _invalidate_session(self) -> None:
+        """Drop the cached session that turned out to be stale."""
+        self._restored_session = None
+        if self.session_cache is not None:
+            self.session_cache.invalidate(self.name)
+
+    def _store_session(self, browser: Browser) -> bool:
+        """
+        Save the authenticated session for the next run.
+        :return: True if the session was stored, so it must be kept alive (i.e. not logged out)
+        """
+        if not self.logged_in or not self._uses_session_cache():
+            return False
+        assert self.session_cache is not None and self.session_ttl is not None
+        try:
+            self.session_cache.store(browser, self.name, self.session_ttl, [self.url])
+        except Exception as e:
+            # Browser, disk or keyring errors; the session is logged out then, as if it was not cached
+            log.warning('Cannot store session: %s', e)
+            return False
+        return True
+
     def service_url(self, base: str, url: str = '') -> str:
         """
         Calculates service URL either for mock server (if running) or real provider page
@@ -236,16 +490,84 @@ class Provider:
         raise NotImplementedError(f'{self.__class__.__name__} must override get_url().')
 
     def _close_overlays(self, browser: Browser) -> None:
+        """
+        Click overlay buttons (cookie consents, modals) showing up within a single OVERLAY_TIMEOUT window.
+        All buttons are watched at once; a button listed N times is clicked at most N times.
+        """
+        if not self.overlay_buttons:
+            return
+        overlay_buttons: dict[tuple[str, str], Locator] = {}
+        clicks: dict[tuple[str, str], int] = {}
         for overlay_button in self.overlay_buttons:
-            log.debug('Checking overlay button %s', overlay_button)
-            webelement = browser.wait_for_page_element(overlay_button, 2)
-            if webelement:
-                log.debug('Overlay button %s found, closing', overlay_button)
-                try:
-                    browser.safe_click_page_element(overlay_button)
-                    browser.wait_for_page_element_disappear(overlay_button, 2)
-                except TimeoutException:
-                    log.debug('Timeout expired waiting for button %s to become clickable!', overlay_button)
+            key = (overlay_button.by, overlay_button.value)
+            overlay_buttons.setdefault(key, overlay_button)
+            clicks[key] = clicks.get(key, 0) + 1
+        start = time.perf_counter()
+        with span('overlays'):
+            while (remaining := start + OVERLAY_TIMEOUT - time.perf_counter()) > 0:
+                pending = [key for key, count in clicks.items() if count > 0]
+                if not pending:
+                    break
+                log.debug('Waiting for overlay buttons %s', [overlay_buttons[key] for key in pending])
+                found = browser.execute_async_script(_WAIT_FOR_OVERLAYS_JS, [list(key) for key in pending],
+                                                     int(remaining * 1000))
+                if not found:
+                    break
+                for key in (pending[index] for index in found):
+                    overlay_button = overlay_buttons[key]
+                    clicks[key] -= 1
+                    log.debug('Overlay button %s found, closing', overlay_button)
+                    try:
+                        browser.safe_click_page_element(overlay_button)
+                        browser.wait_for_page_element_disappear(overlay_button, 2)
+                    except TimeoutException:
+                        log.debug('Timeout expired waiting for button %s to become clickable!', overlay_button)
+        log.debug('Overlay handling took %.2f seconds', time.perf_counter() - start)
+
+    @staticmethod
+    def read_table(browser: Browser,
+                   rows: Locator,
+                   cells: Locator | None = None,
+                   extras: dict[str, Locator] | None = None,
+                   attributes: tuple[str, ...] = (),
+                   root: Locator | None = None) -> list[TableRow]:
+        """
+        Read a whole table in a single WebDriver round trip instead of one call per row and cell.
+        Nested locators are searched within the row element, like WebElement.find_elements() does.
+        :param browser: Browser object
+        :param rows: locator of the row elements (searched within root)
+        :param cells: locator of the cell elements, None to read the whole row text as its only cell
+        :param extras: named locators of additional row elements whose (first match) text should be read
+        :param attributes: names of the row element attributes to be read
+        :param root: optional locator of the element containing the rows (first match is used)
+        :return: list of rows, empty if root element or rows are not found
+        """
+        def locator(value: Locator) -> list[str]:
+            return [value.by, value.value]
+
+        table = browser.execute_script(_READ_TABLE_JS,
+                                       locator(root) if root else None,
+                                       locator(rows),
+                                       locator(cells) if cells else None,
+                                       {name: locator(value) for name, value in (extras or {}).items()},
+                                       list(attributes))
+        return [TableRow(list(row_cells), dict(row_extras), dict(row_attributes))
+                for row_cells, row_extras, row_attributes in table or []]
+
+    def fetch_without_browser(self) -> list[Payment] | None:
+        """
+        Get payments without starting the browser; called if transport is TRANSPORT_HTTP,
+        must be overridden in subclasses supporting it
+        :return: payments or None if they must be collected with the browser (see get_payments())
+        """
+        return None
+
+    def failed_payments(self, reason: str) -> list[Payment]:
+        """
+        Fallback payments for all provider's locations
+        :param reason: failure reason stored in the payments comment
+        """
+        return self._default_payments(reason)
 
     def _default_payments(self, message: str = '') -> list[Payment]:
         return [Payment(self.name,
@@ -0,0 +1,119 @@
+"""
+    Blocking of page resources the providers never read (images, fonts, trackers), using the DevTools protocol
+"""
+import os
+from typing import Any
+
+from str_to_bool import str_to_bool
+
+from browser import Browser, setup_logging
+
+log = setup_logging(__name__)
+
+# URL patterns (Network.setBlockedURLs wildcards) of resource groups
+IMAGES = ('*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.svg*', '*.ico*', '*.bmp*', '*.avif*')
+MEDIA = ('*.mp4*', '*.webm*', '*.mp3*', '*.ogg*', '*.wav*', '*.m4a*')
+FONTS = ('*.woff*', '*.ttf*', '*.otf*', '*.eot*', '*://fonts.googleapis.com/*', '*://fonts.gstatic.com/*')
+TRACKERS = ('*://*.google-analytics.com/*', '*://*.analytics.google.com/*', '*://*.googletagmanager.com/*',
+            '*://*.doubleclick.net/*', '*://connect.facebook.net/*', '*://*.facebook.com/tr*',
+            '*://bat.bing.com/*', '*://bat.bing.net/*', '*://*.hotjar.com/*', '*://*.livechatinc.com/*',
+            '*://*.cookiebot.com/*', '*://*.cookiebot.eu/*')
+
+# Counts resources of the current page: [blocked URLs, loaded requests, loaded bytes, document id].
+# Blocked requests never show up in the network statistics, so they are found among URLs
+# referenced by the page (and failed resource timing entries, if the browser records them).
+# Counts only grow while the document is open; its time origin tells it from the next one.
+# arguments: blocked URL patterns
+_RESOURCE_STATS_JS = '''
+const patterns = arguments[0].map(pattern => new RegExp(
+    '^' + pattern.split('*').map(part => part.replace(/[.+?^${}()|[\\]\\\\]/g, '\\\\$&')).join('.*') + '$'));
+const isBlocked = url => patterns.some(pattern => pattern.test(url));
+const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+const blocked = new Set();
+let requests = 0, bytes = 0;
+for (const entry of entries) {
+    if (isBlocked(entry.name)) {
+        blocked.add(entry.name);
+    } else {
+        requests++;
+        bytes += entry.transferSize || 0;
+    }
+}
+for (const element of document.querySelectorAll('img[src], source[src], video[src], audio[src], script[src], link[href]')) {
+    const url = element.src || element.href;
+    if (url && isBlocked(url)) {
+        blocked.add(url);
+    }
+}
+return [Array.from(blocked), requests, bytes, String(performance.timeOrigin)];
+'''
+
+
+class ResourcePolicy:
+    """
+    URL patterns of resources blocked while provider pages are open
+    """
+    def __init__(self, *groups: tuple[str, ...], allowed: tuple[str, ...] = ()) -> None:
+        """
+        :param groups: groups of blocked URL patterns, e.g. IMAGES
+        :param allowed: patterns never blocked, overriding the groups
+        """
+        self.groups = groups
+        self.allowed = allowed
+
+    def __repr__(self) -> str:
+        return f'ResourcePolicy({", ".join(self.patterns)})'
+
+    @property
+    def patterns(self) -> list[str]:
+        """
+        Blocked URL patterns
+        """
+        return [pattern for group in self.groups for pattern in group if pattern not in self.allowed]
+
+    def allowing(self, *patterns: str) -> 'ResourcePolicy':
+        """
+        Create policy not blocking given patterns, for portals broken by the default policy
+        :param patterns: patterns (or whole groups, e.g. *IMAGES) to be allowed
+        :return: new ResourcePolicy object
+        """
+        return ResourcePolicy(*self.groups, allowed=self.allowed + patterns)
+
+    @staticmethod
+    def enabled() -> bool:
+        """
+        False if resource blocking was turned off with PAYMENTS_BLOCK_RESOURCES
+        """
+        return bool(str_to_bool(os.getenv('PAYMENTS_BLOCK_RESOURCES', 'true')))
+
+    def apply(self, browser: Browser) -> bool:
+        """
+        Block resources in the current browser tab
+        :param browser: Browser object
+        :return: True if the policy is in effect
+        """
+        try:
+            browser.execute_cdp_cmd('Network.enable', {})
+            browser.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.patterns})
+            return True
+        except Exception as e:
+            log.debug('Cannot block resources: %s', e)
+            return False
+
+    def page_stats(self, browser: Browser) -> dict[str, Any]:
+        """
+        Resources of the current page
+        :param browser: Browser object
+        :return: dict with blocked URLs, number of loaded requests, loaded bytes
+        and id of the document (empty if not known), all counted since the document was opened
+        """
+        try:
+            blocked, requests, loaded, document = browser.execute_script(_RESOURCE_STATS_JS, self.patterns)
+        except Exception as e:
+            log.debug('Cannot read page resources: %s', e)
+            return {'blocked': [], 'requests': 0, 'bytes': 0, 'document': ''}
+        return {'blocked': list(blocked), 'requests': int(requests), 'bytes': int(loaded), 'document': str(document)}
+
+
+DEFAULT_RESOURCE_POLICY = ResourcePolicy(IMAGES, MEDIA, FONTS, TRACKERS)
+NO_RESOURCE_POLICY = ResourcePolicy()
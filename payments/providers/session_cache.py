@@ -0,0 +1,178 @@
+"""
+    Encrypted on-disk store of authenticated browser sessions (cookies and localStorage), keyed by provider name
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+import keyring
+from cryptography.fernet import Fernet, InvalidToken
+
+from browser import Browser, setup_logging
+from payments.providers.secrets.core import Secret, CredentialsError
+
+log = setup_logging(__name__)
+
+DEFAULT_DIRECTORY = Path.home() / '.cache' / 'payments' / 'sessions'
+SESSION_FILE_SUFFIX = '.session'
+
+# Fields accepted by Network.setCookies out of those returned by Network.getCookies
+_COOKIE_FIELDS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expires', 'priority')
+
+_DUMP_LOCAL_STORAGE_JS = 'return [location.origin, Object.fromEntries(Object.entries(localStorage))];'
+_RESTORE_LOCAL_STORAGE_JS = '''
+const items = arguments[0];
+let restored = 0;
+for (const [key, value] of Object.entries(items)) {
+    if (localStorage.getItem(key) === null) {
+        localStorage.setItem(key, value);
+        restored++;
+    }
+}
+return restored;
+'''
+
+
+class SessionCache:
+    """
+    Stores provider sessions encrypted with a key kept in the system keyring
+    (or PAYMENTS_SESSION_KEY environment variable). Every entry carries its expiry time;
+    expired entries are evicted instead of being restored.
+    """
+    def __init__(self, directory: Path | str | None = None, key: bytes | None = None) -> None:
+        """
+        :param directory: cache directory (default: PAYMENTS_SESSION_CACHE_DIR or ~/.cache/payments/sessions)
+        :param key: Fernet encryption key; read from (or created in) the keyring if not provided
+        """
+        self.directory = Path(directory or os.getenv('PAYMENTS_SESSION_CACHE_DIR') or DEFAULT_DIRECTORY)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._fernet = Fernet(key or self._get_key())
+
+    @staticmethod
+    def _get_key() -> bytes:
+        """
+        Read the encryption key from environment or keyring, creating a new one in the keyring if missing
+        """
+        secret = Secret('payments', 'session_key')
+        try:
+            value = secret.get()
+            if value:
+                return value.encode()
+        except CredentialsError:
+            pass
+        log.info('Creating new session cache key in keyring service %s', secret.keyring_service)
+        key = Fernet.generate_key()
+        keyring.set_password(secret.keyring_service, secret.keyring, key.decode())
+        return key
+
+    def _path(self, name: str) -> Path:
+        return self.directory / f'{name}{SESSION_FILE_SUFFIX}'
+
+    def load(self, name: str) -> dict[str, Any] | None:
+        """
+        Load a stored session
+        :param name: provider name
+        :return: session data or None if there is no valid (readable and not expired) session
+        """
+        path = self._path(name)
+        try:
+            data: dict[str, Any] = json.loads(self._fernet.decrypt(path.read_bytes()))
+        except FileNotFoundError:
+            return None
+        except (InvalidToken, ValueError) as e:
+            log.warning('Cannot read cached session of %s (%s), evicting', name, e.__class__.__name__)
+            self.invalidate(name)
+            return None
+        if data.get('expires', 0) <= time.time():
+            log.debug('Cached session of %s expired, evicting', name)
+            self.invalidate(name)
+            return None
+        return data
+
+    def save(self, name: str, cookies: list[dict[str, Any]], local_storage: dict[str, dict[str, str]],
+             ttl: float) -> None:
+        """
+        Store a session
+        :param name: provider name
+        :param cookies: browser cookies (as returned by Network.getCookies)
+        :param local_storage: localStorage items by origin
+        :param ttl: time in seconds after which the session is considered expired
+        """
+        now = time.time()
+        data = {
+            'created': now,
+            'expires': now + ttl,
+            'cookies': cookies,
+            'local_storage': local_storage,
+        }
+        path = self._path(name)
+        temp_path = path.with_suffix('.tmp')
+        temp_path.write_bytes(self._fernet.encrypt(json.dumps(data).encode()))
+        os.replace(temp_path, path)
+
+    def invalidate(self, name: str) -> None:
+        """
+        Remove a stored session
+        :param name: provider name
+        """
+        self._path(name).unlink(missing_ok=True)
+
+    def evict_expired(self) -> int:
+        """
+        Remove all expired or unreadable sessions
+        :return: number of removed sessions
+        """
+        evicted = 0
+        for path in self.directory.glob(f'*{SESSION_FILE_SUFFIX}'):
+            if self.load(path.stem) is None:
+                evicted += 1
+        return evicted
+
+    def restore_cookies(self, browser: Browser, name: str) -> dict[str, Any] | None:
+        """
+        Put stored session cookies into the browser; must be done before the provider page is opened
+        :param browser: Browser object
+        :param name: provider name
+        :return: restored session data or None if there was nothing to restore
+        """
+        data = self.load(name)
+        if data is None:
+            return None
+        cookies = [{key: value for key, value in cookie.items() if key in _COOKIE_FIELDS}
+                   for cookie in data['cookies']]
+        browser.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+        log.debug('Restored %d cookies of %s', len(cookies), name)
+        return data
+
+    @staticmethod
+    def restore_local_storage(browser: Browser, data: dict[str, Any]) -> bool:
+        """
+        Put stored localStorage items of the currently opened origin into the page
+        :param browser: Browser object
+        :param data: session data returned by restore_cookies()
+        :return: True if any item was restored and the page needs to be reloaded
+        """
+        origin = browser.execute_script('return location.origin;')
+        items = data['local_storage'].get(origin)
+        if not items:
+            return False
+        return bool(browser.execute_script(_RESTORE_LOCAL_STORAGE_JS, items))
+
+    def store(self, browser: Browser, name: str, ttl: float, urls: list[str]) -> None:
+        """
+        Save the current browser session: cookies of the provider's pages and localStorage of the current page.
+        Cookies of other sites in the same browser profile (e.g. other providers' sessions) are not stored.
+        :param browser: Browser object
+        :param name: provider name
+        :param ttl: session time-to-live in seconds
+        :param urls: URLs of the provider's pages whose cookies are stored
+        """
+        cookies = browser.execute_cdp_cmd('Network.getCookies', {'urls': urls}).get('cookies', [])
+        previous = self.load(name)
+        local_storage: dict[str, dict[str, str]] = previous['local_storage'] if previous else {}
+        origin, items = browser.execute_script(_DUMP_LOCAL_STORAGE_JS)
+        local_storage[origin] = items
+        self.save(name, cookies, local_storage, ttl)
+        log.debug('Stored session of %s (%d cookies)', name, len(cookies))
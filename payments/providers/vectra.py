@@ -21,6 +21,7 @@ PASSWORD_INPUT = Locator(By.NAME, 'password')
 MAIN_DASHBOARD = Locator(By.CSS_SELECTOR, 'div.main-page.dashboard')
 INVOICES_BUTTON = Locator(By.XPATH, '//span[normalize-space(.)="Zobacz faktury"]')
 INVOICES_LIST = Locator(By.XPATH, '(//table[contains(@class,"vectra-complex-table")])[1]/tbody/tr')
+INVOICE_COLUMN = Locator(By.TAG_NAME, 'td')
 TWO_FACTOR_AUTH_BUTTON = Locator(By.XPATH, '//h3[normalize-space(.)="Wpisz kod weryfikacyjny"]')
 TOTAL = Locator(By.XPATH, '//div[contains(@class, "left-column")]//h3')
 
@@ -36,6 +37,7 @@ class Columns:
 
 class Vectra(Provider):
     """OPEC provider for hot water and heating."""
+    session_ttl = 12 * 3600
 
     def __init__(self, *locations: str):
         """Initialize OPEC service with given locations."""
@@ -49,14 +51,10 @@ class Vectra(Provider):
         return self.service_url(SERVICE_URL)
 
     def login(self, browser: Browser, load: bool = True) -> None:
-        if load:
-            self.load(browser)
-
-        if browser.wait_for_page_element(USER_MENU, 2):
-            self.logged_in = True
+        super().login(browser, load)
+        if self.logged_in and self._restored_session is not None:
+            # Logged in by the cached session, so no verification code is asked for
             return
-
-        super().login(browser, False)
         if browser.wait_for_page_element(TWO_FACTOR_AUTH_BUTTON, 2):
             if browser.options.headless:
                 self.payment_comment = '2FA is needed to login to service'
@@ -107,12 +105,11 @@ class Vectra(Provider):
             return [total]
         invoices_button.click()
         # Get unpaid invoices
-        unpaid_invoices = browser.wait_for_page_elements(INVOICES_LIST)
-        if not unpaid_invoices:
+        if not browser.wait_for_page_elements(INVOICES_LIST):
             total.comment = 'Timed out waiting for invoices list to open'
             return [total]
-        for invoice in unpaid_invoices:
-            columns = invoice.find_elements(By.TAG_NAME, 'td')
+        for invoice in self.read_table(browser, INVOICES_LIST, INVOICE_COLUMN):
+            columns = invoice.cells
             payment = Payment(self.name, self.locations[0], columns[Columns.DueDate], columns[Columns.Amount])
             total.amount += payment.amount
             if payment.due_date < total.due_date:
@@ -122,4 +119,4 @@ class Vectra(Provider):
         return [total]
 
     def _is_logged_in(self, browser: Browser) -> bool:
-        return False
+        return bool(browser.wait_for_page_element(USER_MENU, 2))
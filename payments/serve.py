@@ -0,0 +1,237 @@
+"""
+    Collector daemon keeping browsers warm between collections.
+
+    Starts a pool of browsers once and serves collection requests over local HTTP;
+    every request returns the same JSON as -j/--json of a regular run, but skips
+    interpreter start-up, imports and browser launch.
+
+        GET /collect[?provider=name&jobs=N&sort=key&reverse=1]  collect payments
+        GET /health                                             daemon status
+"""
+import argparse
+import json
+import logging
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Sequence
+from urllib.parse import parse_qs, urlsplit
+
+from str_to_bool import str_to_bool
+
+from browser import setup_logging
+from payments.main import browser_options_factory, create_providers
+from payments.payments import Payment, PaymentsManager, WorkerPool
+from payments.payments.resultcache import ResultCache, parse_age
+from payments.providers import Provider
+from payments.providers.session_cache import SessionCache
+
+log = setup_logging(__name__)
+
+DEFAULT_PORT = 8765
+
+
+class CollectorDaemon:
+    """
+    Runs collections one at a time using a shared pool of warm browsers
+    """
+    def __init__(self,
+                 pool: WorkerPool,
+                 session_cache: SessionCache | None = None,
+                 result_cache: ResultCache | None = None) -> None:
+        """
+        :param pool: workers whose browsers are reused by all collections
+        :param session_cache: optional store of authenticated sessions allowing providers to skip login
+        :param result_cache: optional cache of previously collected payments allowing providers to be skipped
+        """
+        self.pool = pool
+        self.session_cache = session_cache
+        self.result_cache = result_cache
+        self.started = time.time()
+        self.collections = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def select(provider: str = '') -> Sequence[Provider]:
+        """
+        Create providers to be collected. Fresh providers are created for every collection,
+        so that no state (e.g. login status) leaks between collections.
+        :param provider: providers name(s) in the -p/--provider format, empty for all
+        :return: selected providers
+        :raises KeyError: if no provider matches
+        """
+        return create_providers(provider)
+
+    def collect(self, providers: Provider | Sequence[Provider], jobs: int = 1, sort: str | None = None,
+                reverse: bool = False) -> dict[str, Any]:
+        """
+        Collect payments
+        :param providers: providers returned by select()
+        :param jobs: number of providers processed concurrently, limited to the pool size
+        :param sort: sort key, None to keep the providers order
+        :param reverse: sort in reverse order
+        :return: payments in the -j/--json output format
+        """
+        if sort is not None and sort not in Payment.SORT_KEYS:
+            raise ValueError(f'Invalid sort key "{sort}", expected one of {Payment.SORT_KEYS}')
+        with self._lock:
+            manager = PaymentsManager(providers, session_cache=self.session_cache, result_cache=self.result_cache)
+            output = manager.collect_real(self.pool.workers[0].options, jobs=jobs, pool=self.pool)
+            self.collections += 1
+        if sort:
+            output = output.sort(sort, reverse)
+        return output.json()
+
+    def status(self) -> dict[str, Any]:
+        """
+        Daemon status
+        :return: JSON-serializable dict
+        """
+        return {
+            'status': 'busy' if self._lock.locked() else 'idle',
+            'workers': len(self.pool),
+            'collections': self.collections,
+            'uptime': f'{time.time() - self.started:.0f}',
+        }
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP front-end of the collector daemon
+    """
+    server: '_DaemonServer'
+
+    def do_GET(self) -> None:
+        """
+        Handle GET request
+        """
+        url = urlsplit(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if url.path == '/health':
+            self._send(HTTPStatus.OK, self.server.collector.status())
+            return
+        if url.path != '/collect':
+            self._send(HTTPStatus.NOT_FOUND, {'error': f'Unknown path {url.path}'})
+            return
+        collector = self.server.collector
+        try:
+            providers = collector.select(query.get('provider', ''))
+        except KeyError as e:
+            self._send(HTTPStatus.NOT_FOUND, {'error': e.args[0]})
+            return
+        try:
+            result = collector.collect(providers,
+                                       int(query.get('jobs', '1')),
+                                       query.get('sort'),
+                                       str_to_bool(query.get('reverse', 'false')))
+        except ValueError as e:
+            self._send(HTTPStatus.BAD_REQUEST, {'error': str(e)})
+        except Exception as e:
+            log.exception('Collection failed')
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)})
+        else:
+            self._send(HTTPStatus.OK, result)
+
+    def _send(self, status: HTTPStatus, body: dict[str, Any]) -> None:
+        data = json.dumps(body, indent=2, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+        log.debug('%s - %s', self.address_string(), format % args)
+
+
+class _DaemonServer(ThreadingHTTPServer):
+    """
+    HTTP server holding the collector daemon
+    """
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], collector: CollectorDaemon) -> None:
+        super().__init__(address, _RequestHandler)
+        self.collector = collector
+
+
+def create_server(collector: CollectorDaemon, host: str = '127.0.0.1',
+                  port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """
+    Create HTTP server of the collector daemon
+    :param collector: collector daemon
+    :param host: interface to listen on
+    :param port: port to listen on, 0 to pick a free one
+    :return: server, not started yet
+    """
+    return _DaemonServer((host, port), collector)
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses command line arguments.
+    :return: Namespace containing parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description='Serve payments collections using browsers kept warm between them',
+                                     prog='python -m payments.serve')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Interface to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', default=DEFAULT_PORT, type=int,
+                        help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--jobs', default=1, type=int,
+                        help='Number of warm browsers, i.e. maximum number of providers processed concurrently')
+    parser.add_argument('-l', '--headless', default=True, type=str_to_bool,
+                        help='Toggle headless browser mode (default: on)')
+    parser.add_argument('--chrome-path',
+                        help='Use provided Chrome binary instead of automatically downloading')
+    parser.add_argument('--persistent-profile-dir', default='',
+                        help='Persisten browser profile directory location (default: user temp directory)')
+    parser.add_argument('--session-cache', nargs='?', default=None, const='',
+                        help='Reuse authenticated sessions stored (encrypted) in the given directory '
+                             '(default: PAYMENTS_SESSION_CACHE_DIR or ~/.cache/payments/sessions)')
+    parser.add_argument('--max-age', default=None, type=parse_age,
+                        help='Reuse payments collected before if not older than the given age '
+                             '(seconds or with s/m/h/d suffix, e.g. 12h)')
+    parser.add_argument('--result-cache', default='',
+                        help='Result cache file used with --max-age '
+                             '(default: PAYMENTS_RESULT_CACHE or ~/.cache/payments/results.json)')
+    parser.add_argument('-t', '--trace', default=False, action='store_true',
+                        help='Enable trace logging for browser actions')
+    parser.add_argument('-v', '--verbose', default=False, action='store_true',
+                        help='Enable verbose mode (show debug logs)')
+    return parser.parse_args()
+
+
+def main() -> int:
+    """
+    Main program function.
+    :return: status code
+    """
+    args = parse_args()
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+    options = browser_options_factory(args.headless, args.trace, args.chrome_path, True, args.persistent_profile_dir)
+    session_cache = None
+    if args.session_cache is not None:
+        try:
+            session_cache = SessionCache(args.session_cache or None)
+        except Exception as e:
+            print(f'WARNING: Session cache disabled: {e}')
+    result_cache = None if args.max_age is None else ResultCache(args.max_age, args.result_cache or None)
+    with WorkerPool(options, size=args.jobs) as pool:
+        print(f'Starting {len(pool)} browser(s)...')
+        pool.warm_up()
+        server = create_server(CollectorDaemon(pool, session_cache, result_cache), args.host, args.port)
+        print(f'Serving collections on http://{args.host}:{server.server_address[1]}/collect')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print('Shutting down...')
+        finally:
+            server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
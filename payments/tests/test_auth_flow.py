@@ -0,0 +1,54 @@
+"""
+    Login strategies unittests
+"""
+import time
+from unittest.mock import MagicMock, patch
+
+from selenium.webdriver.common.by import By
+
+from browser import Locator
+from mocks import MockBrowser, MockWebElement
+from payments.providers.auth_flow import OneStageLogin
+from payments.providers.auth_flow.waits import wait_for_value
+from payments.providers.secrets.core import Secrets
+
+
+def _login() -> OneStageLogin:
+    return OneStageLogin('dummy', Locator(By.ID, 'user'), Locator(By.ID, 'pass'), Secrets('dummy', 'user', 'pass'))
+
+
+def test_input_waits_for_conditions_instead_of_sleeping() -> None:
+    """Test whether typing into a ready input does not sleep."""
+    browser = MockBrowser()
+    control = MockWebElement()
+    typed: list[str] = []
+    with (patch.object(browser, 'execute_script', create=True,
+                       side_effect=lambda script, *_: True if 'isConnected' in script else ''.join(typed)),
+          patch.object(control, 'send_keys', side_effect=typed.extend),
+          patch('payments.providers.auth_flow.base.time.sleep') as sleep):
+        start = time.perf_counter()
+        _login().input(browser, control, 'secret')
+    assert ''.join(typed) == 'secret'
+    assert time.perf_counter() - start < 0.5
+    sleep.assert_not_called()
+
+
+def test_input_min_delay() -> None:
+    """Test whether the opt-in minimum input delay is applied."""
+    browser = MockBrowser()
+    login = _login()
+    login.min_input_delay = 0.3
+    with (patch.object(browser, 'execute_script', create=True, side_effect=lambda script, *_: True),
+          patch('payments.providers.auth_flow.base.wait_for_value'),
+          patch('payments.providers.auth_flow.base.time.sleep') as sleep):
+        login.input(browser, MagicMock(**{'get_attribute.return_value': ''}), 'secret')
+    sleep.assert_called_once_with(0.3)
+
+
+def test_wait_for_value_times_out() -> None:
+    """Test whether a condition wait gives up after its timeout."""
+    browser = MockBrowser()
+    with patch.object(browser, 'execute_script', create=True, return_value='other'):
+        start = time.perf_counter()
+        assert not wait_for_value(browser, MockWebElement(), 'secret', 0.2)
+    assert 0.2 <= time.perf_counter() - start < 1
@@ -0,0 +1,19 @@
+"""
+    Benchmark helpers unittests
+"""
+import pytest
+
+from payments.bench import percentile, summarize
+
+
+def test_percentile_interpolates() -> None:
+    assert percentile([4.0, 1.0, 3.0, 2.0], 50) == 2.5
+    assert percentile([1.0, 2.0, 3.0], 95) == pytest.approx(2.9)
+    assert percentile([5.0], 95) == 5.0
+    with pytest.raises(ValueError):
+        percentile([], 50)
+
+
+def test_summarize() -> None:
+    assert summarize([1.0, 2.0, 3.0]) == {'p50': 2.0, 'p95': 2.9, 'min': 1.0, 'max': 3.0,
+                                          'samples': [1.0, 2.0, 3.0]}
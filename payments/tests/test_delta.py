@@ -0,0 +1,43 @@
+"""
+    Change detection between runs unittests
+"""
+from payments import Payment, PaymentsList
+from payments.payments.delta import CHANGED, DISAPPEARED, FAILED, NEW, PAID, compare
+
+
+def test_compare_classifies_changes() -> None:
+    previous = PaymentsList([
+        Payment('pgnig', 'Sezamowa', '2025-06-10', '120,00'),   # paid
+        Payment('energa', 'Bryla', '2025-06-12', '50,00'),      # changed
+        Payment('energa', 'Hodowlana', '2025-06-12', '10,00'),  # replaced with a new bill
+        Payment('energa', 'Sezamowa', None, '0,00'),            # settled, still settled
+        Payment('opec', 'Sezamowa', '2025-06-01', '80,00'),     # failed now
+        Payment('vectra', 'Sezamowa', '2025-06-01', '60,00'),   # not collected now
+    ])
+    current = PaymentsList([
+        Payment('pgnig', 'Sezamowa', None, '0,00'),
+        Payment('energa', 'Bryla', '2025-06-12', '55,00'),
+        Payment('energa', 'Hodowlana', '2025-07-12', '20,00'),
+        Payment('energa', 'Sezamowa', None, '0,00'),
+        Payment('opec', 'Sezamowa', None, None),
+    ])
+    changes = {(change.kind, change.provider, change.location): change for change in compare(previous, current)}
+    assert set(changes) == {
+        (CHANGED, 'energa', 'Bryla'),
+        (NEW, 'energa', 'Hodowlana'),
+        (FAILED, 'opec', 'Sezamowa'),
+        (PAID, 'pgnig', 'Sezamowa'),
+        (DISAPPEARED, 'energa', 'Hodowlana'),
+    }
+    assert changes[(CHANGED, 'energa', 'Bryla')].json() == {
+        'kind': 'changed', 'provider': 'energa', 'location': 'Bryla', 'due_date': '12-06-2025',
+        'amount': '55,00', 'previous_amount': '50,00'}
+    paid = changes[(PAID, 'pgnig', 'Sezamowa')]
+    assert (paid.due_date, paid.amount, paid.previous_amount) == ('10-06-2025', '0,00', '120,00')
+    assert changes[(DISAPPEARED, 'energa', 'Hodowlana')].amount is None
+
+
+def test_compare_same_run_has_no_changes() -> None:
+    payments = PaymentsList([Payment('pgnig', 'Sezamowa', '2025-06-10', '120,00'),
+                             Payment('energa', 'Bryla', None, '0,00')])
+    assert compare(payments, PaymentsList.from_json(payments.json())) == []
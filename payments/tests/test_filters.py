@@ -0,0 +1,56 @@
+"""
+    Filter expressions unittests
+"""
+import pytest
+
+from payments.payments.exceptions import FilterError
+from payments.payments.filters import Filter
+from payments.payments.payment import Payment
+from payments.payments.paymentslist import PaymentsList
+
+PAYMENTS = PaymentsList([
+    Payment('pgnig', 'Sezamowa', '10-06-2025', '120,00'),
+    Payment('energa', 'Bryla', '12-05-2025', '50,00'),
+    Payment('energa', 'Hodowlana', '12-06-2025', '0,00'),
+    Payment('opec', 'Nowa Wies', None, None),
+    Payment('vectra', 'Sezamowa', '01-11-2026', '12,50'),
+])
+
+
+@pytest.mark.parametrize('expression, providers', [
+    ('amount>0 and due_date<=2026-11-01 and provider in (energa,pgnig)', ['pgnig', 'energa']),
+    ('amount=12,50', ['vectra']),
+    ('amount in (12.5, 50)', ['energa', 'vectra']),
+    ('amount in 12,50..120', ['pgnig', 'energa', 'vectra']),
+    ('due_date in 01.06.2025..30.06.2025', ['pgnig', 'energa']),
+    ('provider not in (energa) and not amount == <unknown>', ['pgnig', 'vectra']),
+    ('amount == <unknown> or location == "Bryla"', ['energa', 'opec']),
+    ('due_date == <unknown>', ['opec']),
+    ('due_date != <unknown> and due_date < 2026-01-01', ['pgnig', 'energa', 'energa']),
+    ('due_date < <unknown>', []),
+    ("location = 'Nowa Wies'", ['opec']),
+    ('not (amount > 0 or provider = opec)', ['energa']),
+    ('provider = energa or provider = vectra and amount > 20', ['energa', 'energa']),
+    ('(provider = energa or provider = vectra) AND amount > 20', ['energa']),
+])
+def test_where_expression(expression: str, providers: list[str]) -> None:
+    assert [payment.provider for payment in PAYMENTS.where(expression).payments] == providers
+    assert [payment.provider for payment in PAYMENTS.where(Filter.parse(expression)).payments] == providers
+
+
+@pytest.mark.parametrize('expression, message', [
+    ('', 'Expected one of provider, location, due_date, amount, found end of filter'),
+    ('comment = x', 'found "comment" at position 1'),
+    ('amount >', 'Expected value, found end of filter'),
+    ('amount > x', 'Invalid amount "x"'),
+    ('due_date < someday', 'Invalid due_date "someday"'),
+    ('amount in (1, 2', 'Expected "," or ")"'),
+    ('amount in 1 2', 'Expected ".." of a range'),
+    ('(amount > 1', 'Expected ")"'),
+    ('amount > 1 provider = pgnig', 'Expected "and", "or" or end of filter'),
+    ('provider not = pgnig', 'Expected "in"'),
+    ("location = 'Nowa", 'Unexpected "\'Nowa"'),
+])
+def test_invalid_expression(expression: str, message: str) -> None:
+    with pytest.raises(FilterError, match=message.replace('(', r'\(').replace(')', r'\)')):
+        Filter.parse(expression)
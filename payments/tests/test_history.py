@@ -0,0 +1,62 @@
+"""
+    Run history store unittests
+"""
+import datetime
+import time
+from pathlib import Path
+
+from payments import Payment, PaymentsList
+from payments.payments.history import HistoryStore
+
+
+def _run(day: int, amount: str | None, due_date: str | None, seconds: float) -> PaymentsList:
+    return PaymentsList([Payment('pgnig', 'Sezamowa', due_date, amount),
+                         Payment('energa', 'Bryla', f'2025-0{day}-20', '10,50')],
+                        {'pgnig': seconds, 'energa': 1.0},
+                        {'pgnig': {'timings': {'login': f'{seconds / 2:.2f}'}}})
+
+
+def test_record_and_query(tmp_path: Path) -> None:
+    with HistoryStore(tmp_path / 'history.db') as store:
+        store.record(_run(1, '100,01', '2025-01-15', 30.0), datetime.datetime(2025, 1, 1))
+        store.record(_run(2, '-5,30', '2025-02-15', 50.0), datetime.datetime(2025, 2, 1))
+        store.record(_run(3, None, None, 10.0), datetime.datetime(2025, 3, 1), 'run3')
+
+        latest = {payment.provider: payment for payment in store.latest()}
+        assert latest['pgnig'].run_ts == '2025-03-01T00:00:00'
+        assert latest['pgnig'].amount is None and latest['pgnig'].status == 'failure'
+        assert latest['energa'].amount == 1050 and latest['energa'].due_date == '2025-03-20'
+        assert [payment.provider for payment in store.latest('energa')] == ['energa']
+
+        trend = store.trend('pgnig')
+        assert [(payment.due_date, payment.amount_text) for payment in trend] == [('2025-01-15', '100,01'),
+                                                                                   ('2025-02-15', '-5,30')]
+        assert [payment.due_date for payment in store.trend('pgnig', limit=1)] == ['2025-02-15']
+
+        slowest = store.slowest(runs=2)
+        assert [(speed.provider, speed.runs, speed.average) for speed in slowest] == [('pgnig', 2, 30.0),
+                                                                                     ('energa', 2, 1.0)]
+        assert store.slowest(runs=3, stage='login')[0].maximum == 25.0
+
+
+def test_trend_counts_settled_snapshots_once(tmp_path: Path) -> None:
+    with HistoryStore(tmp_path / 'history.db') as store:
+        store.record(_run(1, '100,01', '2025-01-15', 30.0), datetime.datetime(2025, 1, 1))
+        # Settled account, due "today" on every run
+        for day in range(2, 5):
+            store.record(_run(1, '0,00', f'2025-01-{day:02}', 30.0), datetime.datetime(2025, 1, day))
+        trend = store.trend('pgnig')
+        assert [(payment.due_date, payment.amount_text) for payment in trend] == [('2025-01-04', '0,00'),
+                                                                                   ('2025-01-15', '100,01')]
+
+
+def test_queries_stay_fast(tmp_path: Path) -> None:
+    with HistoryStore(tmp_path / 'history.db') as store:
+        start = datetime.datetime(2020, 1, 1)
+        for day in range(3 * 365):
+            store.record(_run(day % 9 + 1, '100', f'2025-0{day % 9 + 1}-15', 30.0), start + datetime.timedelta(day))
+        began = time.perf_counter()
+        store.latest()
+        store.trend('pgnig')
+        store.slowest(runs=30)
+        assert time.perf_counter() - began < 0.5
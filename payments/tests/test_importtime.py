@@ -0,0 +1,40 @@
+"""
+    Import time benchmark and lazy imports unittests
+"""
+import subprocess
+import sys
+
+from payments.importtime import HEAVY_PACKAGES, ImportTime, by_package, measure, parse_importtime
+
+OUTPUT = '''import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2000 |       2500 |     numpy.core
+import time:      3000 |       5500 |   numpy
+import time:       400 |       6020 | payments.main
+'''
+
+
+def test_parse_importtime() -> None:
+    entries = parse_importtime(OUTPUT)
+    assert entries[0] == ImportTime('_io', 120, 120)
+    assert entries[-1] == ImportTime('payments.main', 400, 6020)
+    assert by_package(entries) == {'numpy': 5000, 'payments': 400, '_io': 120}
+
+
+def test_main_imports_no_heavy_packages() -> None:
+    imported = {entry.module.split('.', 1)[0] for entry in measure('payments.main')}
+    assert 'payments' in imported
+    assert not imported & set(HEAVY_PACKAGES)
+
+
+def test_create_providers_imports_selected_providers_only() -> None:
+    code = ('import sys\n'
+            'from payments.main import create_providers\n'
+            'print([provider.name for provider in create_providers("pgnig")])\n'
+            'print(sorted(name for name in sys.modules if name.startswith("payments.providers.")))\n')
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    selected, modules = output.splitlines()
+    assert selected == "['pgnig']"
+    assert 'payments.providers.pgnig' in modules
+    assert 'payments.providers.multimedia' not in modules
+    assert 'payments.providers.auth_flow.recaptcha' not in modules
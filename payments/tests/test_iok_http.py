@@ -0,0 +1,111 @@
+"""
+    IOK HTTP transport unittests, run against the mock server
+"""
+import threading
+from collections.abc import Iterator
+from http.client import IncompleteRead
+from unittest.mock import patch
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+from werkzeug.serving import make_server
+
+from payments.providers.iok_http import IOKHttpClient, IOKHttpError, IOKPageParser
+from payments.providers.provider import ProviderConfig, TRANSPORT_HTTP
+
+
+@pytest.fixture(scope='module')
+def mock_url(tmp_path_factory: pytest.TempPathFactory) -> Iterator[str]:
+    with MonkeyPatch.context() as monkeypatch:
+        # The mock server (re)writes its request log in the working directory, even when imported
+        monkeypatch.chdir(tmp_path_factory.mktemp('mockserver'))
+        from mockserver.app import create_app
+        server = make_server('127.0.0.1', 0, create_app())
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield f'http://127.0.0.1:{server.server_port}'
+        server.shutdown()
+        thread.join()
+
+
+@pytest.fixture
+def mock_providers(mock_url: str, monkeypatch: MonkeyPatch) -> str:
+    monkeypatch.setattr(ProviderConfig, '_initialized', True)
+    monkeypatch.setattr(ProviderConfig, '_mock_url', mock_url)
+    monkeypatch.setenv('ACTUM_USERNAME', 'user')
+    monkeypatch.setenv('ACTUM_PASSWORD', 'password')
+    monkeypatch.setenv('NORDHOME_USERNAME', 'user')
+    monkeypatch.setenv('NORDHOME_PASSWORD', 'password')
+    return mock_url
+
+
+def test_login_and_parse_amount(mock_url: str) -> None:
+    page = IOKHttpClient().login(f'{mock_url}/actum/InetObsKontr/LoginPage', 'user', 'password')
+    assert not page.no_overdue
+    assert page.amount is not None and '157,70' in page.amount
+    assert page.due_date == '20.03.2026'
+
+
+def test_login_and_parse_no_overdue(mock_url: str) -> None:
+    page = IOKHttpClient().login(f'{mock_url}/nordhome/content/InetObsKontr/login', 'user', 'password')
+    assert page.no_overdue
+
+
+def test_login_failure(mock_url: str) -> None:
+    with pytest.raises(IOKHttpError):
+        IOKHttpClient().login(f'{mock_url}/actum/InetObsKontr/LoginPage?scenario=error', 'user', 'password')
+
+
+def test_provider_http_transport(mock_providers: str, monkeypatch: MonkeyPatch) -> None:
+    from payments.providers import Actum, Nordhome
+    monkeypatch.setenv('PAYMENTS_ACTUM_TRANSPORT', 'http')
+    monkeypatch.setenv('PAYMENTS_NORDHOME_TRANSPORT', 'http')
+    payments = Actum('Hodowlana').fetch_without_browser()
+    assert payments is not None
+    assert payments[0].amount == 1157.70
+    assert str(payments[0].due_date) == '20-03-2026'
+    payments = Nordhome('Bryla').fetch_without_browser()
+    assert payments is not None
+    assert payments[0].amount == 0.0
+
+
+def test_provider_falls_back_to_browser(mock_providers: str, monkeypatch: MonkeyPatch) -> None:
+    from payments.providers import Actum
+    assert Actum('Hodowlana').fetch_without_browser() is None
+    monkeypatch.setenv('PAYMENTS_ACTUM_TRANSPORT', 'http')
+    provider = Actum('Hodowlana')
+    provider.url = f'{mock_providers}/actum/InetObsKontr/home'
+    assert provider.fetch_without_browser() is None
+
+
+def test_provider_transport_attribute(mock_providers: str, monkeypatch: MonkeyPatch) -> None:
+    from payments.providers import Actum
+
+    class HttpActum(Actum):
+        transport = TRANSPORT_HTTP
+
+    monkeypatch.delenv('PAYMENTS_HTTPACTUM_TRANSPORT', raising=False)
+    monkeypatch.setenv('HTTPACTUM_USERNAME', 'user')
+    monkeypatch.setenv('HTTPACTUM_PASSWORD', 'password')
+    provider = HttpActum('Hodowlana')
+    provider.url = f'{mock_providers}/actum/InetObsKontr/LoginPage'
+    assert provider.fetch_without_browser() is not None
+    monkeypatch.setenv('PAYMENTS_HTTPACTUM_TRANSPORT', 'browser')
+    assert HttpActum('Hodowlana').fetch_without_browser() is None
+
+
+def test_provider_falls_back_on_unexpected_error(mock_providers: str, monkeypatch: MonkeyPatch) -> None:
+    from payments.providers import Actum
+    monkeypatch.setenv('PAYMENTS_ACTUM_TRANSPORT', 'http')
+    with patch.object(IOKHttpClient, 'login', side_effect=IncompleteRead(b'')):
+        assert Actum('Hodowlana').fetch_without_browser() is None
+
+
+def test_provider_falls_back_on_malformed_page(mock_providers: str, monkeypatch: MonkeyPatch) -> None:
+    from payments.providers import Actum
+    monkeypatch.setenv('PAYMENTS_ACTUM_TRANSPORT', 'http')
+    page = IOKPageParser()
+    page.feed('<span class="home-amount">157,70 zł</span><span class="home-info"><span>wkrótce</span></span>')
+    assert page.amount and page.due_date == 'wkrótce'
+    with patch.object(IOKHttpClient, 'login', return_value=page):
+        assert Actum('Hodowlana').fetch_without_browser() is None
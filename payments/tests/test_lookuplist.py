@@ -127,3 +127,13 @@ def test_range() -> None:
     assert tcs[2] in sublist
     assert tcs[3] in sublist
     assert tcs[4] not in sublist
+
+
+def test_lookup_by_name_function() -> None:
+    """Test that LookupList can look items up by a name other than their class name."""
+    lst = LookupList[str]('alpha', 'beta', 'gamma', name=str)
+    assert lst['beta'] == 'beta'
+    assert lst['alpha-beta'] == ['alpha', 'beta']
+    assert 'gamma' in lst
+    with pytest.raises(KeyError):
+        _ = lst['delta']
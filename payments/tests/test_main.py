@@ -22,16 +22,31 @@ def setup_args(monkeypatch: MonkeyPatch, output: str = '') -> None:
     monkeypatch.setattr('sys.argv', ['prog'])
     monkeypatch.setattr(main, 'parse_args', lambda: argparse.Namespace(
         clear_profile_on_exit=False,
+        budget=[],
         chrome_path=None,
+        chrome_trace=None,
+        deadline=None,
         headless=True,
+        history_db=None,
+        jobs=1,
+        max_age=None,
         output=output,
         persistent_profile_dir='',
         provider='',
+        result_cache='',
+        resume=None,
+        retries=0,
+        retry_backoff=0,
+        run_id=None,
+        schedule_from=[],
+        session_cache=None,
+        timings_history='',
         trace=False,
         verbose=False,
         sort=None,
         filter=None,
         json=None,
+        ndjson=None,
         print_json=False
     ))
     monkeypatch.setattr(main, 'is_debugger_active', lambda: False)
@@ -48,11 +63,11 @@ def test_parse_args_defaults(monkeypatch: MonkeyPatch) -> None:
 def test_main_prints_output(monkeypatch: MonkeyPatch, capsys: CaptureFixture[str]) -> None:
     setup_args(monkeypatch)
     with (patch('payments.main.PaymentsManager') as mock_mgr_cls,
-          patch('payments.main.LookupList') as mock_lookup):
+          patch('payments.main.create_providers') as mock_create):
         dummy_mgr = MagicMock()
         dummy_mgr.collect.return_value = 'TEST_OUTPUT'
         mock_mgr_cls.return_value = dummy_mgr
-        mock_lookup.return_value.__getitem__.return_value = ['provider']
+        mock_create.return_value = ['provider']
 
         main.main()
         out = capsys.readouterr().out
@@ -66,11 +81,11 @@ def test_main_writes_to_file(monkeypatch: MonkeyPatch) -> None:
     setup_args(monkeypatch, dummy_path)
 
     with (patch('payments.main.PaymentsManager') as mock_mgr_cls,
-          patch('payments.main.LookupList') as mock_lookup):
+          patch('payments.main.create_providers') as mock_create):
         mgr = MagicMock()
         mgr.collect.return_value = 'WYNIK'
         mock_mgr_cls.return_value = mgr
-        mock_lookup.return_value.__getitem__.return_value = ['provider']
+        mock_create.return_value = ['provider']
 
         main.main()
 
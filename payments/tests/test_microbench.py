@@ -0,0 +1,25 @@
+"""
+    Micro-benchmarks unittests
+"""
+from pathlib import Path
+
+from payments.microbench import bench_payments, mockserver_dates, time_per_call
+from payments.payments.payment import DueDate
+
+
+def test_mockserver_dates(tmp_path: Path) -> None:
+    (tmp_path / 'pgnig').mkdir()
+    (tmp_path / 'pgnig' / 'invoices.html').write_text('<td>10.03.2026</td><td>2026-03-15</td><td>1.5-1</td>')
+    (tmp_path / 'energa.html').write_text('<p>Termin: 16-01-2026</p>')
+    assert mockserver_dates(tmp_path) == ['16-01-2026', '10.03.2026', '2026-03-15']
+    assert mockserver_dates()
+
+
+def test_time_per_call() -> None:
+    assert time_per_call(DueDate, ['10.03.2026', '2026-03-15'], 2) > 0
+
+
+def test_bench_payments() -> None:
+    results = bench_payments(200, 1)
+    assert results['build columns'][0] is None
+    assert all(columnar > 0 for _, columnar in results.values())
@@ -63,3 +63,43 @@ def test_amount_to_float() -> None:
     """Test conversion of Amount to float."""
     amount = Amount('1234,56')
     assert float(amount) == 1234.56
+
+
+def test_amount_stored_as_grosze() -> None:
+    """Test that amounts are stored as grosze and rendered on demand."""
+    amount = Amount('-0,5 zł')
+    assert amount.grosze == -50
+    assert (amount.whole, amount.decimal, amount.value) == ('-0', '50', '-0,50')
+    assert Amount('12,5') == Amount(12.50)
+    amount += Amount('1 000,55')
+    assert amount.grosze == 100005
+    assert Amount(Amount.unknown).grosze is None
+    assert not hasattr(amount, '__dict__')
+
+
+def test_amount_init_with_invalid_string() -> None:
+    """Test that amounts which are not numbers are rejected."""
+    with pytest.raises(ValueError, match='Invalid amount'):
+        Amount('2025-01-10')
+
+
+def test_amount_arithmetic_is_exact() -> None:
+    """Test that adding and subtracting amounts is exact and never changes its operands."""
+    first = Amount('0,10')
+    total = sum([first] * 1000, Amount.from_grosze(0))
+    assert total == Amount('100,00')
+    assert sum([Amount('0,1'), Amount('0,2')]) == Amount('0,30')
+    assert first.grosze == 10
+    assert Amount('10,00') - Amount('12,50') == Amount('-2,50')
+    assert -Amount('1,005') == Amount('-1,01')
+    assert {Amount('12,5'), Amount('12,50')} == {Amount(12.5)}
+    assert hash(Amount('12,50')) == hash(12.5)
+
+
+def test_amount_arithmetic_errors() -> None:
+    """Test that unknown amounts and amounts in different currencies cannot be combined."""
+    with pytest.raises(ValueError, match='unknown amount'):
+        _ = Amount('1,00') + Amount(Amount.unknown)
+    with pytest.raises(ValueError, match='Cannot mix PLN and EUR'):
+        _ = Amount('1,00') + Amount('1,00', 'EUR')
+    assert Amount('1,00') != Amount('1,00', 'EUR')
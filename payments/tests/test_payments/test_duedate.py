@@ -6,7 +6,7 @@ from unittest.mock import Mock
 
 from selenium.webdriver.remote.webelement import WebElement
 
-from payments.payments.payment import DueDate
+from payments.payments.payment import DueDate, _parse_due_date
 
 DATE_STRING = '05-10-2023'
 
@@ -67,3 +67,29 @@ def test_duedate_with_webelement_value() -> None:
     web_element_mock.text = DATE_STRING
     due_date = DueDate(web_element_mock)
     assert due_date.value == date(2023, 10, 5)
+
+
+def test_duedate_unknown() -> None:
+    """Test that unknown date sorts last and compares with dates."""
+    unknown = DueDate.create_from(None)
+    assert unknown.value == DueDate.unknown
+    assert repr(unknown) == '<unknown>'
+    assert DueDate(DATE_STRING) < unknown
+    assert DueDate(DATE_STRING) == date(2023, 10, 5)
+    assert not hasattr(unknown, '__dict__')
+
+
+def test_duedate_parse_formats() -> None:
+    """Test that portal formats are parsed directly and other ones with dateutil."""
+    today = date(2026, 3, 1)
+    for value in ('10.03.2026', '10-03-2026', '2026-03-10', ' 10.3.2026 ', 'March 10, 2026'):
+        assert DueDate.parse(value, today) == date(2026, 3, 10)
+    assert DueDate.parse('12-31-2025', today) == date(2025, 12, 31)
+    assert DueDate.parse('jutro', today) == date(2026, 3, 2)
+    assert DueDate.parse('', today) == today
+
+
+def test_duedate_cache_depends_on_today() -> None:
+    """Test that cached special values follow the current date."""
+    assert _parse_due_date('wczoraj', date(2026, 3, 1)) == date(2026, 2, 28).toordinal()
+    assert _parse_due_date('wczoraj', date(2026, 3, 2)) == date(2026, 3, 1).toordinal()
@@ -33,3 +33,8 @@ def test_payment_to_padded_string() -> None:
     assert payment.to_padded_string() == 'ProviderA456,78 LocationA 14-10-2023'
 
 
+def test_payment_is_slotted() -> None:
+    """Test that payments keep no per-instance dict."""
+    payment = Payment(provider='ProviderA', location='LocationA', due_date='14-10-2023', amount='456,78')
+    assert not hasattr(payment, '__dict__')
+    assert payment.to_json()['amount'] == '456,78'
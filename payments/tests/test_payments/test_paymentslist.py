@@ -0,0 +1,57 @@
+"""
+    PaymentsList class unittests
+"""
+import operator
+
+import pytest
+
+from payments.payments.exceptions import FilterError
+from payments.payments.payment import Amount, Payment
+from payments.payments.paymentslist import PaymentsList
+
+
+def _payments() -> PaymentsList:
+    return PaymentsList([
+        Payment('pgnig', 'Sezamowa', '10-06-2025', '120,00'),
+        Payment('energa', 'Bryla', '12-05-2025', '50,00'),
+        Payment('energa', 'Hodowlana', '12-06-2025', '100,00'),
+        Payment('opec', 'Sezamowa', None, None),
+        Payment('vectra', 'Sezamowa', '01-06-2025', '50,00'),
+    ])
+
+
+@pytest.mark.parametrize('key', Payment.SORT_KEYS)
+@pytest.mark.parametrize('reverse', [False, True])
+def test_sort_matches_sorted(key: str, reverse: bool) -> None:
+    payments = _payments()
+    known = payments.where('amount != <unknown>')
+    assert known.sort(key, reverse).payments == sorted(known.payments, key=operator.attrgetter(key), reverse=reverse)
+    if key in ('due_date', 'amount'):
+        # Unknown values sort last
+        assert payments.sort(key).payments[-1].provider == 'opec'
+
+
+def test_where() -> None:
+    payments = _payments()
+    assert [p.provider for p in payments.where('amount>=100').payments] == ['pgnig', 'energa']
+    assert [p.provider for p in payments.where('amount==50').payments] == ['energa', 'vectra']
+    assert [p.provider for p in payments.where('amount!=50').payments] == ['pgnig', 'energa', 'opec']
+    assert [p.location for p in payments.where('provider<pgnig').payments] == ['Bryla', 'Hodowlana', 'Sezamowa']
+    assert [p.provider for p in payments.where('due_date<2025-06-10').payments] == ['energa', 'vectra']
+    assert [p.provider for p in payments.where('location==Sezamowa').where('amount<=100').payments] == ['vectra']
+    with pytest.raises(FilterError):
+        payments.where('comment==x')
+
+
+def test_group_by_and_sum() -> None:
+    payments = _payments()
+    assert payments.sum() == Amount('320,00')
+    assert {name: group.sum() for name, group in payments.group_by('provider').items()} == {
+        'energa': Amount('150,00'), 'opec': Amount('0'), 'pgnig': Amount('120,00'), 'vectra': Amount('50,00')}
+    assert list(payments.group_by('location')) == ['Bryla', 'Hodowlana', 'Sezamowa']
+    months = payments.group_by('month')
+    assert list(months) == ['<unknown>', '2025-05', '2025-06']
+    assert [p.provider for p in months['2025-06'].payments] == ['pgnig', 'energa', 'vectra']
+    assert months['2025-06'].group_by('provider')['energa'].sum() == Amount('100,00')
+    with pytest.raises(KeyError):
+        payments.group_by('comment')
@@ -1,7 +1,10 @@
 """
     PaymentsManager class unittests
 """
-from browser import BrowserOptions
+import threading
+from unittest.mock import patch
+
+from browser import Browser, BrowserOptions
 from mocks import DummyProvider, MockBrowser
 from payments import Payment, PaymentsList, PaymentsManager
 
@@ -36,3 +39,130 @@ def test_payments_to_str_padding() -> None:
     assert len(lines) == 2
     assert lines[0].startswith('p ')  # padded
     assert lines[1].startswith('prov')
+
+
+def test_collect_parallel_keeps_provider_order() -> None:
+    providers = [DummyProvider(f'p{i}', ('L1',), [Payment(f'p{i}', 'L1', '2025-06-01', str(i))])
+                 for i in range(5)]
+
+    mgr = PaymentsManager(providers)
+    result = mgr.collect(lambda _=0: BrowserOptions(__file__, False, False, ''), MockBrowser, jobs=3)
+    assert [payment.provider for payment in result.payments] == [f'p{i}' for i in range(5)]
+    assert result.provider_timings is not None
+    assert list(result.provider_timings) == [f'p{i}' for i in range(5)]
+    # Stages are recorded in the timeline of the provider even when run by a worker thread
+    assert all(set(item['timings']) == {'login', 'fetch', 'logout'} for item in result.json().values())
+    assert sorted(timeline.name for timeline in mgr.timelines) == [f'p{i}' for i in range(5)]
+
+
+class SlowProvider(DummyProvider):
+    """Provider whose first fetches outlive any budget, unless cancelled"""
+    def __init__(self, name: str, slow_calls: int = 1) -> None:
+        super().__init__(name, ('L1',), [Payment(name, 'L1', '2025-06-01', '10')])
+        self.slow_calls = slow_calls
+        self.calls = 0
+        self.stored = False
+
+    def login(self, browser: Browser, load: bool = True) -> None:
+        self.logged_in = True
+
+    def _fetch_payments(self, browser: Browser) -> list[Payment]:
+        self.calls += 1
+        if self.calls <= self.slow_calls:
+            assert self.cancelled.wait(5)
+            return []
+        return super()._fetch_payments(browser)
+
+    def _store_session(self, browser: Browser) -> bool:
+        self.stored = True
+        return False
+
+
+def test_collect_budget_exceeded() -> None:
+    slow = SlowProvider('slow')
+    fast = DummyProvider('fast', ('L1',), [Payment('fast', 'L1', '2025-06-01', '10')])
+    mgr = PaymentsManager([slow, fast], budgets={'slow': 0.5})
+    result = mgr.collect(lambda: BrowserOptions(__file__, False, False, ''), MockBrowser)
+    assert [(p.provider, p.comment) for p in result.payments] == [('slow', 'Timed out after 0.5s'), ('fast', '')]
+    assert result.json()['slow']['budget'] == '0.50'
+    assert result.json()['slow']['timed_out'] is True
+    assert 'budget' not in result.json()['fast']
+    # The cancelled thread finishes without touching the session of the torn down browser
+    assert mgr._wait_cancelled(slow)
+    assert not slow.stored
+
+
+def test_retry_waits_for_cancelled_provider() -> None:
+    slow = SlowProvider('slow')
+    mgr = PaymentsManager(slow, budgets={'slow': 0.5}, retries=1)
+    result = mgr.collect(lambda: BrowserOptions(__file__, False, False, ''), MockBrowser)
+    assert slow.calls == 2
+    assert [payment.status for payment in result.payments] == ['success']
+    assert len(result.json()['slow']['attempts']) == 2
+
+
+def test_retry_skips_provider_still_running() -> None:
+    slow = SlowProvider('slow')
+    mgr = PaymentsManager(slow, budgets={'slow': 0.5}, retries=1)
+    with patch.object(slow, 'cancel'), patch('payments.payments.paymentsmanager.CANCEL_GRACE_PERIOD', 0.1):
+        result = mgr.collect(lambda: BrowserOptions(__file__, False, False, ''), MockBrowser)
+    # Not cancelled, so the first call is still running and the provider is not retried
+    assert slow.calls == 1
+    assert result.payments[0].comment == 'Timed out after 0.5s'
+    slow.cancel()
+    assert mgr._wait_cancelled(slow)
+
+
+def test_collect_deadline_exceeded() -> None:
+    providers = [DummyProvider('p1', ('L1',)), DummyProvider('p2', ('L1',))]
+    mgr = PaymentsManager(providers, deadline=0)
+    result = mgr.collect(lambda: BrowserOptions(__file__, False, False, ''), MockBrowser)
+    assert all(p.comment == 'Run deadline exceeded' for p in result.payments)
+
+
+def test_retry_failed_providers() -> None:
+    class FlakyProvider(DummyProvider):
+        def __init__(self, name: str, failures: int) -> None:
+            super().__init__(name, ('L1',), [Payment(name, 'L1', '2025-06-01', '10')])
+            self.failures = failures
+            self.calls = 0
+
+        def login(self, browser: Browser, load: bool = True) -> None:
+            self.logged_in = True
+
+        def _fetch_payments(self, browser: Browser) -> list[Payment]:
+            self.calls += 1
+            if self.calls <= self.failures:
+                raise RuntimeError('Portal hiccup')
+            return super()._fetch_payments(browser)
+
+    providers = [FlakyProvider('stable', 0), FlakyProvider('flaky', 1), FlakyProvider('broken', 5)]
+    result = PaymentsManager(providers, retries=2).collect(lambda: BrowserOptions(__file__, False, False, ''),
+                                                          MockBrowser)
+    assert [provider.calls for provider in providers] == [1, 2, 3]
+    assert [payment.status for payment in result.payments] == ['success', 'success', 'failure']
+    output = result.json()
+    assert 'attempts' not in output['stable']
+    assert len(output['flaky']['attempts']) == 2
+    assert len(output['broken']['attempts']) == 3
+
+
+def test_http_transport_within_budget() -> None:
+    class HttpProvider(DummyProvider):
+        transport = 'http'
+
+        def __init__(self) -> None:
+            super().__init__('http', ('L1',))
+            self.portal = threading.Event()
+
+        def fetch_without_browser(self) -> list[Payment] | None:
+            assert self.portal.wait(5)
+            return [Payment(self.name, 'L1', '2025-06-01', '10')]
+
+    provider = HttpProvider()
+    mgr = PaymentsManager(provider, budgets={'http': 0.3})
+    result = mgr.collect(lambda: BrowserOptions(__file__, False, False, ''), MockBrowser)
+    provider.portal.set()
+    assert result.payments[0].comment == 'Timed out after 0.3s'
+    assert result.json()['http']['timed_out'] is True
+    assert set(result.json()['http']['timings']) == {'http'}
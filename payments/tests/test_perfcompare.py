@@ -0,0 +1,67 @@
+"""
+    Performance comparison unittests
+"""
+import json
+import sys
+from pathlib import Path
+
+from _pytest.monkeypatch import MonkeyPatch
+
+from payments import perfcompare
+from payments.perfcompare import (REGRESSION, IMPROVEMENT, UNCHANGED, MISSING, Thresholds, compare, compare_samples,
+                                  load_samples)
+
+
+def _bench(path: Path, wall: list[float], login: list[float]) -> Path:
+    path.write_text(json.dumps({
+        'meta': {'runs': len(wall)},
+        'providers': {'actum': {'wall': {'samples': wall}, 'stages': {'login': {'samples': login}}}},
+    }))
+    return path
+
+
+def test_load_samples_from_run_outputs(tmp_path: Path) -> None:
+    paths = []
+    for index, time in enumerate(['10.00', '12.00']):
+        path = tmp_path / f'run{index}.json'
+        path.write_text(json.dumps({'actum': {'payments': [], 'time': time, 'timings': {'login': '3.00'}},
+                                    'pewik': {'payments': [], 'time': ''}}))
+        paths.append(path)
+    assert load_samples(*paths) == {'actum': [10.0, 12.0], 'actum/login': [3.0, 3.0]}
+
+
+def test_significant_slowdown_is_regression(tmp_path: Path) -> None:
+    baseline = load_samples(_bench(tmp_path / 'a.json', [10, 10.2, 9.9, 10.1, 10], [3, 3.1, 2.9, 3, 3]))
+    current = load_samples(_bench(tmp_path / 'b.json', [13, 13.1, 12.8, 13.2, 13], [3, 3, 3.1, 2.9, 3]))
+    results = {result.key: result for result in compare(baseline, current)}
+    assert results['actum'].verdict == REGRESSION
+    assert results['actum'].p_value is not None and results['actum'].p_value < 0.05
+    assert results['actum/login'].verdict == UNCHANGED
+
+
+def test_thresholds() -> None:
+    baseline = {'a': [10.0, 10.0, 10.0], 'b': [10.0], 'gone': [1.0]}
+    current = {'a': [10.4, 10.4, 10.4], 'b': [5.0], 'new': [1.0]}
+    results = {result.key: result.verdict for result in compare(baseline, current, Thresholds(min_samples=3))}
+    assert results == {'a': UNCHANGED, 'b': IMPROVEMENT, 'gone': MISSING, 'new': MISSING}
+    results = {result.key: result.verdict for result in compare({'a': [10.0]}, {'a': [12.0]})}
+    assert results == {'a': REGRESSION}
+
+
+def test_too_few_samples_for_significance() -> None:
+    # 3 vs 3 samples can never reach p < 0.05, so only the thresholds apply
+    result = compare_samples('a', [10.0, 10.1, 9.9], [13.0, 13.1, 12.9])
+    assert result.p_value is None
+    assert result.verdict == REGRESSION
+    result = compare_samples('a', [10.0, 10.1, 9.9, 10.0], [13.0, 13.1, 12.9, 13.0])
+    assert result.p_value is not None and result.p_value < 0.05
+    assert result.verdict == REGRESSION
+
+
+def test_main_exit_code(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    baseline = _bench(tmp_path / 'a.json', [10, 10.2, 9.9, 10.1, 10], [3, 3.1, 2.9, 3, 3])
+    current = _bench(tmp_path / 'b.json', [13, 13.1, 12.8, 13.2, 13], [3, 3, 3.1, 2.9, 3])
+    monkeypatch.setattr(sys, 'argv', ['prog', '-b', str(baseline), '-c', str(current)])
+    assert perfcompare.main() == 1
+    monkeypatch.setattr(sys, 'argv', ['prog', '-b', str(baseline), '-c', str(baseline)])
+    assert perfcompare.main() == 0
@@ -12,6 +12,8 @@ from browser import Locator
 from mocks import DummyProvider, MockBrowser
 from payments.payments import DueDate, Amount
 from payments.providers.provider import Provider
+from payments.providers.resource_policy import IMAGES, TRACKERS, ResourcePolicy
+from payments.timing import Timeline
 
 
 def test_location_order_map() -> None:
@@ -76,3 +78,108 @@ def test_payment_sorting(mock_cred: Any) -> None:
     )
     payments = provider.get_payments(MockBrowser())
     assert [p.location for p in payments] == ['Sezamowa', 'Bryla', 'Nieznana']
+
+
+def test_read_table_single_round_trip() -> None:
+    """Test whether the whole table is read with a single script call."""
+    rows = [[['01.02.2025', '12,34'], {'button': 'Zapłać'}, {'id': 'r1'}],
+            [['02.03.2025', '0,00'], {'button': None}, {'id': None}]]
+    browser = MockBrowser()
+    with patch.object(browser, 'execute_script', create=True, return_value=rows) as execute_script:
+        table = Provider.read_table(browser,
+                                    Locator(By.CLASS_NAME, 'row'),
+                                    Locator(By.TAG_NAME, 'td'),
+                                    {'button': Locator(By.CLASS_NAME, 'button')},
+                                    ('id',),
+                                    Locator(By.ID, 'invoices'))
+    execute_script.assert_called_once()
+    assert execute_script.call_args.args[1:] == (['id', 'invoices'], ['class name', 'row'], ['tag name', 'td'],
+                                                 {'button': ['class name', 'button']}, ['id'])
+    assert table[0].cells == ['01.02.2025', '12,34']
+    assert table[0].extras == {'button': 'Zapłać'}
+    assert table[1].attributes == {'id': None}
+
+
+def test_read_table_missing_root() -> None:
+    """Test whether a missing table gives no rows."""
+    browser = MockBrowser()
+    with patch.object(browser, 'execute_script', create=True, return_value=None):
+        assert Provider.read_table(browser, Locator(By.TAG_NAME, 'tr'), root=Locator(By.ID, 'missing')) == []
+
+
+def test_close_overlays_probes_all_buttons_at_once() -> None:
+    """Test whether overlay buttons are watched with a single wait and duplicates are collapsed."""
+    decline = Locator(By.ID, 'decline')
+    close = Locator(By.CLASS_NAME, 'icon-close')
+    provider = DummyProvider()
+    provider.overlay_buttons = [decline, close, close]
+    browser = MockBrowser()
+    with (patch.object(browser, 'execute_async_script', create=True, side_effect=[[1], [0, 1]]) as wait,
+          patch.object(browser, 'safe_click_page_element', create=True) as click,
+          patch.object(browser, 'wait_for_page_element_disappear', create=True),
+          Timeline(provider.name).activate() as timeline):
+        provider._close_overlays(browser)
+    assert [call.args[1] for call in wait.call_args_list] == [
+        [['id', 'decline'], ['class name', 'icon-close']],
+        [['id', 'decline'], ['class name', 'icon-close']],
+    ]
+    assert [call.args[0] for call in click.call_args_list] == [close, decline, close]
+    assert list(timeline.durations()) == ['overlays']
+
+
+def test_resource_policy_blocks_before_page_load(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test whether resources are blocked in the new tab before the login page is opened and counted."""
+    monkeypatch.delenv('PAYMENTS_BLOCK_RESOURCES', raising=False)
+    provider = DummyProvider()
+    provider.url = 'http://localhost/login'
+    provider.resource_policy = ResourcePolicy(IMAGES, TRACKERS).allowing('*.svg*')
+    browser = MockBrowser()
+    calls: list[tuple[str, Any]] = []
+    stats = [['http://localhost/logo.png'], 3, 1200, '1700000000000.5']
+    with (patch.object(browser, 'open_in_new_tab', side_effect=lambda url: calls.append(('tab', url))),
+          patch.object(browser, 'execute_cdp_cmd', create=True,
+                       side_effect=lambda cmd, params: calls.append((cmd, params))),
+          patch.object(browser, 'get', create=True, side_effect=lambda url: calls.append(('get', url))),
+          patch.object(browser, 'execute_script', create=True, return_value=stats),
+          patch.object(browser, 'wait_for_page_load_completed', create=True),
+          patch.object(provider, '_close_overlays')):
+        provider.load(browser)
+    assert [call[0] for call in calls] == ['tab', 'Network.enable', 'Network.setBlockedURLs', 'get']
+    assert calls[0][1] == 'about:blank' and calls[3][1] == 'http://localhost/login'
+    blocked = calls[2][1]['urls']
+    assert '*.png*' in blocked and '*://*.googletagmanager.com/*' in blocked and '*.svg*' not in blocked
+    assert provider.resource_stats == {'blocked_requests': 1, 'loaded_requests': 3, 'loaded_bytes': 1200}
+
+
+def test_resources_counted_once_per_document(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test whether a page read more than once adds only the requests made since it was last read."""
+    monkeypatch.delenv('PAYMENTS_BLOCK_RESOURCES', raising=False)
+    provider = DummyProvider()
+    browser = MockBrowser()
+    stats = [
+        # Login page, after loading and after a login which did not leave it
+        [['http://localhost/logo.png'], 3, 1200, 'login'],
+        [['http://localhost/logo.png'], 5, 1500, 'login'],
+        # Payments page, after logging in and after fetching payments
+        [[], 2, 100, 'payments'],
+        [[], 2, 100, 'payments'],
+    ]
+    with patch.object(browser, 'execute_script', create=True, side_effect=stats):
+        for _ in stats:
+            provider._record_resources(browser)
+    assert provider.resource_stats == {'blocked_requests': 1, 'loaded_requests': 7, 'loaded_bytes': 1600}
+
+
+def test_resource_policy_disabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test whether the page is opened directly when resource blocking is turned off."""
+    monkeypatch.setenv('PAYMENTS_BLOCK_RESOURCES', 'false')
+    provider = DummyProvider()
+    browser = MockBrowser()
+    with (patch.object(browser, 'open_in_new_tab') as open_in_new_tab,
+          patch.object(browser, 'execute_cdp_cmd', create=True) as execute_cdp_cmd,
+          patch.object(browser, 'wait_for_page_load_completed', create=True),
+          patch.object(provider, '_close_overlays')):
+        provider.load(browser)
+    open_in_new_tab.assert_called_once_with(provider.url)
+    execute_cdp_cmd.assert_not_called()
+    assert provider.resource_stats == {}
@@ -0,0 +1,116 @@
+"""
+    ResultCache class unittests
+"""
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from mocks import DummyProvider
+from payments.payments.payment import Payment
+from payments.payments.resultcache import ResultCache, parse_age
+
+
+def _due(days: int) -> str:
+    return (date.today() + timedelta(days=days)).isoformat()
+
+
+def test_parse_age() -> None:
+    assert parse_age('90') == 90
+    assert parse_age('15m') == 900
+    assert parse_age('12h') == 43200
+    assert parse_age('2d') == 172800
+    with pytest.raises(ValueError):
+        parse_age('soon')
+
+
+def test_put_save_and_get(tmp_path: Path) -> None:
+    provider = DummyProvider('cached', ('L1',))
+    cache = ResultCache(3600, tmp_path / 'results.json')
+    cache.put(provider, [Payment(provider.name, 'L1', _due(10), '12,34')])
+    cache.save()
+    payments = ResultCache(3600, tmp_path / 'results.json').get(provider)
+    assert payments is not None
+    assert len(payments) == 1
+    assert payments[0].cached
+    assert payments[0].status == 'cached'
+    assert payments[0].amount == 12.34
+    assert payments[0].to_json()['status'] == 'cached'
+
+
+def test_get_respects_max_age_and_provider_ttl(tmp_path: Path) -> None:
+    provider = DummyProvider('cached', ('L1',))
+    cache = ResultCache(3600, tmp_path / 'results.json')
+    cache.put(provider, [Payment(provider.name, 'L1', _due(10), '12,34')])
+    cache._entries[provider.name]['L1']['stored'] = time.time() - 600
+    assert cache.get(provider) is not None
+    provider.result_ttl = 300
+    assert cache.get(provider) is None
+    provider.result_ttl = None
+    cache.max_age = 300
+    assert cache.get(provider) is None
+
+
+def test_get_refreshes_payments_close_to_due_date(tmp_path: Path) -> None:
+    provider = DummyProvider('cached', ('L1',))
+    cache = ResultCache(3600, tmp_path / 'results.json')
+    cache.put(provider, [Payment(provider.name, 'L1', _due(ResultCache.DUE_DATE_MARGIN), '12,34')])
+    assert cache.get(provider) is None
+    cache.put(provider, [Payment(provider.name, 'L1', _due(-30), '0,00')])
+    payments = cache.get(provider)
+    assert payments is not None
+    assert payments[0].due_date == date.today()
+
+
+def test_failure_is_not_cached(tmp_path: Path) -> None:
+    provider = DummyProvider('cached', ('L1',))
+    cache = ResultCache(3600, tmp_path / 'results.json')
+    cache.put(provider, [Payment(provider.name, 'L1', _due(10), '12,34')])
+    cache.put(provider, provider.failed_payments('Login error'))
+    assert cache.get(provider) is None
+
+
+def test_failed_location_keeps_other_locations(tmp_path: Path) -> None:
+    provider = DummyProvider('cached', ('L1', 'L2', 'L3'))
+    cache = ResultCache(3600, tmp_path / 'results.json')
+    cache.put(provider, [Payment(provider.name, 'L1', _due(10), '12,34'),
+                         Payment(provider.name, 'L2', _due(10), '56,78'),
+                         Payment(provider.name, 'L3', _due(1), '90,00')])
+    # L3 is due soon, so the provider is collected again
+    assert cache.get(provider) is None
+    collected = [Payment(provider.name, 'L1', _due(10), '12,34'),
+                 Payment(provider.name, 'L2', None, None, 'Fetch error'),
+                 Payment(provider.name, 'L3', _due(1), '0,00')]
+    payments = cache.merge(provider, collected)
+    # The failed location is filled in from the cache, the others are fresh
+    assert [(p.location, p.status) for p in payments] == [('L1', 'success'), ('L2', 'cached'), ('L3', 'success')]
+    assert payments[1].amount == 56.78
+    cache.put(provider, payments)
+    cached = cache.get(provider)
+    assert cached is not None
+    assert [(p.location, str(p.amount)) for p in cached] == [('L1', '12,34'), ('L2', '56,78'), ('L3', '0,00')]
+
+
+def test_failed_location_without_cache(tmp_path: Path) -> None:
+    provider = DummyProvider('cached', ('L1', 'L2'))
+    cache = ResultCache(3600, tmp_path / 'results.json')
+    cache.put(provider, [Payment(provider.name, 'L1', _due(10), '12,34'),
+                         Payment(provider.name, 'L2', _due(1), '56,78')])
+    collected = [Payment(provider.name, 'L1', _due(10), '12,34'), Payment(provider.name, 'L2', None, None, 'Error')]
+    # L2 is due soon, so its cached payment cannot stand in for the failed one
+    assert cache.merge(provider, collected) == collected
+    cache.put(provider, collected)
+    assert cache.get(provider) is None
+    assert list(cache._entries[provider.name]) == ['L1']
+
+
+def test_save_failure_is_logged(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    provider = DummyProvider('cached', ('L1',))
+    cache = ResultCache(3600, tmp_path / 'results.json')
+    cache.put(provider, [Payment(provider.name, 'L1', _due(10), '12,34')])
+    with caplog.at_level('WARNING'), patch('os.replace', side_effect=PermissionError('Access denied')):
+        cache.save()
+    assert 'Cannot save result cache' in caplog.text
+    assert not (tmp_path / 'results.json').exists()
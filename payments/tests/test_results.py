@@ -0,0 +1,50 @@
+"""
+    Incremental result emission unittests
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+from browser import BrowserOptions
+from mocks import DummyProvider, MockBrowser
+from payments import Payment, PaymentsManager
+from payments.payments import IncrementalJsonWriter, NdjsonWriter, ProviderResult
+
+
+def _providers() -> list[DummyProvider]:
+    return [DummyProvider(f'p{i}', ('L1',), [Payment(f'p{i}', 'L1', '2025-06-01', str(i))]) for i in range(4)]
+
+
+def test_results_emitted_per_provider() -> None:
+    emitted: list[ProviderResult] = []
+    output = PaymentsManager(_providers()).collect(lambda _=0: BrowserOptions(__file__, False, False, ''),
+                                                   MockBrowser, jobs=2, on_result=emitted.append)
+    assert sorted(result.provider for result in emitted) == ['p0', 'p1', 'p2', 'p3']
+    # Every emitted entry matches the consolidated output
+    assert {result.provider: result.json() for result in emitted} == output.json()
+
+
+def test_writers_keep_partial_results(tmp_path: Path) -> None:
+    class Crash(Exception):
+        pass
+
+    def crash_on_third(result: ProviderResult) -> None:
+        if result.provider == 'p2':
+            raise Crash()
+
+    ndjson_path = tmp_path / 'output.ndjson'
+    json_path = tmp_path / 'output.json'
+    json_writer = IncrementalJsonWriter(json_path)
+    with NdjsonWriter(ndjson_path) as ndjson_writer, pytest.raises(Crash):
+        def on_result(result: ProviderResult) -> None:
+            crash_on_third(result)
+            ndjson_writer(result)
+            json_writer(result)
+        PaymentsManager(_providers()).collect(lambda: BrowserOptions(__file__, False, False, ''),
+                                              MockBrowser, on_result=on_result)
+    lines = [json.loads(line) for line in ndjson_path.read_text(encoding='utf-8').splitlines()]
+    assert [line['provider'] for line in lines] == ['p0', 'p1']
+    assert lines[1]['payments'][0]['amount'] == '1,00'
+    with open(json_path, encoding='utf-8') as stream:
+        assert list(json.load(stream)) == ['p0', 'p1']
@@ -0,0 +1,82 @@
+"""
+    Run checkpoints and resuming unittests
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from browser import BrowserOptions
+from mocks import DummyProvider, MockBrowser
+from payments import Payment, PaymentsList, PaymentsManager
+from payments.payments import RunState
+
+
+def _options() -> BrowserOptions:
+    return BrowserOptions(__file__, False, False, '')
+
+
+def _providers(fail: tuple[str, ...] = ()) -> list[DummyProvider]:
+    return [DummyProvider(name, ('L1',), [Payment(name, 'L1', '2025-06-01', None if name in fail else '10')])
+            for name in ('p1', 'p2', 'p3')]
+
+
+def test_checkpoint_and_resume(tmp_path: Path) -> None:
+    first = RunState('run1', tmp_path)
+    output = PaymentsManager(_providers(fail=('p2',)), run_state=first).collect(_options, MockBrowser)
+    with open(tmp_path / 'run1.json', encoding='utf-8') as stream:
+        assert json.load(stream) == output.json()
+
+    resumed = RunState.resume('run1', tmp_path)
+    assert resumed.run_id == 'run1'
+    # Providers which succeeded before would fail now, if collected again
+    output = PaymentsManager(_providers(fail=('p1', 'p3')), run_state=resumed).collect(_options, MockBrowser)
+    details = output.json()
+    assert details['p1'].get('resumed') and details['p3'].get('resumed')
+    assert 'resumed' not in details['p2']
+    assert all(payment.status == 'success' for payment in output.payments)
+    assert list(details) == ['p1', 'p2', 'p3']
+
+
+def test_resume_from_json_output(tmp_path: Path) -> None:
+    previous = PaymentsList([Payment('p1', 'L1', '2025-06-01', '10'), Payment('p2', 'L1', None, None, 'error')],
+                            {'p1': 1.0, 'p2': 2.0})
+    path = tmp_path / 'output.json'
+    path.write_text(json.dumps(previous.json()), encoding='utf-8')
+    state = RunState.resume(str(path), tmp_path, run_id='run2')
+    assert state.completed('p1') is not None
+    assert state.completed('p2') is None
+    assert state.completed('p3') is None
+    with pytest.raises(FileNotFoundError):
+        RunState.resume('unknown', tmp_path)
+
+
+def test_resume_skips_providers_marked_failed(tmp_path: Path) -> None:
+    previous = PaymentsList([Payment('p1', 'L1', '2025-06-01', '10'), Payment('p2', 'L1', '2025-06-01', '20')],
+                            {'p1': 1.0, 'p2': 2.0})
+    data = previous.json()
+    # As compare-output.ps1 marks providers whose output changed, keeping their amounts
+    for payment in data['p2']['payments']:
+        payment.update(status='failed', reason='diff changed')
+    path = tmp_path / 'output.json'
+    path.write_text(json.dumps(data), encoding='utf-8')
+    state = RunState.resume(str(path), tmp_path, run_id='run3')
+    assert state.completed('p1') is not None
+    assert state.completed('p2') is None
+
+
+def test_evict_expired(tmp_path: Path) -> None:
+    old = tmp_path / 'old.json'
+    old.write_text('{}')
+    expired = time.time() - RunState.MAX_AGE - 1
+    os.utime(old, (expired, expired))
+    (tmp_path / 'new.json').write_text('{}')
+    assert RunState('run', tmp_path).evict_expired() == 1
+    assert not old.exists()
+
+
+def test_paymentslist_from_json() -> None:
+    original = PaymentsList([Payment('p1', 'L1', '2025-06-01', '10')], {'p1': 1.5}, {'p1': {'cached': True}})
+    assert PaymentsList.from_json(original.json()).json() == original.json()
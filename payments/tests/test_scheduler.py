@@ -0,0 +1,46 @@
+"""
+    ProviderScheduler class unittests
+"""
+import json
+from pathlib import Path
+
+from mocks import DummyProvider
+from payments.payments.scheduler import ProviderScheduler
+
+
+def _providers(*names: str) -> list[DummyProvider]:
+    return [DummyProvider(name, ('L1',)) for name in names]
+
+
+def test_order_without_history_keeps_default_order() -> None:
+    providers = _providers('a', 'b', 'c')
+    assert ProviderScheduler().order(providers) == providers
+
+
+def test_order_longest_first() -> None:
+    providers = _providers('a', 'b', 'c')
+    scheduler = ProviderScheduler({'a': 5.0, 'b': 50.0, 'c': 20.0})
+    assert [p.name for p in scheduler.order(providers)] == ['b', 'c', 'a']
+
+
+def test_makespan_list_scheduling() -> None:
+    assert ProviderScheduler.makespan([50, 20, 10, 5], 1) == 85
+    assert ProviderScheduler.makespan([50, 20, 10, 5], 2) == 50
+    assert ProviderScheduler.makespan([5, 10, 20, 50], 2) == 60
+
+
+def test_from_files_reads_json_output_and_history(tmp_path: Path) -> None:
+    output = tmp_path / 'output.json'
+    output.write_text(json.dumps({'a': {'payments': [], 'time': '12.50'}, 'b': {'payments': [], 'time': ''}}))
+    history = tmp_path / 'history.json'
+    history.write_text(json.dumps({'c': 3.0}))
+    scheduler = ProviderScheduler.from_files(output, history, tmp_path / 'missing.json')
+    assert scheduler.history == {'a': 12.5, 'c': 3.0}
+
+
+def test_update_and_save(tmp_path: Path) -> None:
+    scheduler = ProviderScheduler({'a': 10.0})
+    scheduler.update({'a': 20.0, 'b': 4.0})
+    path = tmp_path / 'history.json'
+    scheduler.save(path)
+    assert ProviderScheduler.from_files(path).history == {'a': 15.0, 'b': 4.0}
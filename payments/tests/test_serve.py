@@ -0,0 +1,73 @@
+"""
+    Collector daemon unittests
+"""
+import json
+import threading
+from collections.abc import Iterator, Sequence
+from typing import Any, cast
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from browser import BrowserOptions
+from mocks import DummyProvider, MockBrowser
+from payments import Payment, PaymentsManager
+from payments.lookuplist import LookupList
+from payments.payments import WorkerPool
+from payments.providers.provider import Provider
+from payments.serve import CollectorDaemon, create_server
+
+
+def _providers(selection: str = '') -> LookupList[Provider]:
+    providers = LookupList[Provider](DummyProvider('p1', ('L1',), [Payment('p1', 'L1', '2025-06-01', '20')]),
+                                     DummyProvider('p2', ('L1',), [Payment('p2', 'L1', '2025-06-02', '10')]))
+    selected = providers[selection]
+    return LookupList[Provider](*(selected if isinstance(selected, Sequence) else [selected]))
+
+
+@pytest.fixture
+def daemon_url(monkeypatch: MonkeyPatch) -> Iterator[str]:
+    monkeypatch.setattr('payments.serve.create_providers', _providers)
+    with WorkerPool(lambda _: BrowserOptions(__file__, False, False, ''), MockBrowser, 2) as pool:
+        server = create_server(CollectorDaemon(pool), port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def _get(url: str) -> dict[str, Any]:
+    with urlopen(url) as response:
+        return cast(dict[str, Any], json.load(response))
+
+
+def test_collect_returns_json_output(daemon_url: str) -> None:
+    result = _get(f'{daemon_url}/collect?jobs=2')
+    assert list(result) == ['p1', 'p2']
+    assert result['p1']['payments'][0]['amount'] == '20,00'
+    assert set(result['p1']['timings']) == {'login', 'fetch', 'logout'}
+    result = _get(f'{daemon_url}/collect?provider=dummyprovider')
+    assert list(result) == ['p1']
+    assert _get(f'{daemon_url}/health')['collections'] == 2
+
+
+def test_collect_errors(daemon_url: str) -> None:
+    with pytest.raises(HTTPError) as error:
+        urlopen(f'{daemon_url}/collect?provider=unknown')
+    assert error.value.code == 404
+    with pytest.raises(HTTPError) as error:
+        urlopen(f'{daemon_url}/collect?sort=nonsense')
+    assert error.value.code == 400
+
+
+def test_pool_workers_are_kept_open() -> None:
+    providers = _providers()
+    with WorkerPool(lambda _: BrowserOptions(__file__, False, False, ''), MockBrowser, 2) as pool:
+        pool.warm_up()
+        managers = [worker.manager for worker in pool.workers]
+        PaymentsManager(providers).collect_real(pool.workers[0].options, jobs=4, pool=pool)
+        assert [worker.manager for worker in pool.workers] == managers
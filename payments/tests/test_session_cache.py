@@ -0,0 +1,174 @@
+"""
+    SessionCache class unittests
+"""
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from cryptography.fernet import Fernet
+from selenium.webdriver.common.by import By
+
+from browser import Browser, Locator
+from mocks import MockBrowser
+from payments.payments import Payment
+from payments.providers.provider import Provider, ProviderConfig
+from payments.providers.session_cache import SessionCache, _DUMP_LOCAL_STORAGE_JS
+from payments.providers.vectra import TWO_FACTOR_AUTH_BUTTON, USER_MENU, Vectra
+
+COOKIES = [{'name': 'SESSION', 'value': 'secret-value', 'domain': 'example.com', 'path': '/'}]
+
+
+def test_save_and_load(tmp_path: Path) -> None:
+    cache = SessionCache(tmp_path, Fernet.generate_key())
+    cache.save('provider', COOKIES, {'https://example.com': {'token': 'abc'}}, 60)
+    data = cache.load('provider')
+    assert data is not None
+    assert data['cookies'] == COOKIES
+    assert data['local_storage'] == {'https://example.com': {'token': 'abc'}}
+
+
+def test_session_is_encrypted(tmp_path: Path) -> None:
+    cache = SessionCache(tmp_path, Fernet.generate_key())
+    cache.save('provider', COOKIES, {}, 60)
+    assert b'secret-value' not in (tmp_path / 'provider.session').read_bytes()
+    assert SessionCache(tmp_path, Fernet.generate_key()).load('provider') is None
+    assert not (tmp_path / 'provider.session').exists()
+
+
+def test_expired_session_is_evicted(tmp_path: Path) -> None:
+    cache = SessionCache(tmp_path, Fernet.generate_key())
+    cache.save('expired', COOKIES, {}, -1)
+    cache.save('valid', COOKIES, {}, 60)
+    assert cache.evict_expired() == 1
+    assert cache.load('expired') is None
+    assert cache.load('valid') is not None
+
+
+class SessionBrowser(MockBrowser):
+    """Browser profile holding cookies of the provider and of another site"""
+    def __init__(self, *_: Any, **__: Any) -> None:
+        super().__init__()
+        self.cookies = [{'name': 'SESSION', 'value': 'portal', 'domain': 'portal.example.com', 'path': '/'},
+                        {'name': 'SESSION', 'value': 'other', 'domain': 'other.example.org', 'path': '/'}]
+        self.restored: list[dict[str, Any]] = []
+
+    def execute_cdp_cmd(self, cmd: str, cmd_args: dict[str, Any]) -> dict[str, Any]:
+        if cmd == 'Network.getCookies':
+            return {'cookies': [cookie for cookie in self.cookies
+                                if any(f'//{cookie["domain"]}/' in url for url in cmd_args['urls'])]}
+        if cmd == 'Network.setCookies':
+            self.restored += cmd_args['cookies']
+        return {}
+
+    def execute_script(self, script: str, *args: Any) -> Any:
+        if script == _DUMP_LOCAL_STORAGE_JS:
+            return ['https://portal.example.com', {'token': 'abc'}]
+        if script == 'return location.origin;':
+            return 'https://portal.example.com'
+        return len(args[0]) if args else None
+
+    def refresh(self) -> None:
+        pass
+
+
+class SessionProvider(Provider):
+    """Provider recognizing a restored session unless it is stale"""
+    session_ttl = 60
+
+    def __init__(self, session_valid: bool = True, login_succeeds: bool = True) -> None:
+        super().__init__('https://portal.example.com/login', ('L1',), Locator(By.ID, 'user'), Locator(By.ID, 'pass'))
+        self.session_valid = session_valid
+        self.strategy = MagicMock()
+        self.strategy.verify.return_value = login_succeeds
+        self.login_strategy = self.strategy
+        self.logouts = 0
+
+    def _is_logged_in(self, browser: Browser) -> bool:
+        return self.session_valid and self._restored_session is not None
+
+    def logout(self, browser: Browser) -> None:
+        self.logouts += 1
+
+    def _fetch_payments(self, browser: Browser) -> list[Payment]:
+        return [Payment(self.name, 'L1', '2025-06-01', '10')]
+
+
+@pytest.fixture
+def cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> SessionCache:
+    monkeypatch.setenv('PAYMENTS_BLOCK_RESOURCES', 'false')
+    return SessionCache(tmp_path, Fernet.generate_key())
+
+
+def _get_payments(provider: SessionProvider, cache: SessionCache) -> tuple[list[Payment], SessionBrowser]:
+    provider.session_cache = cache
+    browser = SessionBrowser()
+    return provider.get_payments(browser), browser
+
+
+def test_session_restored_skips_login_and_logout(cache: SessionCache) -> None:
+    first = SessionProvider()
+    payments, browser = _get_payments(first, cache)
+    assert payments[0].status == 'success'
+    first.strategy.execute.assert_called_once()
+    assert browser.restored == []
+    # Logged out sessions cannot be reused, so the stored one is kept alive
+    assert first.logouts == 0
+    data = cache.load(first.name)
+    assert data is not None
+    # Only the provider's cookies, not the ones of other sites in the browser profile
+    assert [cookie['value'] for cookie in data['cookies']] == ['portal']
+    assert data['local_storage'] == {'https://portal.example.com': {'token': 'abc'}}
+
+    second = SessionProvider()
+    payments, browser = _get_payments(second, cache)
+    assert payments[0].status == 'success'
+    second.strategy.execute.assert_not_called()
+    assert [cookie['value'] for cookie in browser.restored] == ['portal']
+    assert second.logouts == 0
+
+
+def test_stale_session_falls_back_to_login(cache: SessionCache) -> None:
+    _get_payments(SessionProvider(), cache)
+    stale = SessionProvider(session_valid=False, login_succeeds=False)
+    payments, browser = _get_payments(stale, cache)
+    assert [cookie['value'] for cookie in browser.restored] == ['portal']
+    stale.strategy.execute.assert_called_once()
+    assert payments[0].comment == 'Login error'
+    # The stale session is dropped and the failed login is not stored
+    assert cache.load(stale.name) is None
+    assert stale.logouts == 1
+
+
+def test_session_store_failure_logs_out(cache: SessionCache) -> None:
+    provider = SessionProvider()
+    with patch.object(cache, 'save', side_effect=OSError('No space left on device')):
+        payments, _ = _get_payments(provider, cache)
+    assert payments[0].status == 'success'
+    assert provider.logouts == 1
+    assert cache.load(provider.name) is None
+
+
+@pytest.mark.parametrize('session_valid', [True, False])
+def test_vectra_validates_restored_session(cache: SessionCache, monkeypatch: pytest.MonkeyPatch,
+                                           session_valid: bool) -> None:
+    monkeypatch.setattr(ProviderConfig, '_initialized', True)
+    provider = Vectra('Sezamowa')
+    provider.session_cache = cache
+    provider.login_strategy = strategy = MagicMock()
+    cache.save(provider.name, [], {}, 60)
+    browser = SessionBrowser()
+    with (patch.object(browser, 'wait_for_page_element', create=True,
+                       side_effect=lambda locator, timeout=None: session_valid and locator == USER_MENU) as wait,
+          patch.object(provider, '_close_overlays')):
+        provider.login(browser)
+    waited = [call.args[0] for call in wait.call_args_list]
+    if session_valid:
+        assert provider.logged_in
+        strategy.execute.assert_not_called()
+        assert TWO_FACTOR_AUTH_BUTTON not in waited
+        assert cache.load(provider.name) is not None
+    else:
+        strategy.execute.assert_called_once()
+        assert TWO_FACTOR_AUTH_BUTTON in waited
+        assert cache.load(provider.name) is None
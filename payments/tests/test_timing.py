@@ -0,0 +1,48 @@
+"""
+    Stage timing unittests
+"""
+import json
+import time
+from pathlib import Path
+
+from payments.timing import Timeline, span, write_chrome_trace
+
+
+def test_span_without_active_timeline() -> None:
+    with span('ignored'):
+        pass
+
+
+def test_nested_and_repeated_spans() -> None:
+    timeline = Timeline('provider')
+    with timeline.activate():
+        with span('login'):
+            with span('load'):
+                time.sleep(0.01)
+            with span('load'):
+                time.sleep(0.01)
+        with span('fetch'):
+            pass
+    durations = timeline.durations()
+    assert list(durations) == ['login', 'load', 'fetch']
+    assert durations['login'] >= durations['load'] >= 0.02
+    assert [recorded.depth for recorded in timeline.spans] == [1, 1, 0, 0]
+    with span('outside'):
+        pass
+    assert 'outside' not in timeline.durations()
+
+
+def test_write_chrome_trace(tmp_path: Path) -> None:
+    first = Timeline('a', 0)
+    second = Timeline('b', 1)
+    with first.activate(), span('login'):
+        pass
+    with second.activate(), span('fetch'):
+        pass
+    path = tmp_path / 'trace.json'
+    write_chrome_trace(path, [first, second])
+    events = json.loads(path.read_text())['traceEvents']
+    assert [event['tid'] for event in events if event['ph'] == 'M'] == [0, 1]
+    spans = [event for event in events if event['ph'] == 'X']
+    assert [(event['name'], event['cat'], event['tid']) for event in spans] == [('login', 'a', 0), ('fetch', 'b', 1)]
+    assert spans[0]['ts'] == 0
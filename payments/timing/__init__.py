@@ -0,0 +1,10 @@
+"""
+    Stage timing instrumentation
+"""
+from .timeline import Timeline, span, write_chrome_trace
+
+__all__ = [
+    'Timeline',
+    'span',
+    'write_chrome_trace'
+]
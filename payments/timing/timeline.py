@@ -0,0 +1,125 @@
+"""
+    Lightweight span timer recording nested stage durations of a provider run
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Iterable, Iterator, NamedTuple
+
+
+class Span(NamedTuple):
+    """
+    Single recorded stage
+    """
+    name: str
+    depth: int
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        """
+        Stage duration in seconds
+        """
+        return self.end - self.start
+
+
+class Timeline:
+    """
+    Spans recorded during a single provider run. Spans are recorded with span() in the context
+    (thread, or a context copied into a helper thread) where the timeline was activated.
+    """
+    def __init__(self, name: str, thread: int = 0) -> None:
+        """
+        :param name: timeline name (provider name)
+        :param thread: number of the worker running the provider, used as Chrome trace thread id
+        """
+        self.name = name
+        self.thread = thread
+        self.spans: list[Span] = []
+        self._depth = 0
+
+    @contextmanager
+    def activate(self) -> Iterator['Timeline']:
+        """
+        Make this timeline the one span() records into, within the current context
+        """
+        token = _timeline.set(self)
+        try:
+            yield self
+        finally:
+            _timeline.reset(token)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """
+        Record a stage
+        :param name: stage name
+        """
+        depth = self._depth
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth = depth
+            self.spans.append(Span(name, depth, start, time.perf_counter()))
+
+    def durations(self) -> dict[str, float]:
+        """
+        Total duration of every stage; repeated stages are summed up, nested ones are included in their parents
+        :return: mapping of stage name to its duration in seconds, in order of stage start
+        """
+        result: dict[str, float] = {}
+        for recorded in sorted(self.spans, key=lambda item: item.start):
+            result[recorded.name] = result.get(recorded.name, 0.0) + recorded.duration
+        return result
+
+
+_timeline: ContextVar[Timeline | None] = ContextVar('timeline', default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Record a stage in the active timeline; does nothing if no timeline is active
+    :param name: stage name
+    """
+    timeline = _timeline.get()
+    if timeline is None:
+        yield
+        return
+    with timeline.span(name):
+        yield
+
+
+def write_chrome_trace(path: Path | str, timelines: Iterable[Timeline]) -> None:
+    """
+    Write timelines in Chrome trace event format (viewable in chrome://tracing or Perfetto)
+    :param path: output file path
+    :param timelines: timelines to be written
+    """
+    timelines = list(timelines)
+    origin = min((recorded.start for timeline in timelines for recorded in timeline.spans), default=0.0)
+    pid = os.getpid()
+    events: list[dict[str, Any]] = []
+    for thread in sorted({timeline.thread for timeline in timelines}):
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread,
+                       'args': {'name': f'worker-{thread}'}})
+    for timeline in timelines:
+        for recorded in sorted(timeline.spans, key=lambda item: (item.start, item.depth)):
+            events.append({
+                'name': recorded.name,
+                'cat': timeline.name,
+                'ph': 'X',
+                'ts': round((recorded.start - origin) * 1e6),
+                'dur': round(recorded.duration * 1e6),
+                'pid': pid,
+                'tid': timeline.thread,
+                'args': {'provider': timeline.name},
+            })
+    with open(path, 'w', encoding='utf-8') as stream:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, stream)